@@ -0,0 +1,210 @@
+"""
+ASGI version of the web front end, for serving many concurrent players per worker.
+
+Run it with the production launcher (see `serve.py`):
+
+    python serve.py --workers 4
+
+It serves the same pages and JSON API as the Flask app in `main.py`.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from services.api import (
+    NO_SESSION_ERROR, autoplay_events, parse_autoplay_request, parse_deposit, parse_spin_request, spin_response,
+)
+from services.autoplay import Autoplay, PendingRuns
+from services.game import settle_round
+from services.ledger import Ledger
+from services.machines import MachineRegistry
+from services.metrics import CONTENT_TYPE, METRICS
+from services.store import SessionStore
+
+templates = Jinja2Templates(directory=Path(__file__).parent / "web_app" / "templates")
+
+ROUTES = ("/", "/play", "/api/spin", "/api/autoplay", "/metrics") # Paths timed under their own label
+STREAM_ROUTE = "/api/autoplay/{run_id}" # Autoplay streams, timed under one label for all runs
+
+
+class RequestTimer:
+    """
+    ASGI middleware recording the latency of every HTTP request per route, added only
+    when metrics are enabled.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            path = scope["path"]
+            if path in ROUTES:
+                route = path
+            elif path.startswith("/api/autoplay/"):
+                route = STREAM_ROUTE
+            else:
+                route = "unmatched"
+            METRICS.histogram(
+                "slot_http_request_seconds", "Time to handle a web request.", {"route": route, "method": scope["method"]}
+            ).record(time.perf_counter_ns() - start)
+
+
+def create_app(store: Optional[SessionStore] = None, registry: Optional[MachineRegistry] = None,
+               ledger: Optional[Ledger] = None, secret_key: str = "dev") -> Starlette:
+    """
+    Build the ASGI application.
+
+    Args:
+        store (Optional[SessionStore]): Balance store, a new one is created when omitted.
+        registry (Optional[MachineRegistry]): Machines spins can be played on, defaults to
+            the bundled machine definitions.
+        ledger (Optional[Ledger]): Ledger that settled rounds are recorded to.
+        secret_key (str): Key used to sign the session cookie.
+
+    Returns:
+        Starlette: The application.
+    """
+    store = store if store is not None else SessionStore()
+    registry = registry if registry is not None else MachineRegistry()
+    autoplay_runs = PendingRuns()
+
+    async def home(request: Request) -> Response:
+        if request.method == "POST":
+            form = await request.form()
+            balance = parse_deposit(form.get("deposit_amount"))
+            if balance is not None:
+                request.session["sid"] = store.create(balance)
+                return templates.TemplateResponse(
+                    request, "home_page.html", {"message": f"You've deposited ${balance} to play the game!"}
+                )
+            return templates.TemplateResponse(request, "home_page.html", {"error": "Please enter a valid deposit amount."})
+
+        return templates.TemplateResponse(request, "home_page.html")
+
+    async def play(request: Request) -> Response:
+        balance = store.get(request.session.get("sid")) or 0
+        return templates.TemplateResponse(request, "play.html", {"balance": balance})
+
+    async def api_spin(request: Request) -> Response:
+        """
+        Settle one round for the current session, see `main.api_spin`.
+
+        Settling takes microseconds and never blocks, so it runs on the event loop; only
+        reading the request body is awaited. Ledger records are buffered and fsynced by the
+        ledger's own thread, so they do not block the loop either.
+        """
+        try:
+            data = await request.json()
+        except ValueError: # Body is not valid JSON
+            data = None
+
+        sid = request.session.get("sid")
+        try:
+            machine, lines, bet = parse_spin_request(data, registry)
+
+            def settle(balance: int):
+                result = settle_round(machine, balance, lines, bet)
+                if ledger is not None:
+                    ledger.record(sid, result)
+                return result.balance, result
+
+            result = store.transact(sid, settle)
+        except ValueError as error: # Invalid request, or total bet above the balance
+            return JSONResponse({"error": str(error)}, status_code=400)
+
+        if result is None:
+            return JSONResponse({"error": NO_SESSION_ERROR}, status_code=401)
+
+        return JSONResponse(spin_response(result))
+
+    async def api_autoplay(request: Request) -> Response:
+        """
+        Create an autoplay run for the current session, see `main.api_autoplay`.
+
+        Only JSON bodies are accepted: a cross-site form cannot send that content type
+        without a CORS preflight, so other sites cannot start runs.
+        """
+        data = None
+        if request.headers.get("content-type", "").split(";")[0].strip() == "application/json":
+            try:
+                data = await request.json()
+            except ValueError: # Body is not valid JSON
+                pass
+
+        sid = request.session.get("sid")
+        try:
+            machine, settings = parse_autoplay_request(data, registry)
+        except ValueError as error:
+            return JSONResponse({"error": str(error)}, status_code=400)
+
+        if store.get(sid) is None:
+            return JSONResponse({"error": NO_SESSION_ERROR}, status_code=401)
+
+        return JSONResponse({"run": autoplay_runs.create(sid, machine, settings)}, status_code=201)
+
+    async def api_autoplay_stream(request: Request) -> Response:
+        """
+        Stream an autoplay run as Server-Sent Events, see `main.api_autoplay_stream`.
+
+        The event generator is synchronous, so Starlette iterates it in its thread pool
+        and a long run does not hold up the event loop.
+        """
+        sid = request.session.get("sid")
+        pending = autoplay_runs.claim(sid, request.path_params["run_id"])
+        if pending is None:
+            return JSONResponse({"error": "Unknown autoplay run"}, status_code=404)
+
+        balance = store.get(sid)
+        if balance is None:
+            return JSONResponse({"error": NO_SESSION_ERROR}, status_code=401)
+
+        machine, settings = pending
+        run = Autoplay(machine, balance, **settings)
+        return StreamingResponse(
+            autoplay_events(run, store, sid, ledger), media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def metrics(request: Request) -> Response:
+        return PlainTextResponse(METRICS.render(), headers={"Content-Type": CONTENT_TYPE})
+
+    middleware = [Middleware(SessionMiddleware, secret_key=secret_key)]
+    if METRICS.enabled:
+        middleware.insert(0, Middleware(RequestTimer))
+
+    return Starlette(
+        routes=[
+            Route("/", home, methods=["GET", "POST"]),
+            Route("/play", play, methods=["GET"]),
+            Route("/api/spin", api_spin, methods=["POST"]),
+            Route("/api/autoplay", api_autoplay, methods=["POST"]),
+            Route(STREAM_ROUTE, api_autoplay_stream, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"]),
+        ],
+        middleware=middleware,
+    )
+
+
+# `serve.py` refuses to start without `SLOT_SECRET_KEY`, "dev" is only for tests and local runs
+app = create_app(
+    ledger=Ledger(os.environ["SLOT_LEDGER"]) if os.environ.get("SLOT_LEDGER") else None,
+    secret_key=os.environ.get("SLOT_SECRET_KEY", "dev"),
+)
@@ -0,0 +1,271 @@
+"""
+Benchmarks for the slot machine hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Results are written as JSON so runs from different commits can be compared. With
+`--compare`, every case that got slower than the threshold is reported and the exit
+status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.game import Game
+from services.logic import SlotMachine
+
+GRID_SIZES = (3, 5, 10) # Square grids, rows == cols
+POOL_SIZES = (20, 100, 1000) # Total number of symbols in the pool
+PAYLINE_COUNTS = (5, 25, 50) # Paylines on a 5x5 grid
+REGRESSION_THRESHOLD = 1.25 # A case is a regression when it is this many times slower
+
+
+def make_machine(size: int, pool_size: int, win_mode: str = "lines", cache: bool = False) -> SlotMachine:
+    """
+    Build a size x size machine whose pool holds `pool_size` symbols spread over 4 kinds.
+
+    Args:
+        size (int): Number of rows and columns.
+        pool_size (int): Total number of symbols in the pool.
+        win_mode (str): How spins are scored, see `SlotMachine`.
+        cache (bool): Precompute column outcomes and memoize evaluations, see `SlotMachine`.
+
+    Returns:
+        SlotMachine: The machine, seeded so every run spins the same grids.
+    """
+    counts = {"A": pool_size // 10, "B": pool_size // 5, "C": pool_size * 3 // 10}
+    counts["D"] = pool_size - sum(counts.values())
+    return SlotMachine(size, size, counts, {"A": 5, "B": 4, "C": 3, "D": 2}, rng=1, win_mode=win_mode, cache=cache)
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Time a callable, best of 5 repeats.
+
+    Args:
+        func (Callable[[], object]): The code to time.
+        min_time (float): Minimum duration of one repeat, in seconds.
+
+    Returns:
+        Dict[str, float]: Loops per repeat and the best time per call in microseconds.
+    """
+    timer = timeit.Timer(func)
+
+    # Double the loop count until one repeat takes at least `min_time`
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    best = min(timer.repeat(repeat=5, number=number)) / number
+    return {"loops": number, "usec_per_call": best * 1e6}
+
+
+def machine_cases(min_time: float) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark `spin()` and `check_winnings()` across grid and pool sizes, and
+    `check_winnings()` across payline counts and win modes, and a full round on
+    small machines with and without the outcome caches.
+    """
+    results = {}
+    for size in GRID_SIZES:
+        for pool_size in POOL_SIZES:
+            if pool_size < size:
+                continue
+            machine = make_machine(size, pool_size)
+            columns = machine.spin()
+            results[f"spin[{size}x{size},pool={pool_size}]"] = measure(machine.spin, min_time)
+            results[f"check_winnings[{size}x{size},pool={pool_size}]"] = measure(
+                lambda: machine.check_winnings(columns, size, 1), min_time
+            )
+
+    # Zigzag paylines, so the cost of evaluating many lines shows up in the trajectory
+    for count in PAYLINE_COUNTS:
+        machine = make_machine(5, 100)
+        machine.paylines = [[(line + col * (line % 3)) % 5 for col in range(5)] for line in range(count)]
+        columns = machine.spin()
+        results[f"check_winnings[5x5,paylines={count}]"] = measure(
+            lambda: machine.check_winnings(columns, count, 1), min_time
+        )
+
+    for win_mode in ("ways", "clusters"):
+        for size in GRID_SIZES:
+            machine = make_machine(size, 100, win_mode)
+            columns = machine.spin()
+            results[f"check_winnings[{size}x{size},{win_mode}]"] = measure(
+                lambda: machine.check_winnings(columns, 1, 1), min_time
+            )
+
+    # Spin and score, so the column-outcome table and the grid cache both show up
+    for cache in (False, True):
+        machine = make_machine(3, 20, cache=cache)
+        results[f"round[3x3,pool=20,cache={cache}]"] = measure(
+            lambda: machine.check_winnings(machine.spin(), 3, 1), min_time
+        )
+    return results
+
+
+def game_cases(min_time: float) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark a headless `Game.settle()` round, and a terminal `Game.play_spin()` round
+    with scripted input and discarded output.
+    """
+    import builtins
+
+    game = Game()
+    output = io.StringIO()
+
+    def settle_round() -> None:
+        game.balance = 1_000_000
+        game.settle(game.MAX_LINES, 1)
+
+    def play_round() -> None:
+        game.balance = 1_000_000
+        game.play_spin()
+        output.seek(0)
+        output.truncate()
+
+    original_input = builtins.input
+    builtins.input = lambda prompt: str(game.MAX_LINES) if "lines" in prompt else "1"
+    try:
+        with contextlib.redirect_stdout(output):
+            play_spin = measure(play_round, min_time)
+    finally:
+        builtins.input = original_input
+
+    return {"game.settle": measure(settle_round, min_time), "game.play_spin": play_spin}
+
+
+def web_cases(min_time: float) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark the Flask routes through the test client.
+    """
+    from main import app
+
+    client = app.test_client()
+    client.post("/", data={"deposit_amount": str(10 ** 12)}) # Enough balance for every /api/spin call
+
+    return {
+        "web GET /": measure(lambda: client.get("/"), min_time),
+        "web POST /": measure(lambda: client.post("/", data={"deposit_amount": "100"}), min_time),
+        "web GET /play": measure(lambda: client.get("/play"), min_time),
+        "web POST /api/spin": measure(lambda: client.post("/api/spin", json={"lines": 3, "bet": 1}), min_time),
+    }
+
+
+SUITES = {
+    "machine": machine_cases,
+    "game": game_cases,
+    "web": web_cases,
+}
+
+
+def git_commit() -> Optional[str]:
+    """
+    The current commit hash, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(suites: List[str], min_time: float = 0.2) -> Dict[str, object]:
+    """
+    Run the selected suites.
+
+    Args:
+        suites (List[str]): Names of the suites to run, see `SUITES`.
+        min_time (float): Minimum duration of one timing repeat, in seconds.
+
+    Returns:
+        Dict[str, object]: Run metadata and the timings per case.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for name in suites:
+        results.update(SUITES[name](min_time))
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """
+    Compare two runs.
+
+    Args:
+        current (Dict[str, object]): The new run.
+        baseline (Dict[str, object]): The run to compare against.
+        threshold (float): Slowdown ratio that counts as a regression.
+
+    Returns:
+        List[str]: One message per regressed case.
+    """
+    regressions = []
+    for case, timing in current["results"].items():
+        before = baseline["results"].get(case)
+        if before is None:
+            continue
+        ratio = timing["usec_per_call"] / before["usec_per_call"]
+        if ratio > threshold:
+            regressions.append(
+                f"{case}: {before['usec_per_call']:.2f}us -> {timing['usec_per_call']:.2f}us ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: Exit status, 1 when `--compare` found regressions.
+    """
+    parser = argparse.ArgumentParser(description="Slot machine benchmarks")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite to run (default: all)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timing repeat")
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Slowdown ratio that fails")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.suite or list(SUITES), args.min_time)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
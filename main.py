@@ -1,19 +1,58 @@
-from flask import Flask, render_template, request, redirect, session, url_for
+import os
+import time
+
+from flask import Flask, Response, g, jsonify, render_template, request, redirect, session, url_for
+
+from services.api import (
+    NO_SESSION_ERROR, autoplay_events, parse_autoplay_request, parse_deposit, parse_spin_request, spin_response,
+)
+from services.autoplay import Autoplay, PendingRuns
+from services.game import Game, settle_round # Game is also imported from here by tests/test_main.py
+from services.ledger import Ledger
+from services.machines import MachineRegistry
+from services.metrics import CONTENT_TYPE, METRICS
+from services.store import SessionStore
 
 app = Flask(
     __name__,
     template_folder="web_app/templates",
     static_folder="web_app/static"
 )
-app.secret_key = 'dev'
+app.secret_key = os.environ.get("SLOT_SECRET_KEY", "dev") # "dev" is only for local runs
+app.config["SESSION_COOKIE_SAMESITE"] = "Lax" # Keep the session cookie off cross-site subrequests
+
+# Balances live on the server in a lock-striped store, the cookie only carries the session id
+store = SessionStore()
+
+# Machines are compiled once from the files in machines/ and reloaded when a file changes
+registry = MachineRegistry()
+
+# Autoplay runs created by POST /api/autoplay, waiting for their stream to be opened
+autoplay_runs = PendingRuns()
+
+# Settled rounds are recorded when a ledger file is configured
+ledger = Ledger(os.environ["SLOT_LEDGER"]) if os.environ.get("SLOT_LEDGER") else None
+
+# Request latency per route, only hooked in when metrics are enabled (SLOT_METRICS=1)
+if METRICS.enabled:
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter_ns()
+
+    @app.after_request
+    def record_latency(response):
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        METRICS.histogram(
+            "slot_http_request_seconds", "Time to handle a web request.", {"route": route, "method": request.method}
+        ).record(time.perf_counter_ns() - g.request_start)
+        return response
 
 @app.route("/", methods=["GET", "POST"])
 def home():
     if request.method == "POST":
-        balance = request.form.get("deposit_amount")
-        if balance and balance.isdigit() and int(balance) > 0:
-            balance = int(balance)
-            session["balance"] = balance
+        balance = parse_deposit(request.form.get("deposit_amount"))
+        if balance is not None:
+            session["sid"] = store.create(balance)
             return render_template("home_page.html", message=f"You've deposited ${balance} to play the game!")
         return render_template("home_page.html", error="Please enter a valid deposit amount.")
 
@@ -21,8 +60,86 @@ def home():
 
 @app.route("/play", methods=["GET"])
 def play():
-    balance = session.get("balance", 0)
-    return f"<h2>You're now ready to play! Your starting balance is ${balance}.</h2>"
+    balance = store.get(session.get("sid")) or 0
+    return render_template("play.html", balance=balance)
+
+@app.route("/api/spin", methods=["POST"])
+def api_spin():
+    """
+    Settle one round for the current session.
+
+    Expects a JSON body with integer `lines` and `bet` (per line) and an optional `machine`
+    id, and returns the grid, the winnings, the winning lines and the new balance.
+    """
+    sid = session.get("sid")
+    try:
+        machine, lines, bet = parse_spin_request(request.get_json(silent=True), registry)
+
+        def settle(balance: int):
+            result = settle_round(machine, balance, lines, bet)
+            if ledger is not None:
+                ledger.record(sid, result) # Inside the transaction, so a session's rounds stay in order
+            return result.balance, result
+
+        result = store.transact(sid, settle)
+    except ValueError as error: # Invalid request, or total bet above the balance
+        return jsonify(error=str(error)), 400
+
+    if result is None:
+        return jsonify(error=NO_SESSION_ERROR), 401
+
+    return jsonify(spin_response(result))
+
+@app.route("/api/autoplay", methods=["POST"])
+def api_autoplay():
+    """
+    Create an autoplay run of up to `spins` rounds for the current session.
+
+    Expects a JSON body with integer `lines`, `bet` and `spins`, plus optional `machine`,
+    `stop_loss` and `stop_win`, and returns the run id to stream, see `api_autoplay_stream`.
+    Nothing is played until the stream is opened.
+    """
+    sid = session.get("sid")
+    try:
+        machine, settings = parse_autoplay_request(request.get_json(silent=True), registry)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+
+    if store.get(sid) is None:
+        return jsonify(error=NO_SESSION_ERROR), 401
+
+    return jsonify(run=autoplay_runs.create(sid, machine, settings)), 201
+
+@app.route("/api/autoplay/<run_id>", methods=["GET"])
+def api_autoplay_stream(run_id: str):
+    """
+    Play a run created by `api_autoplay` and stream it as Server-Sent Events, so a browser
+    can open it with `EventSource`. Rounds are settled in batches and every batch is one
+    "rounds" event, see `autoplay_events()`. A run can only be streamed once, by the
+    session that created it.
+    """
+    sid = session.get("sid")
+    pending = autoplay_runs.claim(sid, run_id)
+    if pending is None:
+        return jsonify(error="Unknown autoplay run"), 404
+
+    balance = store.get(sid)
+    if balance is None:
+        return jsonify(error=NO_SESSION_ERROR), 401
+
+    machine, settings = pending
+    run = Autoplay(machine, balance, **settings)
+    return Response(
+        autoplay_events(run, store, sid, ledger), content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # Deliver every batch as it is settled
+    )
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Export the metrics in the Prometheus text format, empty unless SLOT_METRICS is set.
+    """
+    return Response(METRICS.render(), content_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
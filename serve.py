@@ -0,0 +1,42 @@
+"""
+Production launcher for the ASGI web front end (`asgi.py`), instead of Flask's debug server.
+
+    python serve.py --host 0.0.0.0 --port 8000 --workers 4
+
+Every worker is a separate process with its own in-process session store, so with more
+than one worker the load balancer must keep a player on the same worker (sticky sessions).
+A single worker already serves many concurrent players, since requests never block.
+All workers may share one `SLOT_LEDGER` file: appends and the repair of a torn last line
+take an exclusive lock on it, so a worker starting up never cuts off another one's records.
+The session cookie is signed with `SLOT_SECRET_KEY`, which must be set (and the same for
+every worker); the launcher refuses to start without it.
+"""
+import argparse
+import os
+from typing import List, Optional
+
+import uvicorn
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments, defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(description="Serve the slot machine web app over ASGI")
+    parser.add_argument("--host", default=os.environ.get("SLOT_HOST", "127.0.0.1"), help="Address to bind")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SLOT_PORT", "8000")), help="Port to bind")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SLOT_WORKERS", "1")),
+                        help="Worker processes")
+    parser.add_argument("--log-level", default="info", help="Uvicorn log level")
+    args = parser.parse_args(argv)
+    if not os.environ.get("SLOT_SECRET_KEY"):
+        parser.error("SLOT_SECRET_KEY must be set to sign session cookies")
+
+    uvicorn.run("asgi:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.logic import SlotMachine
+
+MAX_SESSION_STATES = 250_000 # Largest balance chain `session_outlook()` solves, the time is linear in the states
+SESSION_CAP_FACTOR = 4 # Default cap of `session_outlook()`, as a multiple of the largest deposit
+
+
+def machine_key(machine: SlotMachine) -> Tuple[Hashable, ...]:
+    """
+    Build a hashable key describing everything that affects a machine's payouts.
+
+    Args:
+        machine (SlotMachine): The machine to describe.
+
+    Returns:
+        Tuple[Hashable, ...]: Rows, columns, symbol frequencies, paylines, the payout
+        multipliers by symbol and run length, and the win mode.
+    """
+    return (
+        machine.rows,
+        machine.cols,
+        tuple(machine.symbols.items()),
+        machine.paylines,
+        machine.paytable,
+        machine.win_mode,
+    )
+
+
+def _falling(n: int, k: int) -> int:
+    """
+    Falling factorial n * (n - 1) * ... * (n - k + 1).
+    """
+    result = 1
+    for i in range(k):
+        result *= n - i
+    return result
+
+
+@lru_cache(maxsize=256)
+def _outcomes(key: Tuple[Hashable, ...], lines: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact probability and payout of every line outcome when betting on `lines` lines.
+
+    Every line (row) is either losing or won with one symbol, giving (symbols + 1) ** lines
+    outcomes. For a partial assignment of symbols to rows, the chance that one column shows
+    it is a ratio of falling factorials (the column is drawn without replacement), and the
+    columns are independent, so the chance that every column shows it is that ratio raised
+    to the number of columns. Those "at least these rows win" probabilities are turned into
+    "exactly these rows win" probabilities with inclusion-exclusion along each row.
+
+    Args:
+        key (Tuple[Hashable, ...]): Machine configuration from `machine_key()`.
+        lines (int): Number of lines bet on.
+
+    Only valid for horizontal lines on distinct rows that pay full-line matches, see
+    `_check_exact()`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Payout multipliers and probabilities, both of shape
+        (symbols + 1,) * lines. Index 0 on an axis means that line lost, index i means it
+        won with symbol i - 1.
+    """
+    _, cols, symbols, _, paytable, _ = key
+    values = tuple(row[cols] for row in paytable) # Payout of a run across every column
+    counts = [count for _, count in symbols]
+    total = sum(counts)
+    size = len(counts) + 1
+
+    probabilities = np.empty((size,) * lines)
+    for cell in product(range(size), repeat=lines):
+        used = [0] * len(counts)
+        for index in cell:
+            if index:
+                used[index - 1] += 1
+
+        ways = 1
+        for count, taken in zip(counts, used):
+            ways *= _falling(count, taken)
+        probabilities[cell] = (ways / _falling(total, sum(used))) ** cols
+
+    # Inclusion-exclusion: "row is free" becomes "row does not win"
+    for axis in range(lines):
+        view = np.moveaxis(probabilities, axis, 0)
+        view[0] -= view[1:].sum(axis=0)
+
+    # Total multiplier of every outcome is the sum of the values of its winning rows
+    row_values = np.array((0,) + values, dtype=np.int64)
+    payouts = np.zeros((size,) * lines, dtype=np.int64)
+    for axis in range(lines):
+        shape = [1] * lines
+        shape[axis] = size
+        payouts = payouts + row_values.reshape(shape)
+
+    # The arrays are shared through the cache, so callers must not modify them
+    payouts.setflags(write=False)
+    probabilities.setflags(write=False)
+    return payouts, probabilities
+
+
+def _check_lines(machine: SlotMachine, lines: int) -> None:
+    """
+    Raise a ValueError if `lines` is not between 1 and the number of lines the machine offers.
+    """
+    if not 1 <= lines <= machine.line_count:
+        raise ValueError(f"Lines must be between 1 and {machine.line_count}, got {lines}.")
+
+
+def _check_exact(machine: SlotMachine, lines: int) -> None:
+    """
+    Raise a ValueError unless the exact payout distribution of `lines` lines can be computed.
+
+    `_outcomes()` relies on every line being a different row, so that the lines of one
+    column are distinct draws, and on only full-line runs paying. Diagonal lines share
+    cells and partial runs depend on the order of the columns, which it does not model.
+    """
+    _check_lines(machine, lines)
+    if machine.win_mode != "lines":
+        raise ValueError(f"Exact distributions are only available for line machines, not {machine.win_mode!r}.")
+
+    rows = [line[0] for line in machine.paylines[:lines]]
+    horizontal = all(len(set(line)) == 1 for line in machine.paylines[:lines]) and len(set(rows)) == lines
+    full_line_only = all(not any(row[:machine.cols]) for row in machine.paytable)
+
+    if not horizontal or not full_line_only:
+        raise ValueError("Exact distributions need horizontal paylines on distinct rows that only pay full-line matches.")
+
+
+def payout_distribution(machine: SlotMachine, lines: int) -> Dict[int, float]:
+    """
+    Exact distribution of the payout multiplier for one spin.
+
+    Results are cached per machine configuration and number of lines.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+        lines (int): Number of lines bet on.
+
+    Returns:
+        Dict[int, float]: Probability of every total payout, as a multiple of the bet per line.
+
+    Raises:
+        ValueError: If `lines` is not between 1 and the number of paylines, or the machine
+            has diagonal paylines or partial-run payouts.
+    """
+    _check_exact(machine, lines)
+    payouts, probabilities = _outcomes(machine_key(machine), lines)
+
+    distribution: Dict[int, float] = {}
+    for payout, probability in zip(payouts.ravel().tolist(), probabilities.ravel().tolist()):
+        distribution[payout] = distribution.get(payout, 0.0) + probability
+
+    return dict(sorted(distribution.items()))
+
+
+def _column_odds(machine: SlotMachine, count: int) -> Tuple[float, float]:
+    """
+    How one column continues a symbol's run, for the closed-form line and ways results.
+
+    For a line, the column continues the run when the line's cell shows the symbol, which
+    it does with probability p = count / pool size. For ways, the column continues it when
+    any of its rows shows the symbol, and multiplies the ways by how many rows do.
+
+    Args:
+        machine (SlotMachine): A line or ways machine.
+        count (int): The symbol's frequency in the pool.
+
+    Returns:
+        Tuple[float, float]: The expected multiplicity the column adds (p for a line,
+        rows * p for ways), and the chance that the column stops the run.
+
+    Raises:
+        ValueError: For cluster machines, which have no closed form; simulate them instead.
+    """
+    total = sum(machine.symbols.values())
+    p = count / total
+
+    if machine.win_mode == "lines":
+        return p, 1 - p
+    if machine.win_mode == "ways":
+        # The column misses the symbol when all its rows come from the rest of the pool
+        return machine.rows * p, _falling(total - count, machine.rows) / _falling(total, machine.rows)
+    raise ValueError("Cluster pays have no closed form, use services.simulation instead.")
+
+
+def line_hit_probability(machine: SlotMachine) -> Dict[str, float]:
+    """
+    Probability that a single line wins, per symbol.
+
+    The columns are independent and each continues a run with the same probability (see
+    `_column_odds()`), so the chance of a run of at least the shortest winning length k
+    is that probability to the power k.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+
+    Returns:
+        Dict[str, float]: Chance that one line wins with each symbol.
+
+    Raises:
+        ValueError: For cluster machines.
+    """
+    _, wins = machine.compile_paytable(machine.symbol_values)
+
+    probabilities = {}
+    for code, (symbol, count) in enumerate(machine.symbols.items()):
+        _, miss = _column_odds(machine, count)
+        winning_runs = np.flatnonzero(wins[code])
+        probabilities[symbol] = (1 - miss) ** int(winning_runs[0]) if len(winning_runs) else 0.0
+    return probabilities
+
+
+def rtp(machine: SlotMachine, lines: int = 1) -> float:
+    """
+    Expected return to player, as a fraction of the total bet.
+
+    Expectation is linear and the columns are independent, so the expected payout of one
+    line is a sum over run lengths: the expected multiplicity of the columns in the run
+    multiplied together, times the chance that the next column stops it (see
+    `_column_odds()`). This holds for any paylines and paytable, and for ways machines.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+        lines (int): Number of lines bet on.
+
+    Returns:
+        float: Expected winnings divided by the amount wagered.
+
+    Raises:
+        ValueError: If `lines` is out of range, or for cluster machines.
+    """
+    _check_lines(machine, lines)
+    cols = machine.cols
+
+    expected = 0.0
+    for count, payouts in zip(machine.symbols.values(), machine.paytable):
+        multiplicity, miss = _column_odds(machine, count)
+        for run in range(1, cols + 1):
+            expected += payouts[run] * multiplicity ** run * (miss if run < cols else 1)
+    return expected
+
+
+def variance(machine: SlotMachine, lines: int = 1, bet: int = 1) -> float:
+    """
+    Variance of the winnings of one spin.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+        lines (int): Number of lines bet on.
+        bet (int): Bet amount per line.
+
+    Returns:
+        float: Variance of the winnings, in squared currency units.
+    """
+    distribution = payout_distribution(machine, lines)
+    mean = sum(payout * probability for payout, probability in distribution.items())
+    second = sum(payout * payout * probability for payout, probability in distribution.items())
+    return (second - mean * mean) * bet * bet
+
+
+def hit_frequency(machine: SlotMachine, lines: int = 1) -> float:
+    """
+    Probability that a spin wins on at least one line.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+        lines (int): Number of lines bet on.
+
+    Returns:
+        float: Chance of a winning spin.
+    """
+    _check_exact(machine, lines)
+    _, probabilities = _outcomes(machine_key(machine), lines)
+    return 1.0 - float(probabilities[(0,) * lines]) # Everything except "no line won"
+
+
+def paytable_report(machine: SlotMachine) -> List[Dict[str, float]]:
+    """
+    RTP, variance and hit frequency for every number of lines the machine offers.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+
+    Returns:
+        List[Dict[str, float]]: One entry per lines bet, for a bet of 1 per line. Values
+        are None where they cannot be computed exactly, see `_check_exact()` and `rtp()`.
+    """
+    report = []
+    for lines in range(1, machine.line_count + 1):
+        try:
+            _check_exact(machine, lines)
+            spread, hits = variance(machine, lines), hit_frequency(machine, lines)
+        except ValueError:
+            spread = hits = None
+
+        try:
+            expected = rtp(machine, lines)
+        except ValueError: # Cluster pays
+            expected = None
+
+        report.append({"lines": lines, "rtp": expected, "variance": spread, "hit_frequency": hits})
+    return report
+
+
+def _solve_session(steps: np.ndarray, probabilities: np.ndarray, low: int, high: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve the balance Markov chain of a session, in units of the bet per line.
+
+    Balances from `low` (the total bet) up to `high` are transient: every round moves the
+    balance by one of `steps` with the matching probability. Below `low` the player is
+    ruined, at `high` or above they stop. With Q the transitions between transient states,
+    the ruin probabilities h and expected rounds s solve (I - Q) h = r and (I - Q) s = 1,
+    where r is the chance of dropping below `low` in one round.
+
+    I - Q is banded: a round loses at most the total bet, so the band reaches `down`
+    (= lines) states below the diagonal and up to the largest win above it. Gaussian
+    elimination from the last state upwards only ever fills in the narrow lower band, so
+    it runs on a sliding (up + 1) x (down + 1) window with O(states) memory, and a forward
+    substitution over the lower band finishes the solve. No pivoting is needed: every row
+    of I - Q is diagonally dominant.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Ruin probability and expected rounds for every
+        balance from `low` to `high` - 1.
+    """
+    size = high - low
+    up = max(int(steps.max()), 0)     # Upper bandwidth, the largest gain of a round
+    down = max(int(-steps.min()), 0)  # Lower bandwidth, the largest loss of a round
+
+    # Entries of I - Q by column minus row, from -down to up
+    band = np.zeros(up + down + 1)
+    np.add.at(band, steps + down, -probabilities)
+    band[down] += 1.0
+
+    def entries(rows, cols) -> np.ndarray:
+        shift = cols - rows
+        inside = (rows >= 0) & (cols >= 0) & (shift >= -down) & (shift <= up)
+        return np.where(inside, band[np.clip(shift + down, 0, up + down)], 0.0)
+
+    # Right-hand sides [r, 1], row i at index i + up, the first `up` rows are padding
+    rhs = np.zeros((size + up, 2))
+    rhs[up:, 1] = 1.0
+    for step, probability in zip(steps.tolist(), probabilities.tolist()):
+        if step < 0:
+            rhs[up:up + min(-step, size), 0] += probability
+
+    # window[a, b] is entry (k - up + a, k - down + b) while state k is eliminated
+    rows = np.arange(up + 1)
+    cols = np.arange(down + 1)
+    window = entries(size - 1 - up + rows.reshape(-1, 1), size - 1 - down + cols)
+    new_column = band[up - rows] # Entries entering the window as it slides up, away from the edges
+    new_row = band[up + cols]
+    lower = np.empty((size, down + 1)) # Row k of the eliminated matrix, columns k - down to k
+
+    for k in range(size - 1, -1, -1):
+        pivot = window[up]
+        lower[k] = pivot
+        factors = window[:up, down:] / pivot[down]
+        window[:up] -= factors * pivot
+        rhs[k:k + up] -= factors * rhs[k + up]
+
+        window[1:, 1:] = window[:-1, :-1]
+        if k > max(up, down):
+            window[:, 0] = new_column
+            window[0] = new_row
+        else: # Rows or columns below state 0 are empty
+            window[:, 0] = entries(k - 1 - up + rows, k - 1 - down)
+            window[0] = entries(k - 1 - up, k - 1 - down + cols)
+
+    solution = np.zeros((size + down, 2)) # The first `down` rows are padding
+    for k in range(size):
+        solution[k + down] = (rhs[k + up] - lower[k, :down] @ solution[k:k + down]) / lower[k, down]
+    return solution[down:, 0], solution[down:, 1]
+
+
+def session_outlook(machine: SlotMachine, deposits: Iterable[int], lines: int = 1, bet: int = 1,
+                    cap: Optional[int] = None, distribution: Optional[Dict[int, float]] = None) -> Dict[int, Dict[str, float]]:
+    """
+    Chance of going broke, and expected number of rounds, of sessions that bet the same
+    lines and bet every round, for many starting deposits at once.
+
+    A session ends when the balance can no longer cover the total bet (ruin), or when it
+    reaches `cap`, where the player is assumed to walk away. Every round changes the
+    balance by an amount drawn from the payout distribution, so the balance is a Markov
+    chain; it is solved exactly instead of simulated (see `_solve_session()`). Balances
+    only change by multiples of the bet, so deposits are grouped by their remainder and
+    each group is one solve.
+
+    Args:
+        machine (SlotMachine): The machine to analyse.
+        deposits (Iterable[int]): Starting balances.
+        lines (int): Number of lines bet on.
+        bet (int): Bet amount per line.
+        cap (Optional[int]): Balance at which the session stops, `SESSION_CAP_FACTOR` times
+            the largest deposit by default.
+        distribution (Optional[Dict[int, float]]): Probability of every payout multiplier,
+            for machines without an exact one (e.g. estimated by simulation). Defaults to
+            `payout_distribution()`.
+
+    Returns:
+        Dict[int, Dict[str, float]]: "ruin" probability and "spins" expected per deposit.
+
+    Raises:
+        ValueError: If `lines` is out of range, the machine has no exact payout
+            distribution and none is given, the chain has more than `MAX_SESSION_STATES`
+            balances, or sessions could never end.
+    """
+    _check_lines(machine, lines)
+    if distribution is None:
+        distribution = payout_distribution(machine, lines)
+    deposits = sorted(set(deposits))
+    if not deposits:
+        return {}
+    if cap is None:
+        cap = SESSION_CAP_FACTOR * deposits[-1]
+
+    # Change of the balance per round, in bets per line
+    steps = np.array(list(distribution), dtype=np.int64) - lines
+    probabilities = np.clip(np.array(list(distribution.values()), dtype=np.float64), 0.0, None)
+    if probabilities[steps != 0].sum() == 0:
+        raise ValueError("Every round returns the total bet, so sessions never end.")
+
+    groups: Dict[int, List[int]] = {}
+    for amount in deposits:
+        groups.setdefault(amount % bet, []).append(amount)
+
+    outlook = {}
+    for remainder, amounts in groups.items():
+        # Balance `remainder + units * bet`: playable from `lines` units, stopped at the cap
+        high = max(-(-(cap - remainder) // bet), lines)
+        if high - lines > MAX_SESSION_STATES:
+            raise ValueError(f"The session chain has {high - lines} balances, at most {MAX_SESSION_STATES} are solved. "
+                             "Lower the cap or raise the bet.")
+        ruin, spins = _solve_session(steps, probabilities, lines, high)
+
+        for amount in amounts:
+            units = amount // bet
+            if units < lines: # Cannot afford a single round
+                outlook[amount] = {"ruin": 1.0, "spins": 0.0}
+            elif units >= high: # Already at the cap
+                outlook[amount] = {"ruin": 0.0, "spins": 0.0}
+            else:
+                outlook[amount] = {"ruin": float(ruin[units - lines]), "spins": float(spins[units - lines])}
+    return outlook
@@ -0,0 +1,191 @@
+import json
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from services.autoplay import MAX_AUTOPLAY_SPINS, Autoplay
+from services.game import RoundResult
+from services.ledger import Ledger
+from services.logic import SlotMachine
+from services.machines import DEFAULT_MACHINE_ID, MachineRegistry
+from services.store import SessionStore
+
+
+def parse_deposit(value: Optional[str]) -> Optional[int]:
+    """
+    Validate a deposit amount submitted through the deposit form.
+
+    Args:
+        value (Optional[str]): The submitted form value.
+
+    Returns:
+        Optional[int]: The deposit, or None if it is not a positive integer.
+    """
+    if value and value.isdigit() and int(value) > 0:
+        return int(value)
+    return None
+
+
+def _is_int(value: Any, minimum: int, maximum: Optional[int] = None) -> bool:
+    """
+    Whether a decoded value is an integer (not a bool, which JSON `true` decodes to)
+    between `minimum` and `maximum`.
+    """
+    return (isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+            and (maximum is None or value <= maximum))
+
+
+def parse_spin_request(data: Any, registry: MachineRegistry) -> Tuple[SlotMachine, int, int]:
+    """
+    Validate the JSON body of a spin request.
+
+    Args:
+        data (Any): The decoded JSON body, expected to hold integer `lines` and `bet`, and
+            optionally the `machine` id (the default machine when omitted).
+        registry (MachineRegistry): Registry the machine is looked up in.
+
+    Returns:
+        Tuple[SlotMachine, int, int]: The machine, number of lines and bet per line.
+
+    Raises:
+        ValueError: If the machine is unknown, or the lines or bet are missing or out of range.
+    """
+    if not isinstance(data, dict):
+        data = {}
+    machine_id = data.get("machine", DEFAULT_MACHINE_ID)
+    lines = data.get("lines")
+    bet = data.get("bet")
+
+    try:
+        definition, machine = registry.lookup(machine_id)
+    except (KeyError, TypeError): # TypeError for ids that are not hashable, like lists
+        raise ValueError(f"unknown machine {machine_id!r}") from None
+
+    if not _is_int(lines, 1, definition.max_lines):
+        raise ValueError(f"lines must be an integer between 1 and {definition.max_lines}")
+    if not _is_int(bet, definition.min_bet, definition.max_bet):
+        raise ValueError(f"bet must be an integer between {definition.min_bet} and {definition.max_bet}")
+
+    return machine, lines, bet
+
+
+def spin_response(result: RoundResult) -> Dict[str, Any]:
+    """
+    Build the JSON body returned for a settled spin.
+
+    Args:
+        result (RoundResult): The settled round.
+
+    Returns:
+        Dict[str, Any]: Grid, winnings, winning lines and the new balance.
+    """
+    return {
+        "columns": result.columns,
+        "winnings": result.winnings,
+        "winning_lines": result.winning_lines,
+        "balance": result.balance,
+    }
+
+
+def _query_int(value: Any) -> Any:
+    """
+    Convert a query string number to an int, leaving anything else for validation to reject.
+    """
+    return int(value) if isinstance(value, str) and value.isdigit() else value
+
+
+def parse_autoplay_request(params: Mapping[str, Any], registry: MachineRegistry) -> Tuple[SlotMachine, Dict[str, Any]]:
+    """
+    Validate the JSON body of a request creating an autoplay run.
+
+    Args:
+        params (Mapping[str, Any]): `lines`, `bet` and `spins`, optionally `machine`,
+            `stop_loss` and `stop_win`. Numbers may be given as strings. Anything but a
+            mapping is treated as an empty one.
+        registry (MachineRegistry): Registry the machine is looked up in.
+
+    Returns:
+        Tuple[SlotMachine, Dict[str, Any]]: The machine, and the `Autoplay` settings
+        (spins, lines, bet, stop_loss, stop_win).
+
+    Raises:
+        ValueError: If the machine is unknown or a setting is missing or out of range.
+    """
+    if not isinstance(params, Mapping):
+        params = {}
+    machine, lines, bet = parse_spin_request(
+        {
+            "machine": params.get("machine", DEFAULT_MACHINE_ID),
+            "lines": _query_int(params.get("lines")),
+            "bet": _query_int(params.get("bet")),
+        },
+        registry,
+    )
+
+    spins = _query_int(params.get("spins"))
+    if not _is_int(spins, 1, MAX_AUTOPLAY_SPINS):
+        raise ValueError(f"spins must be an integer between 1 and {MAX_AUTOPLAY_SPINS}")
+
+    limits = {}
+    for name in ("stop_loss", "stop_win"):
+        value = _query_int(params.get(name))
+        if value is not None and not _is_int(value, 1):
+            raise ValueError(f"{name} must be a positive integer")
+        limits[name] = value
+
+    return machine, {"spins": spins, "lines": lines, "bet": bet, **limits}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload.
+
+    Args:
+        event (str): Event name, what the browser listens for.
+        data (Any): JSON-serialisable payload.
+
+    Returns:
+        str: The event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def autoplay_events(run: Autoplay, store: SessionStore, sid: Optional[str],
+                    ledger: Optional[Ledger] = None) -> Iterator[str]:
+    """
+    Play an autoplay run against a session and stream it as Server-Sent Events.
+
+    Every batch is settled in one store transaction and sent as one "rounds" event
+    holding the spin responses of its rounds. A final "done" event carries the stop
+    reason, the number of rounds played and the balance, or an "error" event if the
+    session expires during the run.
+
+    Args:
+        run (Autoplay): The run, created with the session's balance.
+        store (SessionStore): Balance store.
+        sid (Optional[str]): The session id.
+        ledger (Optional[Ledger]): Ledger that settled rounds are recorded to.
+
+    Yields:
+        str: The formatted events.
+    """
+    balance = run.start_balance
+
+    def settle(current: int) -> Tuple[int, List[RoundResult]]:
+        new_balance, rounds = run.settle_batch(current)
+        if ledger is not None:
+            for result in rounds: # Inside the transaction, so a session's rounds stay in order
+                ledger.record(sid, result)
+        return new_balance, rounds
+
+    while not run.done:
+        rounds = store.transact(sid, settle)
+        if rounds is None:
+            yield sse_event("error", {"error": NO_SESSION_ERROR})
+            return
+        if rounds:
+            balance = rounds[-1].balance
+            yield sse_event("rounds", {"rounds": [spin_response(result) for result in rounds]})
+
+    yield sse_event("done", {"reason": run.reason, "spins": run.played, "balance": balance})
+
+
+NO_SESSION_ERROR = "No active session, please deposit first"
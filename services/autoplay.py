@@ -0,0 +1,162 @@
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.game import RoundResult, settle_round
+from services.logic import SlotMachine
+
+AUTOPLAY_BATCH = 25 # Rounds settled per batch, and per streamed update
+MAX_AUTOPLAY_SPINS = 1000 # Most spins one autoplay run may take
+
+STOP_REASONS = ("spins", "stop_loss", "stop_win", "balance")
+
+PENDING_RUN_TTL = 60 # Seconds a created run may wait for its stream to be opened
+
+
+class Autoplay:
+    """
+    A run of up to `spins` rounds at a fixed number of lines and bet, settled in batches.
+
+    `settle_batch()` takes the current balance and returns the new one with the rounds it
+    settled, so it plugs straight into `SessionStore.transact()`: a server settles a whole
+    batch under one lock and streams it as one update, instead of one request per spin.
+
+    The run stops when all spins are played, when the balance has fallen by `stop_loss`
+    or grown by `stop_win` since the start, or when it cannot cover another bet. The
+    limits are checked before every round, so a batch never plays past them.
+    """
+
+    def __init__(self, machine: SlotMachine, balance: int, spins: int, lines: int, bet: int,
+                 stop_loss: Optional[int] = None, stop_win: Optional[int] = None,
+                 batch: int = AUTOPLAY_BATCH) -> None:
+        """
+        Args:
+            machine (SlotMachine): The machine to spin.
+            balance (int): Balance at the start of the run, the stop limits are relative to it.
+            spins (int): Most rounds to play.
+            lines (int): Number of lines bet on every round.
+            bet (int): Bet amount per line.
+            stop_loss (Optional[int]): Stop once this much of the starting balance is lost.
+            stop_win (Optional[int]): Stop once the balance has grown by this much.
+            batch (int): Most rounds settled per `settle_batch()` call.
+        """
+        self.machine = machine
+        self.start_balance = balance
+        self.remaining = spins
+        self.lines = lines
+        self.bet = bet
+        self.stop_loss = stop_loss
+        self.stop_win = stop_win
+        self.batch = batch
+        self.played = 0
+        self.reason: Optional[str] = None # Why the run stopped, one of STOP_REASONS
+
+
+    @property
+    def done(self) -> bool:
+        return self.reason is not None
+
+
+    def _stop_reason(self, balance: int) -> Optional[str]:
+        """
+        Why the run must stop before the next round at this balance, None to keep playing.
+        """
+        if self.stop_loss is not None and balance <= self.start_balance - self.stop_loss:
+            return "stop_loss"
+        if self.stop_win is not None and balance >= self.start_balance + self.stop_win:
+            return "stop_win"
+        if balance < self.lines * self.bet:
+            return "balance"
+        if self.remaining <= 0:
+            return "spins"
+        return None
+
+
+    def settle_batch(self, balance: int) -> Tuple[int, List[RoundResult]]:
+        """
+        Settle the next batch of rounds.
+
+        Args:
+            balance (int): Balance before the batch.
+
+        Returns:
+            Tuple[int, List[RoundResult]]: Balance after the batch and the rounds settled,
+            none once the run is done.
+        """
+        rounds: List[RoundResult] = []
+        while len(rounds) < self.batch:
+            self.reason = self._stop_reason(balance)
+            if self.reason is not None:
+                break
+
+            result = settle_round(self.machine, balance, self.lines, self.bet)
+            rounds.append(result)
+            balance = result.balance
+            self.remaining -= 1
+            self.played += 1
+        else:
+            self.reason = self._stop_reason(balance) # Report a stop reached by the batch's last round
+
+        return balance, rounds
+
+
+class PendingRuns:
+    """
+    Autoplay runs created by a POST and waiting for the browser to open their stream.
+
+    Autoplay debits the balance, so a run must never start from a GET: any page could make
+    a victim's browser send one with the session cookie. A run is created with a POST and
+    gets an unguessable id, and only the session that created it can start it, once, by
+    streaming `GET /api/autoplay/<run id>`.
+    """
+
+    def __init__(self, ttl: float = PENDING_RUN_TTL) -> None:
+        """
+        Args:
+            ttl (float): Seconds an unclaimed run is kept.
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Tuple[str, SlotMachine, Dict[str, Any], float]] = {} # id -> (sid, machine, settings, created)
+
+
+    def create(self, sid: str, machine: SlotMachine, settings: Dict[str, Any]) -> str:
+        """
+        Register a run for a session.
+
+        Args:
+            sid (str): The session the run belongs to.
+            machine (SlotMachine): The machine to spin.
+            settings (Dict[str, Any]): The `Autoplay` settings, see `parse_autoplay_request()`.
+
+        Returns:
+            str: The run id.
+        """
+        run_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            for expired in [key for key, run in self._runs.items() if now - run[3] > self.ttl]:
+                del self._runs[expired]
+            self._runs[run_id] = (sid, machine, settings, now)
+        return run_id
+
+
+    def claim(self, sid: Optional[str], run_id: str) -> Optional[Tuple[SlotMachine, Dict[str, Any]]]:
+        """
+        Take a run out of the registry to start it.
+
+        Args:
+            sid (Optional[str]): The session asking for the run.
+            run_id (str): The run id returned by `create()`.
+
+        Returns:
+            Optional[Tuple[SlotMachine, Dict[str, Any]]]: The machine and settings, or None
+            if the run is unknown, expired, already started or belongs to another session.
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or run[0] != sid or time.monotonic() - run[3] > self.ttl:
+                return None
+            del self._runs[run_id]
+        return run[1], run[2]
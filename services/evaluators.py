@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np # Only the batch evaluators need NumPy, it is imported on first use
+
+
+def ways_outcomes(columns: List[List[str]]) -> List[Tuple[str, int, int]]:
+    """
+    Find the "ways" wins of a spin: a symbol wins when it shows anywhere in each of the
+    leftmost columns, once for every combination of its positions in those columns.
+
+    Counting paths one by one takes rows ** cols steps (243 on a 3x5 grid). Instead every
+    column gets a symbol histogram, and the number of ways is the product of the symbol's
+    counts over the columns it reaches, so a spin costs O(rows x cols).
+
+    Args:
+        columns (List[List[str]]): Columns of the slot machine.
+
+    Returns:
+        List[Tuple[str, int, int]]: One (symbol, columns reached, ways) entry per symbol of
+        the first column.
+    """
+    histograms = [Counter(column) for column in columns]
+
+    outcomes = []
+    for symbol in histograms[0]:
+        ways = 1
+        reached = 0
+        for histogram in histograms: # Stop at the first column without the symbol
+            count = histogram.get(symbol, 0)
+            if not count:
+                break
+            ways *= count
+            reached += 1
+        outcomes.append((symbol, reached, ways))
+
+    return outcomes
+
+
+def cluster_outcomes(columns: List[List[str]]) -> List[Tuple[str, int]]:
+    """
+    Find the clusters of a spin: groups of equal symbols connected horizontally or vertically.
+
+    Cells are merged with a union-find (with path halving and union by size), visiting
+    every cell once and linking it to its right and lower neighbour, so a spin costs
+    O(rows x cols) no matter how the clusters are shaped.
+
+    Args:
+        columns (List[List[str]]): Columns of the slot machine.
+
+    Returns:
+        List[Tuple[str, int]]: One (symbol, cluster size) entry per cluster.
+    """
+    cols = len(columns)
+    rows = len(columns[0])
+    parent = list(range(rows * cols)) # Cell c * rows + r is row r of column c
+    size = [1] * (rows * cols)
+
+    def find(cell: int) -> int:
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]] # Path halving
+            cell = parent[cell]
+        return cell
+
+    def union(first: int, second: int) -> None:
+        first, second = find(first), find(second)
+        if first == second:
+            return
+        if size[first] < size[second]:
+            first, second = second, first
+        parent[second] = first
+        size[first] += size[second]
+
+    for col, column in enumerate(columns):
+        for row, symbol in enumerate(column):
+            cell = col * rows + row
+            if row + 1 < rows and column[row + 1] == symbol:
+                union(cell, cell + 1)
+            if col + 1 < cols and columns[col + 1][row] == symbol:
+                union(cell, cell + rows)
+
+    return [
+        (columns[cell // rows][cell % rows], size[cell])
+        for cell in range(rows * cols) if parent[cell] == cell
+    ]
+
+
+def weighted_bincount(keys: np.ndarray, weights: np.ndarray, length: int) -> np.ndarray:
+    """
+    Integer version of `np.bincount(keys, weights, minlength=length)`. NumPy sums weights
+    in float64, which stops being exact past 2 ** 53, so large stakes are summed in int64.
+
+    Args:
+        keys (np.ndarray): Bin of every item.
+        weights (np.ndarray): Integer weight of every item.
+        length (int): Number of bins.
+
+    Returns:
+        np.ndarray: int64 array of the summed weights per bin.
+    """
+    import numpy as np
+
+    totals = np.zeros(length, dtype=np.int64)
+    np.add.at(totals, keys, np.asarray(weights, dtype=np.int64))
+    return totals
+
+
+def ways_counts_many(grids: np.ndarray, symbols: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Batch version of `ways_outcomes()` for integer-coded spins.
+
+    Args:
+        grids (np.ndarray): Array of shape (n, cols, rows) of symbol codes.
+        symbols (int): Number of distinct symbols.
+        weights (Optional[np.ndarray]): Weight of every spin. When given, the weighted
+            counts are summed over the batch instead of returned per spin.
+
+    Returns:
+        np.ndarray: Array of shape (n, symbols, cols + 1) holding the number of ways each
+        symbol won with, at the index of the number of columns it reached. Of shape
+        (symbols, cols + 1) with `weights`.
+    """
+    import numpy as np
+
+    n, cols, _ = grids.shape
+
+    # Per-column symbol histograms, shape (n, cols, symbols)
+    counts = (grids[..., None] == np.arange(symbols)).sum(axis=2)
+
+    # A symbol reaches a column if it shows in that column and every column before it
+    reached = np.cumprod(counts > 0, axis=1).astype(bool)
+    runs = reached.sum(axis=1)                                   # (n, symbols)
+    ways = np.where(reached, counts, 1).prod(axis=1)             # (n, symbols)
+
+    ways = np.where(runs > 0, ways, 0)
+
+    if weights is not None:
+        keys = np.arange(symbols) * (cols + 1) + runs
+        totals = weighted_bincount(keys.ravel(), (ways * weights.reshape(-1, 1)).ravel(), symbols * (cols + 1))
+        return totals.reshape(symbols, cols + 1)
+
+    outcomes = np.zeros((n, symbols, cols + 1), dtype=np.int64)
+    np.put_along_axis(outcomes, runs[..., None], ways[..., None], axis=2)
+    return outcomes
+
+
+def cluster_counts_many(grids: np.ndarray, symbols: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Batch version of `cluster_outcomes()` for integer-coded spins.
+
+    A union-find over the whole batch at once: every pair of equal neighbours is an edge,
+    and each round hooks the larger root of every unjoined edge onto the smaller one, then
+    jumps pointers (`parent = parent[parent]`) until every cell points at its root. Roots
+    only ever move to smaller cells, so each cluster ends up rooted at its lowest cell.
+    Edges whose ends share a root are dropped after every round, so later rounds only
+    touch the clusters that are still being joined.
+
+    Args:
+        grids (np.ndarray): Array of shape (n, cols, rows) of symbol codes.
+        symbols (int): Number of distinct symbols.
+        weights (Optional[np.ndarray]): Weight of every spin. When given, the weighted
+            counts are summed over the batch instead of returned per spin.
+
+    Returns:
+        np.ndarray: Array of shape (n, symbols, cols * rows + 1) holding the number of
+        clusters of every symbol and size. Of shape (symbols, cols * rows + 1) with `weights`.
+    """
+    import numpy as np
+
+    n, cols, rows = grids.shape
+    cells = cols * rows
+    # Cells are numbered across the batch, so one parent array holds every spin's forest
+    index = np.arange(n * cells).reshape(n, cols, rows)
+    same_down = grids[:, :, 1:] == grids[:, :, :-1]   # Row r and r + 1 of a column match
+    same_right = grids[:, 1:, :] == grids[:, :-1, :]  # Column c and c + 1 of a row match
+    low = np.concatenate([index[:, :, :-1][same_down], index[:, :-1, :][same_right]])
+    high = np.concatenate([index[:, :, 1:][same_down], index[:, 1:, :][same_right]])
+
+    parent = np.arange(n * cells)
+    while len(low):
+        low_root, high_root = parent[low], parent[high]
+        parent[np.maximum(low_root, high_root)] = np.minimum(low_root, high_root)
+
+        grand = parent[parent]
+        while not np.array_equal(grand, parent):
+            parent = grand
+            grand = parent[parent]
+
+        joined = parent[low] != parent[high]
+        low, high = low[joined], high[joined]
+
+    # Cluster sizes: count the cells of every root, then read them off at the roots
+    sizes = np.bincount(parent, minlength=n * cells)
+    roots = np.flatnonzero(parent == np.arange(n * cells))
+    keys = grids.reshape(-1)[roots].astype(np.intp) * (cells + 1) + sizes[roots]
+
+    if weights is not None:
+        totals = weighted_bincount(keys, weights[roots // cells], symbols * (cells + 1))
+        return totals.reshape(symbols, cells + 1)
+
+    keys += (roots // cells) * symbols * (cells + 1)
+    return np.bincount(keys, minlength=n * symbols * (cells + 1)).reshape(n, symbols, cells + 1)
+
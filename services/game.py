@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+from services.logic import SlotMachine
+from services.machines import DEFAULT_MACHINE, MachineDefinition
+from services.metrics import METRICS
+from services.ui import (
+    GridRenderer, deposit, format_autoplay_round, get_bet, get_number_of_slot_lines, print_autoplay_summary,
+    print_round_result, print_slot_machine,
+)
+
+if TYPE_CHECKING:
+    from services.ledger import Ledger
+
+
+class RoundResult(NamedTuple):
+    """
+    The outcome of one settled spin.
+    """
+    columns: List[List[str]] # Spin result, a list of columns with row symbols
+    lines: int               # Number of lines bet on
+    bet: int                 # Bet amount per line
+    total_bet: int           # Amount taken from the balance
+    winnings: int            # Amount paid out
+    winning_lines: List[int] # Winning line numbers
+    balance: int             # Balance after the round
+
+
+def _count_round(result: RoundResult) -> None:
+    """
+    Add a settled round to the spin, win, wagered and paid counters.
+    """
+    METRICS.counter("slot_spins_total", "Rounds settled.").inc()
+    METRICS.counter("slot_wagered_total", "Amount wagered.").inc(result.total_bet)
+    if result.winnings:
+        METRICS.counter("slot_wins_total", "Rounds that paid out.").inc()
+        METRICS.counter("slot_paid_total", "Amount paid out.").inc(result.winnings)
+
+
+@METRICS.timed("slot_settle_seconds", "Time to settle one round, spin and scoring included.")
+def settle_round(machine: SlotMachine, balance: int, lines: int, bet: int) -> RoundResult:
+    """
+    Spin the machine once and settle the bet, without any user interaction.
+
+    Args:
+        machine (SlotMachine): The machine to spin.
+        balance (int): Balance before the round.
+        lines (int): Number of lines bet on.
+        bet (int): Bet amount per line.
+
+    Returns:
+        RoundResult: The spin and the balance after paying the bet and the winnings.
+
+    Raises:
+        ValueError: If the total bet exceeds the balance.
+    """
+    total_bet = bet * lines
+    if total_bet > balance:
+        raise ValueError(f"Total bet ${total_bet} exceeds the current balance ${balance}.")
+
+    columns = machine.spin()
+    winnings, winning_lines = machine.check_winnings(columns, lines, bet)
+
+    result = RoundResult(columns, lines, bet, total_bet, winnings, winning_lines, balance + winnings - total_bet)
+    if METRICS.enabled:
+        _count_round(result)
+    return result
+
+
+class Game:
+    """
+    A class to manage the slot machine game flow and user balance.
+
+    `settle()` plays a round without any I/O, so the same engine can be driven by a
+    server or a simulator. `play_spin()` and `run()` are the terminal front end on top of it.
+    """
+
+    # Configuration of the default machine, loaded from machines/classic.toml
+    MAX_LINES = DEFAULT_MACHINE.max_lines         # Maximum number of lines a play can bet on
+    MIN_BET = DEFAULT_MACHINE.min_bet             # Minimum bet per line
+    MAX_BET = DEFAULT_MACHINE.max_bet             # Maximum bet per line
+    ROWS = DEFAULT_MACHINE.rows                   # Number of rows in the slot machine
+    COLS = DEFAULT_MACHINE.cols                   # Number of columns in the slot machine
+    SYMBOL_COUNT = DEFAULT_MACHINE.symbol_count   # Frequency of each symbol in the slot machine's pool
+    SYMBOL_VALUES = DEFAULT_MACHINE.symbol_values # Payout multiplier for each symbol on a winning line
+
+    def __init__(self, ledger: Optional["Ledger"] = None, session: str = "cli",
+                 definition: MachineDefinition = DEFAULT_MACHINE) -> None:
+        """
+        Initializes a new game instance.
+        - Sets up starting balance as 0.
+        - Creates a SlotMachine object from the machine definition.
+
+        Args:
+            ledger (Optional[Ledger]): Ledger that every settled round is recorded to.
+            session (str): Name the rounds are recorded under.
+            definition (MachineDefinition): The machine to play, the default machine when omitted.
+        """
+        self.balance: int = 0 # User's current balance
+        self.definition = definition
+        self.machine = definition.build()
+        self.ledger = ledger
+        self.session = session
+
+
+    def _check_bet(self, lines: int, bet: int) -> None:
+        """
+        Raise a ValueError if the lines or bet are outside the machine's limits.
+        """
+        limits = self.definition
+        if not 1 <= lines <= limits.max_lines:
+            raise ValueError(f"Lines must be between 1 and {limits.max_lines}, got {lines}.")
+        if not limits.min_bet <= bet <= limits.max_bet:
+            raise ValueError(f"Bet must be between {limits.min_bet} and {limits.max_bet}, got {bet}.")
+
+
+    def settle(self, lines: int, bet: int) -> RoundResult:
+        """
+        Play one round headlessly: spin, pay out and update the balance.
+
+        Args:
+            lines (int): Number of lines to bet on.
+            bet (int): Bet amount per line.
+
+        Returns:
+            RoundResult: The outcome of the round.
+
+        Raises:
+            ValueError: If the lines or bet are out of range, or the total bet exceeds the balance.
+        """
+        self._check_bet(lines, bet)
+
+        result = settle_round(self.machine, self.balance, lines, bet)
+        self.balance = result.balance # Update balance
+
+        if self.ledger is not None:
+            self.ledger.record(self.session, result)
+
+        return result
+
+
+    def autoplay(self, spins: int, lines: int, bet: int, stop_loss: Optional[int] = None,
+                 stop_win: Optional[int] = None, quiet: bool = False) -> str:
+        """
+        Play up to `spins` rounds without prompting, drawing every round as it settles.
+
+        On a terminal the grid is redrawn in place, see `GridRenderer`.
+
+        Args:
+            spins (int): Most rounds to play.
+            lines (int): Number of lines to bet on.
+            bet (int): Bet amount per line.
+            stop_loss (Optional[int]): Stop once this much of the starting balance is lost.
+            stop_win (Optional[int]): Stop once the balance has grown by this much.
+            quiet (bool): Skip drawing the rounds and only print the summary.
+
+        Returns:
+            str: Why the run stopped, see `services.autoplay.STOP_REASONS`.
+
+        Raises:
+            ValueError: If the lines or bet are out of range.
+        """
+        from services.autoplay import Autoplay # services.autoplay builds on this module
+
+        self._check_bet(lines, bet)
+        run = Autoplay(self.machine, self.balance, spins, lines, bet, stop_loss, stop_win)
+        renderer = GridRenderer(quiet=quiet)
+
+        while not run.done:
+            self.balance, rounds = run.settle_batch(self.balance)
+            for number, result in enumerate(rounds, start=run.played - len(rounds) + 1):
+                if self.ledger is not None:
+                    self.ledger.record(self.session, result)
+                if not quiet: # Not even the status line is formatted in quiet mode
+                    status = format_autoplay_round(number, result.winnings, result.winning_lines, result.balance)
+                    renderer.render(result.columns, status)
+
+        print_autoplay_summary(run.reason, run.played, self.balance - run.start_balance, self.balance)
+        return run.reason
+
+
+    def play_spin(self) -> None:
+        """
+        Handles a single spin round of the slot machine in the terminal:
+        - Asks how many lines the user wants to bet on
+        - Collects bet amount per line
+        - Ensures the total bet does not exceed user's available balance
+        - Settles the round and prints the results
+        """
+        limits = self.definition
+        lines = get_number_of_slot_lines(limits.max_lines) # Ask the user how many lines they want to bet on (1-3)
+
+        while True: # Continue prompting for a valid bet until the user has enough balance
+            bet_amount = get_bet(limits.min_bet, limits.max_bet) # Ask for the bet per line
+            total_bet = bet_amount * lines # Calculate total cost of the spin
+
+            if total_bet > self.balance:
+                print(f"\nYour current balance cannot meet that bet amount,\nCurrent balance: ${self.balance}.")
+            else:
+                break # Bet doesn't exceed user balance so exit loop and start playing.
+
+        print(f"\nYou are betting: ${bet_amount} on {lines} lines.\nTotal bet: ${total_bet}.\n")
+
+        result = self.settle(lines, bet_amount)
+        print_slot_machine(result.columns) # spin result
+        print_round_result(result.winnings, result.winning_lines)
+
+
+    def run(self) -> None:
+        """
+        Starts and controls the main game loop:
+        - Gets initial deposit amount
+        - Repeats spins while the balance is above 0 or the user doesn't quit
+        - Handles game over or quitting
+        """
+        self.balance = deposit() # Ask for initial deposit
+
+        while True:
+            if self.balance <= 0: # Check if the user has enough money to play
+                print("\nGame Over. You're all out of balance.")
+                print("Thank you for playing!")
+                break
+
+            print(f"Current balance: ${self.balance}")
+
+            # Ask the user to continue playing or to quit
+            user_input = input("\nPress ENTER to spin (q to quit): ").strip().lower()
+            if user_input == "q":
+                print(f"\nYou left with ${self.balance}.")
+                break
+
+            self.play_spin()
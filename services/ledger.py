@@ -0,0 +1,277 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows, where the file is only ever shared by one process
+    fcntl = None
+
+from services.game import RoundResult
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 512       # Pending records that trigger an immediate flush
+FLUSH_INTERVAL = 0.05  # Seconds a record may wait before the background flush writes it
+
+
+def grid_code(columns: List[List[str]]) -> str:
+    """
+    Encode a spin result as a compact string: columns separated by "/", symbols by ",".
+
+    Args:
+        columns (List[List[str]]): The columns of the slot machine.
+
+    Returns:
+        str: The encoded grid, for example "A,B,C/A,C,D/A,D,C".
+    """
+    return "/".join(",".join(column) for column in columns)
+
+
+@contextmanager
+def _exclusive(file: BinaryIO) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a ledger file, shared by every process that appends to it.
+
+    Several server workers may append to the same ledger. Appends and the repair of a
+    partial last line take this lock, so a worker starting up never cuts off a batch that
+    another worker is writing.
+
+    Args:
+        file (BinaryIO): The open ledger file.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _drop_partial_line(file: BinaryIO) -> None:
+    """
+    Cut off a partial last line left by a crash, so new records start on a fresh line.
+    Must be called with the file locked, see `_exclusive()`.
+
+    Args:
+        file (BinaryIO): The ledger file, opened for reading and appending.
+    """
+    end = file.seek(0, os.SEEK_END)
+    position = end
+    while position > 0:
+        step = min(4096, position)
+        file.seek(position - step)
+        chunk = file.read(step)
+        newline = chunk.rfind(b"\n")
+        if newline != -1:
+            position = position - step + newline + 1
+            break
+        position -= step
+
+    if position != end:
+        os.ftruncate(file.fileno(), position)
+
+
+class Ledger:
+    """
+    Append-only record of settled rounds, one JSON object per line.
+
+    Records are buffered and written with group commit: a background thread writes and
+    fsyncs the pending batch once `batch_size` records are waiting or `flush_interval`
+    seconds have passed, so a busy server pays one fsync per batch instead of one per
+    spin, and callers never wait on the disk. `record()` returns before the record is
+    durable; call `flush()` when a caller needs to wait for it.
+
+    A batch only leaves memory once it is written and fsynced. When the disk fails (a
+    full disk, an I/O error) the batch stays pending and is retried by the next flush,
+    and the background thread logs the error and keeps running.
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> None:
+        """
+        Open (or create) the ledger file for appending.
+
+        Args:
+            path (str): Ledger file path.
+            batch_size (int): Pending records that trigger an immediate flush.
+            flush_interval (float): Longest time in seconds a record stays in memory.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._file = open(path, "a+b", buffering=0) # Unbuffered, so a failed write leaves nothing behind
+        with _exclusive(self._file):
+            _drop_partial_line(self._file)
+        self._pending: List[bytes] = []
+        self._lock = threading.Lock()     # Guards `_pending`
+        self._io_lock = threading.Lock()  # Serialises writes, so batches land in order
+        self._closed = threading.Event()
+        self._wake = threading.Event()    # Set when a batch is full or the ledger closes
+
+        self._flusher = threading.Thread(target=self._flush_periodically, name="ledger-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+
+    def __enter__(self) -> "Ledger":
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """
+        Buffer one record.
+
+        Args:
+            entry (Dict[str, Any]): JSON-serialisable record.
+
+        Raises:
+            ValueError: If the ledger is closed.
+        """
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError(f"Ledger {self.path} is closed, the record was not written.")
+            self._pending.append(line)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            self._wake.set() # Let the background thread flush now instead of at the next tick
+
+
+    def record(self, session: str, result: RoundResult) -> None:
+        """
+        Buffer a settled round.
+
+        Args:
+            session (str): Session or player the round belongs to.
+            result (RoundResult): The settled round.
+        """
+        self.append({
+            "time": time.time(),
+            "session": session,
+            "lines": result.lines,
+            "bet": result.bet,
+            "grid": grid_code(result.columns),
+            "winnings": result.winnings,
+            "balance": result.balance,
+        })
+
+
+    def flush(self) -> None:
+        """
+        Write all pending records and fsync the file.
+
+        Raises:
+            OSError: If the write or fsync fails. The records stay pending for the next flush.
+        """
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch or self._file.closed:
+                return
+
+            try:
+                self._write(b"".join(batch))
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = batch # Ahead of any record appended meanwhile
+                raise
+
+
+    def _write(self, data: bytes) -> None:
+        """
+        Append data to the file and fsync it under the exclusive lock, all of it or none
+        of it: when the write or fsync fails, the part already written is cut off again,
+        so retrying the batch never duplicates records.
+
+        Args:
+            data (bytes): Whole lines to append.
+
+        Raises:
+            OSError: If the write or fsync fails.
+        """
+        with _exclusive(self._file):
+            start = os.fstat(self._file.fileno()).st_size
+            view = memoryview(data)
+            try:
+                while view:
+                    view = view[self._file.write(view):]
+                os.fsync(self._file.fileno())
+            except OSError:
+                os.ftruncate(self._file.fileno(), start)
+                raise
+
+
+    def _flush_periodically(self) -> None:
+        """
+        Background loop that flushes pending records when a batch fills up, or at least
+        every `flush_interval` seconds.
+        """
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._pending:
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception("Could not write the ledger %s, retrying at the next flush", self.path)
+
+
+    def close(self) -> None:
+        """
+        Flush pending records and close the file. Safe to call more than once.
+
+        Raises:
+            OSError: If the last flush fails. The file is closed anyway.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+        self._wake.set()
+        self._flusher.join()
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        finally:
+            with self._io_lock:
+                self._file.close()
+
+
+def read_ledger(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read the records of a ledger file in order.
+
+    A crash during a write can leave a partial last line; it is skipped.
+
+    Args:
+        path (str): Ledger file path.
+
+    Yields:
+        Dict[str, Any]: One record per settled round.
+
+    Raises:
+        ValueError: If a line other than the last one is corrupt.
+    """
+    with open(path, "rb") as file:
+        previous: Optional[bytes] = None
+        for line in file:
+            if previous is not None:
+                yield json.loads(previous)
+            previous = line
+
+        if previous is not None and previous.endswith(b"\n"):
+            yield json.loads(previous)
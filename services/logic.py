@@ -1,5 +1,78 @@
-import random
-from typing import List, Dict, Tuple
+from __future__ import annotations
+
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+from itertools import accumulate
+from operator import itemgetter
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Sequence, Tuple, Union
+
+from services.evaluators import cluster_counts_many, cluster_outcomes, ways_counts_many, ways_outcomes, weighted_bincount
+from services.metrics import METRICS
+from services.rng import make_rng, numpy_generator
+
+if TYPE_CHECKING:
+    import numpy as np # Only the batch API needs NumPy, it is imported on first use
+
+# Bytes of one working array of `spin_many()`, the number of spins generated at once follows from it
+SPIN_BATCH_BYTES = 32 * 1024 * 1024
+
+# Winning lines are reported as bits of a uint64 by `check_winnings_many()`
+MAX_PAYLINES = 64
+
+# How a spin is scored: along paylines, "243 ways" style across adjacent columns, or by clusters
+WIN_MODES = ("lines", "ways", "clusters")
+
+# Lookup arrays of the batch API, compiled on first use and dropped when the configuration changes
+BATCH_TABLES = ("_line_index", "_paytable_arrays", "code_dtype", "_pool_codes", "_column_codes", "_column_cdf")
+
+# Limits of the optional outcome caches (see `SlotMachine(cache=True)`)
+MAX_COLUMN_OUTCOMES = 4096 # Largest column-outcome table that is precomputed
+GRID_CACHE_SIZE = 65_536 # Grid evaluations kept per machine, least recently used dropped first
+
+
+@lru_cache(maxsize=32)
+def column_outcomes(rows: int, symbols: Tuple[Tuple[str, int], ...]) -> Optional[Tuple[Tuple[Tuple[str, ...], ...], Tuple[int, ...]]]:
+    """
+    Every distinct column a machine can show, with the number of ways to draw it.
+
+    A column is `rows` symbols drawn in order without replacement, so the number of ways
+    to draw a given column is the product of how many of each symbol are left at every
+    draw, and the weights add up to pool size * (pool size - 1) * ... Cached per
+    configuration, so machines with the same symbols share one table.
+
+    Args:
+        rows (int): Rows per column.
+        symbols (Tuple[Tuple[str, int], ...]): (symbol, frequency) pairs.
+
+    Returns:
+        Optional[Tuple[Tuple[Tuple[str, ...], ...], Tuple[int, ...]]]: The columns and their
+        integer weights, or None when there could be more than `MAX_COLUMN_OUTCOMES` columns.
+    """
+    total = sum(count for _, count in symbols)
+    possible = 1
+    for row in range(rows):
+        possible *= min(len(symbols), total - row) # Choices for this row, bounded by both limits
+    if possible > MAX_COLUMN_OUTCOMES:
+        return None
+
+    outcomes: List[Tuple[str, ...]] = []
+    weights: List[int] = []
+    remaining = [count for _, count in symbols]
+
+    def extend(prefix: Tuple[str, ...], weight: int) -> None:
+        if len(prefix) == rows:
+            outcomes.append(prefix)
+            weights.append(weight)
+            return
+        for index, (symbol, _) in enumerate(symbols):
+            left = remaining[index]
+            if left:
+                remaining[index] -= 1
+                extend(prefix + (symbol,), weight * left)
+                remaining[index] += 1
+
+    extend((), 1)
+    return tuple(outcomes), tuple(weights)
 
 
 class SlotMachine:
@@ -7,7 +80,10 @@ class SlotMachine:
     A class that represents a slot machine with spinning and winnings logic.
     """
 
-    def __init__(self, rows: int, cols: int, symbols: Dict[str, int], symbol_values: Dict[str, int]) -> None:
+    def __init__(self, rows: int, cols: int, symbols: Dict[str, int],
+                 symbol_values: Dict[str, Union[int, Dict[int, int]]], rng=None,
+                 paylines: Optional[Sequence[Sequence[int]]] = None, win_mode: str = "lines",
+                 cache: bool = False) -> None:
         """
         Initialize the slot machine with configuration.
 
@@ -15,38 +91,409 @@ class SlotMachine:
             rows (int): Number of rows in the machine.
             cols (int): Number of columns in the machine.
             symbols (Dict[str, int]): Symbol with their frequency.
-            symbol_values (Dict[str, int]): Payout multiplier per symbol.
+            symbol_values (Dict[str, Union[int, Dict[int, int]]]): Payout multiplier per
+                symbol for a line that matches across all columns, or a table of multipliers
+                by the length of the left-to-right run, e.g. {3: 5, 4: 20, 5: 100}.
+            rng: Random source for spins: an int seed, `random.Random`, `np.random.Generator`
+                or `services.rng.BufferedRandom`. Every machine gets its own independent
+                stream when omitted.
+            paylines (Optional[Sequence[Sequence[int]]]): The row each line passes through in
+                every column, e.g. (0, 1, 2) for a diagonal. Defaults to one horizontal line
+                per row, line 1 being the top row.
+            win_mode (str): "lines" to score the paylines; "ways" to pay a symbol once for
+                every path through adjacent columns from the left, with the run length being
+                the number of columns reached; "clusters" to pay groups of equal symbols
+                connected horizontally or vertically, with the run length being the cluster
+                size. Ways and cluster machines have a single line: the whole grid.
+            cache (bool): Precompute the table of column outcomes, so a spin is one weighted
+                draw per column, and keep the most recent grid evaluations (see
+                `column_outcomes()` and `GRID_CACHE_SIZE`). Machines with too many column
+                outcomes keep drawing symbol by symbol.
+
+        Raises:
+            ValueError: If the win mode is unknown.
         """
+        if win_mode not in WIN_MODES:
+            raise ValueError(f"Win mode must be one of {WIN_MODES}, got {win_mode!r}.")
+
         self.rows = rows
         self.cols = cols
-        self.symbols = symbols
-        self.symbol_values = symbol_values
+        self.win_mode = win_mode
+        self.cache = cache
+        self._symbol_values = symbol_values
+        self.paylines = paylines if paylines is not None else [(row,) * cols for row in range(rows)]
+        self.symbols = symbols # Compiles the symbol pool and paytable (see the setters below)
+        self.rng = make_rng(rng)
+        self._numpy_rng: Optional[np.random.Generator] = None # Created on the first `spin_many()` call
+
+
+    def __getstate__(self) -> Dict[str, object]:
+        """
+        Pickle the machine without its grid-evaluation cache, which cannot be pickled, so
+        cached machines can be sent to worker processes.
+        """
+        state = self.__dict__.copy()
+        state.pop("_evaluate", None)
+        return state
+
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        """
+        Restore a pickled machine with a fresh, empty grid-evaluation cache.
+        """
+        self.__dict__.update(state)
+        self._reset_grid_cache()
+
+
+    @property
+    def symbols(self) -> Dict[str, int]:
+        """
+        Symbol frequencies the machine's symbol pool is built from.
+        """
+        return self._symbols
+
+
+    @symbols.setter
+    def symbols(self, symbols: Dict[str, int]) -> None:
+        """
+        Replace the symbol frequencies and recompile the symbol pool.
+
+        Args:
+            symbols (Dict[str, int]): Symbol with their frequency.
+
+        Raises:
+            ValueError: If the pool holds fewer symbols than there are rows.
+        """
+        self._symbols = symbols
+        self._compile_pool()
+
+
+    @property
+    def symbol_values(self) -> Dict[str, int]:
+        """
+        Payout multiplier per symbol.
+        """
+        return self._symbol_values
+
+
+    @symbol_values.setter
+    def symbol_values(self, symbol_values: Dict[str, Union[int, Dict[int, int]]]) -> None:
+        """
+        Replace the paytable and recompile the payout lookups.
+
+        Args:
+            symbol_values (Dict[str, Union[int, Dict[int, int]]]): Payout multiplier, or
+                table of multipliers by run length, per symbol.
+        """
+        self._symbol_values = symbol_values
+        self._compile_values()
+
+
+    @property
+    def max_run(self) -> int:
+        """
+        The longest run the paytable can price: the number of columns, or the number of
+        cells for cluster pays.
+        """
+        return self.rows * self.cols if self.win_mode == "clusters" else self.cols
+
+
+    @property
+    def line_count(self) -> int:
+        """
+        Number of lines a player can bet on.
+        """
+        return len(self._paylines) if self.win_mode == "lines" else 1
+
+
+    @property
+    def paylines(self) -> Tuple[Tuple[int, ...], ...]:
+        """
+        The row each line passes through in every column, line 1 first.
+        """
+        return self._paylines
+
+
+    @paylines.setter
+    def paylines(self, paylines: Sequence[Sequence[int]]) -> None:
+        """
+        Replace the paylines and recompile their index arrays.
+
+        Every line is compiled once into the positions of its cells in a spin flattened
+        column by column, so evaluating it is a single gather instead of a walk over
+        the columns.
+
+        Args:
+            paylines (Sequence[Sequence[int]]): The row of every line in each column.
+
+        Raises:
+            ValueError: If there are no lines or more than `MAX_PAYLINES`, or a line does
+                not have one row per column.
+        """
+        paylines = tuple(tuple(line) for line in paylines)
+        if not 1 <= len(paylines) <= MAX_PAYLINES:
+            raise ValueError(f"A machine needs between 1 and {MAX_PAYLINES} paylines, got {len(paylines)}.")
+        for line in paylines:
+            if len(line) != self.cols or not all(0 <= row < self.rows for row in line):
+                raise ValueError(f"Payline {line} must give a row between 0 and {self.rows - 1} for each of the {self.cols} columns.")
+
+        self._paylines = paylines
+        self._line_positions = tuple(tuple(col * self.rows + row for col, row in enumerate(line)) for line in paylines)
+
+        # `itemgetter` returns a bare value instead of a tuple for a single index, so a
+        # one-column line takes a one-cell slice instead (both stay picklable)
+        if self.cols == 1:
+            self._line_getters: Tuple[Callable, ...] = tuple(
+                itemgetter(slice(position, position + 1)) for (position,) in self._line_positions
+            )
+        else:
+            self._line_getters = tuple(itemgetter(*positions) for positions in self._line_positions)
+        self._drop_batch_tables()
+        self._reset_grid_cache()
+
+
+    def expand_paytable(self, symbol_values: Dict[str, Union[int, Dict[int, int]]]) -> List[List[Optional[int]]]:
+        """
+        Expand a paytable into the multiplier of every symbol code and run length.
+
+        A run pays the highest tier that is not longer than it, so with tiers {3: 5, 5: 50}
+        a run of 4 pays 5. A plain multiplier is a single tier for the longest run, see
+        `max_run`.
+
+        Args:
+            symbol_values (Dict[str, Union[int, Dict[int, int]]]): Payout multiplier, or
+                table of multipliers by run length, per symbol. Missing symbols never win.
+
+        Returns:
+            List[List[Optional[int]]]: Per symbol code, the multiplier of every run length
+            from 0 to `max_run`, None where the run does not win.
+
+        Raises:
+            ValueError: If a tier is not between 1 and `max_run`.
+        """
+        max_run = self.max_run
+        expanded: List[List[Optional[int]]] = []
+
+        for symbol in self.symbol_names:
+            runs: List[Optional[int]] = [None] * (max_run + 1)
+            value = symbol_values.get(symbol)
+            tiers = {} if value is None else value if isinstance(value, dict) else {max_run: value}
+
+            for run, multiplier in sorted((int(run), multiplier) for run, multiplier in tiers.items()):
+                if not 1 <= run <= max_run:
+                    raise ValueError(f"Symbol {symbol!r} pays a run of {run}, runs are between 1 and {max_run}.")
+                runs[run:] = [multiplier] * (max_run + 1 - run) # Longer runs pay this tier until a higher one
+            expanded.append(runs)
+
+        return expanded
+
+
+    def compile_paytable(self, symbol_values: Dict[str, Union[int, Dict[int, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expand a paytable into lookup arrays indexed by [symbol code, run length], see
+        `expand_paytable()`. Both arrays have a trailing row of zeros, so code -1 ("no win")
+        pays nothing.
+
+        Args:
+            symbol_values (Dict[str, Union[int, Dict[int, int]]]): Payout multiplier, or
+                table of multipliers by run length, per symbol. Missing symbols never win.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Multipliers of shape (symbols + 1, max_run + 1),
+            and whether each entry is a winning run.
+
+        Raises:
+            ValueError: If a tier is not between 1 and `max_run`.
+        """
+        import numpy as np
+
+        expanded = self.expand_paytable(symbol_values) + [[None] * (self.max_run + 1)]
+        payouts = np.array([[value or 0 for value in runs] for runs in expanded], dtype=np.int64)
+        wins = np.array([[value is not None for value in runs] for runs in expanded], dtype=bool)
+        return payouts, wins
+
+
+    def _compile_values(self) -> None:
+        """
+        Build the payout lookups: the paytable, and a dict of the winning (symbol, run
+        length) pairs for `check_winnings()`. The batch API's arrays follow on first use.
+        """
+        expanded = self.expand_paytable(self._symbol_values)
+        self._paytable = tuple(tuple(value or 0 for value in runs) for runs in expanded)
+        self._pays: Dict[Tuple[str, int], int] = {
+            (symbol, run): value
+            for symbol, runs in zip(self.symbol_names, expanded)
+            for run, value in enumerate(runs) if value is not None
+        }
+        self._drop_batch_tables()
+        self._reset_grid_cache()
+
+
+    def _drop_batch_tables(self) -> None:
+        """
+        Forget the batch API's lookup arrays, so they are compiled again for the new configuration.
+        """
+        for name in BATCH_TABLES:
+            self.__dict__.pop(name, None)
+
+
+    @cached_property
+    def _paytable_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The paytable as lookup arrays, see `compile_paytable()`.
+        """
+        return self.compile_paytable(self._symbol_values)
+
+
+    @property
+    def _pay_array(self) -> np.ndarray:
+        return self._paytable_arrays[0]
+
+
+    @property
+    def _win_array(self) -> np.ndarray:
+        return self._paytable_arrays[1]
+
+
+    @cached_property
+    def _line_index(self) -> np.ndarray:
+        """
+        Positions of every line's cells in a spin flattened column by column, shape (lines, cols).
+        """
+        import numpy as np
+
+        return np.array(self._line_positions, dtype=np.intp)
+
+
+    @cached_property
+    def code_dtype(self) -> type:
+        """
+        Integer type of the symbol codes of the batch API.
+        """
+        import numpy as np
+
+        return np.uint8 if len(self.symbol_names) <= 256 else np.uint16
+
+
+    @cached_property
+    def _pool_codes(self) -> np.ndarray:
+        """
+        The symbol pool as symbol codes.
+        """
+        import numpy as np
+
+        codes = {symbol: code for code, symbol in enumerate(self.symbol_names)}
+        return np.array([codes[symbol] for symbol in self._pool], dtype=self.code_dtype)
 
 
+    @cached_property
+    def _column_codes(self) -> np.ndarray:
+        """
+        The column-outcome table as symbol codes, shape (outcomes, rows).
+        """
+        import numpy as np
+
+        codes = {symbol: code for code, symbol in enumerate(self.symbol_names)}
+        return np.array([[codes[symbol] for symbol in column] for column in self._column_table], dtype=self.code_dtype)
+
+
+    @cached_property
+    def _column_cdf(self) -> np.ndarray:
+        """
+        Cumulative distribution of the column outcomes, ending at exactly 1.
+        """
+        import numpy as np
+
+        return np.array(self._cumulative_weights, dtype=np.float64) / float(self._total_weight)
+
+
+    def _reset_grid_cache(self) -> None:
+        """
+        Start a fresh grid-evaluation cache, called whenever the paytable, paylines or
+        symbols change so that no stale evaluation survives a configuration change.
+        """
+        if self.cache:
+            self._evaluate = lru_cache(maxsize=GRID_CACHE_SIZE)(self._evaluate_grid)
+        else:
+            self._evaluate = self._evaluate_grid
+
+
+    @property
+    def paytable(self) -> Tuple[Tuple[int, ...], ...]:
+        """
+        Payout multiplier per symbol code (rows) and run length (columns, 0 to `max_run`).
+        """
+        return self._paytable
+
+
+    def _compile_pool(self) -> None:
+        """
+        Flatten the symbol frequencies into the pool used by `spin()`.
+
+        The pool is built once per configuration and is never mutated while spinning,
+        so a spin does not have to rebuild or copy it.
+        """
+        pool: List[str] = []
+        for symbol, count in self._symbols.items():
+            pool.extend([symbol] * count)
+
+        if len(pool) < self.rows:
+            raise ValueError(f"Symbol pool has {len(pool)} symbols, need at least {self.rows} to fill a column.")
+
+        self._pool: Tuple[str, ...] = tuple(pool)
+
+        # Column-outcome table for cached machines, drawn from with cumulative integer weights
+        table = column_outcomes(self.rows, tuple(self._symbols.items())) if self.cache else None
+        self._column_table: Optional[Tuple[Tuple[str, ...], ...]] = None
+        if table is not None:
+            self._column_table, weights = table
+            self._cumulative_weights = list(accumulate(weights))
+            self._total_weight = self._cumulative_weights[-1]
+
+        # Integer codes used by the batch API: symbol i in `symbol_names` is encoded as i
+        self.symbol_names: Tuple[str, ...] = tuple(self._symbols)
+        self._compile_values()
+
+
+    @METRICS.timed("slot_spin_seconds", "Time to spin the reels once.")
     def spin(self) -> List[List[str]]:
         """
         Simulates a spin of the slot machine.
 
+        Each column is drawn without replacement from the symbol pool using a partial
+        Fisher-Yates shuffle. Instead of copying the pool, the swaps are recorded in a
+        small dict, so each column costs O(rows) no matter how large the pool is.
+
+        Cached machines draw every column at once from the precomputed column outcomes
+        instead, with one weighted random index per column.
+
         Returns:
              List[List[str]]: A list of columns, each containing row symbols.
         """
-        all_symbols = []
-        for symbol, count in self.symbols.items():
-            for _ in range(count):
-                all_symbols.append(symbol)
+        if self._column_table is not None:
+            table = self._column_table
+            cumulative = self._cumulative_weights
+            total = self._total_weight
+            randrange = self.rng.randrange
+            return [list(table[bisect_right(cumulative, randrange(0, total))]) for _ in range(self.cols)]
+
+        pool = self._pool
+        size = len(pool)
+        randrange = self.rng.randrange
 
         all_columns: List[List[str]] = [] # Holds all the columns that will make up the spin result
 
         # Loop once for each column
         for _ in range(self.cols):
-            column : List[str] = [] # Individual column
-            current_symbols = all_symbols[:]  # Create a copy of the full symbol pool
+            column: List[str] = [] # Individual column
+            swapped: Dict[int, str] = {} # Pool positions that hold a different symbol after a swap
 
-            # For each row in this column, randomly choose a symbol
-            for _ in range(self.rows):
-                value = random.choice(current_symbols) # Randomly pick a symbol
-                current_symbols.remove(value)  # Remove the symbol so it doesn't get chosen again
-                column.append(value)  # Add the chosen symbol to this column
+            # For each row in this column, pick a random symbol from the part of the pool not drawn yet
+            for row in range(self.rows):
+                pick = randrange(row, size)
+                value = swapped.get(pick, pool[pick])
+                swapped[pick] = swapped.get(row, pool[row]) # Move the symbol at `row` into the picked slot
+                column.append(value)
 
             all_columns.append(column)  # Add the completed column to the column list
 
@@ -54,6 +501,74 @@ class SlotMachine:
         return all_columns
 
 
+    def spin_many(self, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Simulates `n` spins at once.
+
+        Each column is drawn without replacement, like `spin()`: row r takes a uniform pick
+        among the pool positions that rows 0 to r - 1 left over. The pick is drawn as an
+        index into the remaining positions and shifted past the taken ones in ascending
+        order, so a column costs O(rows²) whatever the pool size. Spins are generated in
+        chunks sized from `SPIN_BATCH_BYTES`, which bounds the memory of large machines.
+
+        Args:
+            n (int): Number of spins to generate.
+            rng (Optional[np.random.Generator]): Random generator to draw from. Defaults to
+                a generator tied to the machine's own random source.
+
+        Returns:
+            np.ndarray: Array of shape (n, cols, rows) holding symbol codes, where code i
+            stands for `symbol_names[i]`.
+        """
+        import numpy as np
+
+        if rng is None:
+            if self._numpy_rng is None:
+                self._numpy_rng = numpy_generator(self.rng)
+            rng = self._numpy_rng
+
+        grids = np.empty((n, self.cols, self.rows), dtype=self.code_dtype)
+        size = len(self._pool_codes)
+        batch = max(1, SPIN_BATCH_BYTES // (self.cols * self.rows * 8))
+
+        for start in range(0, n, batch):
+            stop = min(start + batch, n)
+
+            if self._column_table is not None: # One draw per column from the outcome table
+                picks = np.searchsorted(self._column_cdf, rng.random((stop - start, self.cols)), side="right")
+                grids[start:stop] = self._column_codes[picks]
+                continue
+
+            picks = np.empty((stop - start, self.cols, self.rows), dtype=np.int64) # Positions in draw order
+            taken = np.empty_like(picks) # The same positions, sorted along the last axis
+
+            for row in range(self.rows):
+                pick = (rng.random((stop - start, self.cols)) * (size - row)).astype(np.int64)
+                for index in range(row): # Skip the taken positions at or below the pick
+                    pick += pick >= taken[..., index]
+                picks[..., row] = pick
+                taken[..., row] = pick
+                taken[..., :row + 1].sort(axis=-1)
+
+            grids[start:stop] = self._pool_codes[picks]
+
+        return grids
+
+
+    def decode(self, grid: np.ndarray) -> List[List[str]]:
+        """
+        Convert one integer-coded grid from `spin_many()` back to symbol columns.
+
+        Args:
+            grid (np.ndarray): Array of shape (cols, rows) holding symbol codes.
+
+        Returns:
+            List[List[str]]: A list of columns, each containing row symbols.
+        """
+        return [[self.symbol_names[code] for code in column] for column in grid.tolist()]
+
+
+    @METRICS.timed("slot_check_winnings_seconds", "Time to score one spin.")
     def check_winnings(self, columns: List[List[str]], lines: int, bet: int) -> Tuple[int, List[int]]:
         """
         Calculate total winnings and winning lines based on the slot result.
@@ -66,19 +581,198 @@ class SlotMachine:
         Returns:
             Tuple[int, List[int]]: Total winnings and a list of winning line numbers.
         """
+        grid = tuple(symbol for column in columns for symbol in column) # The spin, column by column
+        multiplier, winning_lines = self._evaluate(grid, lines)
+        return multiplier * bet, list(winning_lines)
+
+
+    def _evaluate_grid(self, grid: Tuple[str, ...], lines: int) -> Tuple[int, Tuple[int, ...]]:
+        """
+        Score a spin for a bet of 1 per line. Cached machines memoize this per grid.
+
+        Args:
+            grid (Tuple[str, ...]): The spin's symbols, column by column.
+            lines (int): Number of lines the user is betting on.
+
+        Returns:
+            Tuple[int, Tuple[int, ...]]: Total payout multiplier and the winning line numbers.
+        """
+        if self.win_mode != "lines":
+            return self._check_grid_winnings(grid)
+
+        winnings = 0
+        winning_lines = [] # Keeps track of which lines won
+        pays = self._pays
+        cols = self.cols
+
+        # Loop through every payline up to the number of lines the user bet on
+        for number, getter in enumerate(self._line_getters[:lines], start=1):
+            cells = getter(grid) # The line's symbol in every column
+            symbol = cells[0]
+
+            # Count how many columns from the left show the same symbol
+            run = 1
+            while run < cols and cells[run] == symbol:
+                run += 1
+
+            value = pays.get((symbol, run))
+            if value is not None: # The run is long enough to pay
+                winnings += value
+                winning_lines.append(number)
+
+        # Return the payout multiplier and which lines were winners
+        return winnings, tuple(winning_lines)
+
+
+    def _check_grid_winnings(self, grid: Tuple[str, ...]) -> Tuple[int, Tuple[int, ...]]:
+        """
+        Score a spin of a ways or cluster machine, whose single line is the grid.
+
+        Args:
+            grid (Tuple[str, ...]): The spin's symbols, column by column.
+
+        Returns:
+            Tuple[int, Tuple[int, ...]]: Total payout multiplier, and (1,) if anything won.
+        """
+        rows = self.rows
+        columns = [list(grid[start:start + rows]) for start in range(0, len(grid), rows)]
+        pays = self._pays
+        if self.win_mode == "ways":
+            outcomes = ways_outcomes(columns)
+        else:
+            outcomes = [(symbol, size, 1) for symbol, size in cluster_outcomes(columns)]
+
         winnings = 0
-        winning_lines = [] # Keeps track of which lines (rows) won
+        won = False
+        for symbol, run, count in outcomes:
+            value = pays.get((symbol, run))
+            if value is not None:
+                winnings += value * count
+                won = True
+
+        return winnings, (1,) if won else ()
+
+
+    def outcome_counts_many(self, grids: np.ndarray, lines, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Count how often each (symbol, run length) outcome occurred in a batch of spins,
+        whether or not it pays. For line machines that is one outcome per line bet on, for
+        ways machines the number of ways, and for cluster machines the number of clusters.
+
+        The payout of a spin under any paytable is the sum of these counts weighted by the
+        paytable's multipliers.
+
+        Args:
+            grids (np.ndarray): Array of shape (n, cols, rows) from `spin_many()`.
+            lines (int | np.ndarray): Number of lines bet on, for all spins or per spin.
+            weights (Optional[np.ndarray]): Weight of every spin, such as its bet per line.
+                When given, the weighted counts are summed over the batch instead of
+                returned per spin, which keeps large batches small.
+
+        Returns:
+            np.ndarray: Array of shape (n, symbols, max_run + 1), or (symbols, max_run + 1)
+            with `weights`.
+        """
+        import numpy as np
+
+        grids = np.asarray(grids)
+        symbols = len(self.symbol_names)
+
+        if self.win_mode == "ways":
+            return ways_counts_many(grids, symbols, weights)
+        if self.win_mode == "clusters":
+            return cluster_counts_many(grids, symbols, weights)
+
+        codes, runs = self.line_runs_many(grids, lines)
+        width = symbols * (self.cols + 1)
+
+        if weights is not None:
+            bet_on = codes >= 0
+            weights = np.broadcast_to(np.asarray(weights).reshape(-1, 1), codes.shape)
+            totals = weighted_bincount((codes * (self.cols + 1) + runs)[bet_on], weights[bet_on], width)
+            return totals.reshape(symbols, self.cols + 1)
+
+        index = codes * (self.cols + 1) + runs + np.arange(len(grids)).reshape(-1, 1) * width
+        counts = np.bincount(index[codes >= 0], minlength=len(grids) * width)
+        return counts.reshape(len(grids), symbols, self.cols + 1)
+
+
+    def line_runs_many(self, grids: np.ndarray, lines) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the leading symbol and left-to-right run length of every line for a batch of
+        integer-coded spins, whether or not the run pays.
+
+        Args:
+            grids (np.ndarray): Array of shape (n, cols, rows) from `spin_many()`.
+            lines (int | np.ndarray): Number of lines bet on, for all spins or per spin.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Arrays of shape (n, paylines) holding the code of
+            the symbol in the first column of each line (-1 where the line was not bet on),
+            and the number of columns from the left that show that symbol.
+        """
+        import numpy as np
+
+        grids = np.asarray(grids)
+        lines = np.asarray(lines).reshape(-1, 1)
+
+        # Gather the cells of every line, shape (n, paylines, cols)
+        cells = grids.reshape(len(grids), -1)[:, self._line_index]
+
+        # The run ends at the first column that differs from the first one
+        differs = cells[:, :, 1:] != cells[:, :, :1]
+        runs = np.where(differs.any(axis=2), differs.argmax(axis=2) + 1, self.cols)
+
+        bet_on = np.arange(len(self._paylines)) < lines
+        return np.where(bet_on, cells[:, :, 0].astype(np.intp), -1), runs
+
+
+    def line_matches_many(self, grids: np.ndarray, lines) -> np.ndarray:
+        """
+        Find the winning symbol of every line for a batch of integer-coded spins.
+
+        Args:
+            grids (np.ndarray): Array of shape (n, cols, rows) from `spin_many()`.
+            lines (int | np.ndarray): Number of lines bet on, for all spins or per spin.
+
+        Returns:
+            np.ndarray: Array of shape (n, paylines) holding the code of the symbol each
+            line won with, or -1 where the line lost or was not bet on.
+        """
+        import numpy as np
+
+        codes, runs = self.line_runs_many(grids, lines)
+        return np.where(self._win_array[codes, runs], codes, -1)
+
+
+    def check_winnings_many(self, grids: np.ndarray, lines, bet) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate winnings for a batch of integer-coded spins in one vectorized pass.
+
+        Args:
+            grids (np.ndarray): Array of shape (n, cols, rows) from `spin_many()`.
+            lines (int | np.ndarray): Number of lines bet on, for all spins or per spin.
+            bet (int | np.ndarray): Bet amount per line, for all spins or per spin.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Winnings per spin, and a bitmask per spin where
+            bit i is set when line i + 1 won.
+        """
+        import numpy as np
+
+        bet = np.asarray(bet, dtype=np.int64)
+
+        if self.win_mode != "lines":
+            counts = self.outcome_counts_many(grids, lines)
+            winnings = (counts * self._pay_array[:-1]).sum(axis=(1, 2)) * bet
+            won = ((counts > 0) & self._win_array[:-1]).any(axis=(1, 2))
+            return winnings, won.astype(np.uint64)
 
-        for line in range(lines): # Loop through every row up to the number of lines the user bet on
-            symbol = columns[0][line]
+        codes, runs = self.line_runs_many(grids, lines)
+        numbers = np.arange(codes.shape[1], dtype=np.uint64)
+        won = self._win_array[codes, runs]
 
-            # Check if all the columns have the same symbol in this row
-            for column in columns:
-                if column[line] != symbol: # If symbols are not the same then break out of the loop and check the next line
-                    break
-            else: # If the loop didn't break, all symbols matched, therefore a win.
-                winnings += self.symbol_values[symbol] * bet # Multiply symbol value by bet amount
-                winning_lines.append(line + 1)
+        winnings = self._pay_array[codes, runs].sum(axis=1) * bet
+        mask = (won.astype(np.uint64) << numbers).sum(axis=1, dtype=np.uint64)
 
-        # Return total money won and which lines were winners
-        return winnings, winning_lines
\ No newline at end of file
+        return winnings, mask
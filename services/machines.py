@@ -0,0 +1,366 @@
+import json
+import threading
+import time
+import tomllib
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from services.logic import MAX_PAYLINES, WIN_MODES, SlotMachine
+
+MACHINES_DIR = Path(__file__).resolve().parent.parent / "machines" # Bundled machine definitions
+DEFAULT_MACHINE_ID = "classic"
+RELOAD_CHECK_INTERVAL = 1.0 # Seconds between checks for changed definition files
+CONFIG_SUFFIXES = (".toml", ".json")
+
+
+class MachineDefinition(NamedTuple):
+    """
+    A validated machine configuration, loaded from a TOML or JSON file.
+    """
+    id: str                       # Machine id, the file name without its suffix
+    name: str                     # Display name
+    rows: int                     # Number of rows in the slot machine
+    cols: int                     # Number of columns in the slot machine
+    symbol_count: Dict[str, int]  # Frequency of each symbol in the pool
+    symbol_values: Dict[str, Union[int, Dict[int, int]]] # Payout multiplier, or multipliers by run length, per symbol
+    max_lines: int                # Maximum number of lines a player can bet on
+    min_bet: int                  # Minimum bet per line
+    max_bet: int                  # Maximum bet per line
+    paylines: Optional[Tuple[Tuple[int, ...], ...]] = None # Row of every line in each column, horizontal rows when None
+    win_mode: str = "lines"       # "lines", "ways" or "clusters", see `SlotMachine`
+    cache: bool = False           # Precompute column outcomes and memoize grid evaluations, see `SlotMachine`
+
+    def build(self, rng=None) -> SlotMachine:
+        """
+        Create a slot machine from this definition.
+
+        Args:
+            rng: Random source for the machine, see `SlotMachine`.
+
+        Returns:
+            SlotMachine: The machine, with its symbol pool and paytable compiled.
+        """
+        return SlotMachine(
+            self.rows, self.cols, self.symbol_count, self.symbol_values, rng=rng,
+            paylines=self.paylines, win_mode=self.win_mode, cache=self.cache,
+        )
+
+
+def _positive_int(data: Dict[str, Any], key: str, source: str) -> int:
+    """
+    Read a required positive integer setting.
+    """
+    value = data.get(key)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise ValueError(f"{source}: {key!r} must be a positive integer, got {value!r}.")
+    return value
+
+
+def _is_int(value: Any, minimum: int) -> bool:
+    """
+    Whether a decoded value is an integer (not a bool) of at least `minimum`.
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def _symbol_table(data: Dict[str, Any], key: str, source: str, minimum: int) -> Dict[str, int]:
+    """
+    Read a required table of symbol -> integer of at least `minimum`.
+    """
+    table = data.get(key)
+    if not isinstance(table, dict) or not table:
+        raise ValueError(f"{source}: {key!r} must be a non-empty table of symbols.")
+
+    for symbol, value in table.items():
+        if not _is_int(value, minimum):
+            raise ValueError(f"{source}: {key}.{symbol} must be an integer of at least {minimum}, got {value!r}.")
+    return dict(table)
+
+
+def _paytable(data: Dict[str, Any], max_run: int, source: str) -> Dict[str, Union[int, Dict[int, int]]]:
+    """
+    Read the `symbol_values` table. A symbol maps to a multiplier for the longest run, or to
+    a table of multipliers by run length, e.g. `A = { 3 = 5, 4 = 20, 5 = 100 }`.
+    """
+    table = data.get("symbol_values")
+    if not isinstance(table, dict) or not table:
+        raise ValueError(f"{source}: 'symbol_values' must be a non-empty table of symbols.")
+
+    paytable: Dict[str, Union[int, Dict[int, int]]] = {}
+    for symbol, value in table.items():
+        if _is_int(value, 0):
+            paytable[symbol] = value
+            continue
+        if not isinstance(value, dict) or not value:
+            raise ValueError(f"{source}: symbol_values.{symbol} must be an integer or a table of run lengths, got {value!r}.")
+
+        tiers: Dict[int, int] = {}
+        for run, multiplier in value.items(): # TOML and JSON keys are strings
+            if not str(run).isdigit() or not 1 <= int(run) <= max_run or not _is_int(multiplier, 0):
+                raise ValueError(
+                    f"{source}: symbol_values.{symbol} must map run lengths 1 to {max_run} to integers of at least 0."
+                )
+            tiers[int(run)] = multiplier
+        paytable[symbol] = tiers
+    return paytable
+
+
+def _paylines(data: Dict[str, Any], rows: int, cols: int, source: str) -> Optional[Tuple[Tuple[int, ...], ...]]:
+    """
+    Read the optional `paylines` list: one list per line holding its row in every column.
+    """
+    paylines = data.get("paylines")
+    if paylines is None:
+        return None
+    if not isinstance(paylines, list) or not 1 <= len(paylines) <= MAX_PAYLINES:
+        raise ValueError(f"{source}: 'paylines' must be a list of 1 to {MAX_PAYLINES} lines.")
+
+    for number, line in enumerate(paylines, start=1):
+        if not isinstance(line, list) or len(line) != cols or not all(_is_int(row, 0) and row < rows for row in line):
+            raise ValueError(f"{source}: payline {number} must list a row between 0 and {rows - 1} for each of the {cols} columns.")
+    return tuple(tuple(line) for line in paylines)
+
+
+def parse_definition(machine_id: str, data: Dict[str, Any], source: str = "<config>") -> MachineDefinition:
+    """
+    Validate a decoded machine configuration.
+
+    Args:
+        machine_id (str): Id of the machine.
+        data (Dict[str, Any]): The decoded TOML or JSON document.
+        source (str): Where the data came from, used in error messages.
+
+    Returns:
+        MachineDefinition: The validated definition.
+
+    Raises:
+        ValueError: If a setting is missing or invalid.
+    """
+    rows = _positive_int(data, "rows", source)
+    cols = _positive_int(data, "cols", source)
+    max_lines = _positive_int(data, "max_lines", source)
+    min_bet = _positive_int(data, "min_bet", source)
+    max_bet = _positive_int(data, "max_bet", source)
+    win_mode = data.get("win_mode", "lines")
+    if win_mode not in WIN_MODES:
+        raise ValueError(f"{source}: 'win_mode' must be one of {WIN_MODES}, got {win_mode!r}.")
+
+    cache = data.get("cache", False)
+    if not isinstance(cache, bool):
+        raise ValueError(f"{source}: 'cache' must be true or false, got {cache!r}.")
+
+    symbol_count = _symbol_table(data, "symbol_count", source, minimum=1)
+    symbol_values = _paytable(data, rows * cols if win_mode == "clusters" else cols, source)
+    paylines = _paylines(data, rows, cols, source)
+
+    # Ways and cluster machines score the whole grid as a single line
+    if win_mode != "lines" and paylines is not None:
+        raise ValueError(f"{source}: 'paylines' only apply to win_mode \"lines\".")
+    line_count = 1 if win_mode != "lines" else len(paylines) if paylines is not None else rows
+
+    if set(symbol_count) != set(symbol_values):
+        raise ValueError(f"{source}: symbol_count and symbol_values must list the same symbols.")
+    if sum(symbol_count.values()) < rows:
+        raise ValueError(f"{source}: the symbol pool must hold at least {rows} symbols to fill a column.")
+    if max_lines > line_count:
+        raise ValueError(f"{source}: max_lines ({max_lines}) cannot exceed the number of lines ({line_count}).")
+    if min_bet > max_bet:
+        raise ValueError(f"{source}: min_bet ({min_bet}) cannot exceed max_bet ({max_bet}).")
+
+    return MachineDefinition(
+        machine_id, str(data.get("name", machine_id)), rows, cols, symbol_count, symbol_values,
+        max_lines, min_bet, max_bet, paylines, win_mode, cache,
+    )
+
+
+def load_definition(path: Path) -> MachineDefinition:
+    """
+    Load and validate a machine definition file.
+
+    Args:
+        path (Path): A `.toml` or `.json` file. The file name without suffix is the machine id.
+
+    Returns:
+        MachineDefinition: The validated definition.
+
+    Raises:
+        ValueError: If the file cannot be parsed or a setting is invalid.
+    """
+    path = Path(path)
+    try:
+        if path.suffix == ".toml":
+            with open(path, "rb") as file:
+                data = tomllib.load(file)
+        else:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+    except (tomllib.TOMLDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f"{path}: {error}") from error
+
+    return parse_definition(path.stem, data, str(path))
+
+
+class MachineRegistry:
+    """
+    Machine definitions from a directory, each compiled once into a shared SlotMachine.
+
+    Changed, added and removed files are picked up automatically: at most once every
+    `check_interval` seconds, a lookup compares file modification times and reloads only
+    the files that changed. A file that fails validation keeps its previous version
+    loaded, so a bad edit cannot take a running machine down.
+
+    Lookups never take the lock: a reload builds new tables and swaps them in whole, so
+    readers always see a complete set of machines, either the old one or the new one.
+    """
+
+    def __init__(self, directory: Path = MACHINES_DIR, check_interval: float = RELOAD_CHECK_INTERVAL) -> None:
+        """
+        Load every definition in the directory.
+
+        Args:
+            directory (Path): Directory holding `.toml` and `.json` definition files.
+            check_interval (float): Seconds between checks for changed files.
+
+        Raises:
+            ValueError: If a definition file is invalid.
+        """
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self.errors: Dict[str, str] = {} # Machine id -> last load error of a broken file
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, MachineDefinition, SlotMachine]] = {} # id -> (mtime, definition, machine)
+        self._last_check = 0.0
+
+        for path in self._definition_files():
+            definition = load_definition(path)
+            self._entries[definition.id] = (path.stat().st_mtime, definition, definition.build())
+        self._last_check = time.monotonic()
+
+
+    def _definition_files(self) -> List[Path]:
+        """
+        Definition files in the directory, sorted by name.
+        """
+        return sorted(path for path in self.directory.iterdir() if path.suffix in CONFIG_SUFFIXES)
+
+
+    def reload(self) -> None:
+        """
+        Reload changed definition files, load new ones and drop removed ones.
+        """
+        with self._lock:
+            self._reload()
+
+
+    def _reload(self) -> None:
+        """
+        Rescan the directory into fresh tables and swap them in. The caller must hold the lock.
+        """
+        self._last_check = time.monotonic()
+        entries = dict(self._entries)
+        errors = dict(self.errors)
+        seen = set()
+
+        for path in self._definition_files():
+            machine_id = path.stem
+            seen.add(machine_id)
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError: # Removed while scanning
+                continue
+
+            entry = entries.get(machine_id)
+            if entry is not None and entry[0] == mtime:
+                continue
+
+            try:
+                definition = load_definition(path)
+            except (OSError, ValueError) as error:
+                errors[machine_id] = str(error)
+                continue
+
+            errors.pop(machine_id, None)
+            entries[machine_id] = (mtime, definition, definition.build())
+
+        for machine_id in set(entries) - seen:
+            del entries[machine_id]
+
+        self._entries, self.errors = entries, errors
+
+
+    def _maybe_reload(self) -> None:
+        """
+        Reload when the last check is older than `check_interval`. Threads that were waiting
+        for another thread's reload check again once they get the lock, so only one of them
+        rescans the directory.
+        """
+        if time.monotonic() - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_check >= self.check_interval:
+                self._reload()
+
+
+    def ids(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Ids of the loaded machines.
+        """
+        self._maybe_reload()
+        return sorted(self._entries)
+
+
+    def lookup(self, machine_id: str) -> Tuple[MachineDefinition, SlotMachine]:
+        """
+        Look up a definition together with its compiled machine, from the same load.
+
+        Args:
+            machine_id (str): The machine id.
+
+        Returns:
+            Tuple[MachineDefinition, SlotMachine]: The definition and its machine.
+
+        Raises:
+            KeyError: If there is no such machine.
+        """
+        self._maybe_reload()
+        _, definition, machine = self._entries[machine_id]
+        return definition, machine
+
+
+    def definition(self, machine_id: str) -> MachineDefinition:
+        """
+        Look up a machine definition.
+
+        Args:
+            machine_id (str): The machine id.
+
+        Returns:
+            MachineDefinition: The definition.
+
+        Raises:
+            KeyError: If there is no such machine.
+        """
+        self._maybe_reload()
+        return self._entries[machine_id][1]
+
+
+    def get(self, machine_id: str) -> SlotMachine:
+        """
+        Look up a compiled machine. The same instance is returned until its file changes.
+
+        Args:
+            machine_id (str): The machine id.
+
+        Returns:
+            SlotMachine: The machine.
+
+        Raises:
+            KeyError: If there is no such machine.
+        """
+        self._maybe_reload()
+        return self._entries[machine_id][2]
+
+
+# The bundled default machine, played by the terminal game and used for the UI limits
+DEFAULT_MACHINE = load_definition(MACHINES_DIR / f"{DEFAULT_MACHINE_ID}.toml")
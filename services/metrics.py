@@ -0,0 +1,284 @@
+"""
+Optional instrumentation of the hot paths, exported in the Prometheus text format.
+
+Metrics are off unless the `SLOT_METRICS` environment variable is set (to anything but
+"0") when the process starts. While off, `timed()` hands back the undecorated function
+and callers guard their counter updates with `METRICS.enabled`, so the instrumented
+code runs exactly as it would without instrumentation.
+"""
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+SUB_BUCKET_BITS = 5 # 16 sub-buckets per power of two: values are kept within ~6% (1/16) precision
+
+# Bucket bounds of the exported Prometheus histograms, in seconds
+EXPORT_BOUNDS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """
+    A monotonically increasing count.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0
+
+
+    def inc(self, amount: int = 1) -> None:
+        """
+        Args:
+            amount (int): Amount to add, not negative.
+        """
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    A latency histogram in the style of HdrHistogram.
+
+    Durations are recorded as integer nanoseconds into log-linear buckets: every power of
+    two is split into 2 ** (SUB_BUCKET_BITS - 1) equal buckets, so recording is a
+    bit_length and a shift, memory stays fixed, and every bucket is within a few percent
+    of the values in it, from nanoseconds to hours.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._half = 1 << (SUB_BUCKET_BITS - 1)
+        self.counts: List[int] = [0] * (64 * self._half)
+        self.count = 0
+        self.total = 0 # Sum of all values, in nanoseconds
+
+
+    def _index(self, value: int) -> int:
+        """
+        Bucket of a value: values below 2 ** SUB_BUCKET_BITS get a bucket each, larger ones
+        share a bucket with the values that agree in their SUB_BUCKET_BITS leading bits.
+        """
+        shift = max(value.bit_length() - SUB_BUCKET_BITS, 0)
+        return shift * self._half + (value >> shift)
+
+
+    def _upper_bound(self, index: int) -> int:
+        """
+        Largest value stored in a bucket.
+        """
+        shift = max(index // self._half - 1, 0)
+        return ((index - shift * self._half + 1) << shift) - 1
+
+
+    def record(self, nanoseconds: int) -> None:
+        """
+        Record one duration.
+
+        Args:
+            nanoseconds (int): The duration, not negative.
+        """
+        index = self._index(nanoseconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += nanoseconds
+
+
+    def percentile(self, percent: float) -> int:
+        """
+        Estimate a percentile.
+
+        Args:
+            percent (float): Percentile between 0 and 100.
+
+        Returns:
+            int: Upper bound of the bucket holding the percentile, in nanoseconds, or 0
+            when nothing was recorded.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+
+        target = max(int(total * percent / 100 + 0.5), 1)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self._upper_bound(index)
+        return 0
+
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """
+        Count the values up to each bound, for the Prometheus `le` buckets.
+
+        Args:
+            bounds (Tuple[float, ...]): Increasing bounds, in seconds.
+
+        Returns:
+            List[int]: Number of values whose bucket lies entirely below each bound.
+        """
+        with self._lock:
+            counts = list(self.counts)
+
+        limits = [bound * 1e9 for bound in bounds]
+        result = [0] * len(bounds)
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            upper = self._upper_bound(index)
+            for position, limit in enumerate(limits):
+                if upper <= limit:
+                    result[position] += count
+        return result
+
+
+class Metrics:
+    """
+    A set of named counters and histograms, optionally labelled.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Args:
+            enabled (bool): Whether instrumentation records anything. When False, `timed()`
+                does not wrap functions and `render()` exports nothing.
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # name -> (type, help, {labels: metric})
+        self._families: Dict[str, Tuple[str, str, Dict[Labels, object]]] = {}
+
+
+    def _metric(self, kind: str, name: str, help_text: str, labels: Optional[Dict[str, str]], factory):
+        """
+        Look up or create one labelled series of a family.
+        """
+        key: Labels = tuple(sorted((labels or {}).items()))
+        family = self._families.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._families.setdefault(name, (kind, help_text, {}))
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+
+    def counter(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Counter:
+        """
+        Get or create a counter.
+
+        Args:
+            name (str): Metric name, e.g. "slot_spins_total".
+            help_text (str): Description exported with the metric.
+            labels (Optional[Dict[str, str]]): Labels of this series.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._metric("counter", name, help_text, labels, Counter)
+
+
+    def histogram(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None) -> Histogram:
+        """
+        Get or create a latency histogram.
+
+        Args:
+            name (str): Metric name, e.g. "slot_spin_seconds".
+            help_text (str): Description exported with the metric.
+            labels (Optional[Dict[str, str]]): Labels of this series.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._metric("histogram", name, help_text, labels, Histogram)
+
+
+    def timed(self, name: str, help_text: str) -> Callable[[F], F]:
+        """
+        Decorator recording the duration of every call into a histogram.
+
+        Args:
+            name (str): Histogram name.
+            help_text (str): Description exported with the histogram.
+
+        Returns:
+            Callable[[F], F]: The decorator. It returns the function unchanged while metrics
+            are disabled, so disabled instrumentation costs nothing per call.
+        """
+        def decorate(func: F) -> F:
+            if not self.enabled:
+                return func
+
+            histogram = self.histogram(name, help_text)
+            clock = time.perf_counter_ns
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.record(clock() - start)
+
+            return wrapper # type: ignore[return-value]
+
+        return decorate
+
+
+    def render(self) -> str:
+        """
+        Export every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition text, empty while metrics are disabled.
+        """
+        if not self.enabled:
+            return ""
+
+        with self._lock:
+            families = sorted((name, kind, help_text, dict(series)) for name, (kind, help_text, series) in self._families.items())
+
+        lines: List[str] = []
+        for name, kind, help_text, series in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for labels, metric in sorted(series.items()):
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                    continue
+
+                for bound, count in zip(EXPORT_BOUNDS, metric.cumulative(EXPORT_BOUNDS)):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {metric.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {metric.total / 1e9!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    """
+    Format labels as {name="value",...}, or nothing when there are none.
+    """
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Process-wide metrics, switched on by setting SLOT_METRICS before the services are imported
+METRICS = Metrics(enabled=os.environ.get("SLOT_METRICS", "0") not in ("", "0"))
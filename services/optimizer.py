@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from heapq import nsmallest
+from itertools import combinations_with_replacement, product
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.logic import SlotMachine
+
+CHUNK_COUNTS = 512 # Symbol count vectors per work unit of the process pool
+TOP_CANDIDATES = 10 # Candidates returned by `optimize_paytable()` by default
+
+
+class Targets(NamedTuple):
+    """
+    What a paytable should achieve, per line and for a bet of 1.
+    """
+    rtp: float                              # Target return to player
+    rtp_tolerance: float = 0.01             # Accepted distance from the target RTP
+    hit_frequency: Optional[float] = None   # Target chance that a line wins, any when None
+    hit_tolerance: float = 0.02             # Accepted distance from the target hit frequency
+    min_variance: Optional[float] = None    # Smallest accepted variance of a line's payout
+    monotonic: bool = True                  # Rarer symbols must pay at least as much as commoner ones
+
+
+@lru_cache(maxsize=65_536)
+def line_win_odds(counts: Tuple[int, ...], cols: int) -> np.ndarray:
+    """
+    Chance that one line shows the same symbol in every column, per symbol.
+
+    A line has one cell per column and the columns are independent, so with each cell
+    showing the symbol with probability count / pool size, the chance of a full line is
+    that to the power `cols`. The events are disjoint (a line shows one symbol), so the
+    odds add up to the line's hit frequency. Only depends on the counts, so it is cached
+    and shared by every set of payout values tried with them.
+
+    Args:
+        counts (Tuple[int, ...]): Frequency of each symbol in the pool.
+        cols (int): Number of columns.
+
+    Returns:
+        np.ndarray: Probability of a winning line per symbol. Not to be modified.
+    """
+    odds = (np.array(counts, dtype=np.float64) / sum(counts)) ** cols
+    odds.setflags(write=False)
+    return odds
+
+
+def _search_chunk(count_vectors: List[Tuple[int, ...]], cols: int, values: np.ndarray, targets: Targets,
+                  top: int) -> Tuple[int, List[Tuple[float, Tuple[int, ...], Tuple[int, ...], float, float, float]]]:
+    """
+    Score every payout vector against a chunk of count vectors and keep the best.
+
+    Count vectors whose hit frequency is off target, or that cannot reach the target RTP
+    with even the smallest or largest allowed values, are dropped before any payout vector
+    is scored. The rest score all payout vectors at once: RTP and the second moment of a
+    line's payout are dot products with the line win odds.
+
+    With `targets.monotonic` the columns of `values` are ranks instead of symbols: column
+    0 is paid by the rarest symbol of each count vector, column 1 by the next, and so on.
+
+    Returns:
+        Tuple[int, List[...]]: Number of configurations scored, and the best `top` of them
+        as (score, counts, values, rtp, hit frequency, variance), lowest score first.
+    """
+    lowest = values.min(axis=0)
+    highest = values.max(axis=0)
+    evaluated = 0
+    best: List[Tuple[float, Tuple[int, ...], Tuple[int, ...], float, float, float]] = []
+
+    for counts in count_vectors:
+        odds = line_win_odds(counts, cols)
+        hits = float(odds.sum())
+        hit_miss = 0.0
+        if targets.hit_frequency is not None:
+            hit_miss = abs(hits - targets.hit_frequency) / targets.hit_tolerance
+            if hit_miss > 1:
+                continue
+
+        columns = slice(None)
+        if targets.monotonic: # Give the rank columns to the symbols, rarest first
+            columns = np.argsort(np.argsort(counts, kind="stable"), kind="stable")
+
+        # RTP is linear in the values, so these bound every payout vector of these counts
+        if odds @ lowest[columns] > targets.rtp + targets.rtp_tolerance:
+            continue
+        if odds @ highest[columns] < targets.rtp - targets.rtp_tolerance:
+            continue
+
+        candidates = values[:, columns]
+
+        evaluated += len(candidates)
+        rtps = candidates @ odds
+        spreads = (candidates * candidates) @ odds - rtps * rtps
+
+        keep = np.abs(rtps - targets.rtp) <= targets.rtp_tolerance
+        if targets.min_variance is not None:
+            keep &= spreads >= targets.min_variance
+
+        scores = np.abs(rtps - targets.rtp) / targets.rtp_tolerance + hit_miss
+        for index in np.flatnonzero(keep)[np.argsort(scores[keep], kind="stable")][:top].tolist():
+            best.append((
+                float(scores[index]), counts, tuple(candidates[index].tolist()),
+                float(rtps[index]), hits, float(spreads[index]),
+            ))
+        best = nsmallest(top, best)
+
+    return evaluated, best
+
+
+def optimize_paytable(machine: SlotMachine, targets: Targets, counts: Sequence[int], values: Sequence[int],
+                      max_payout: Optional[int] = None, pool_size: Optional[int] = None, top: int = TOP_CANDIDATES,
+                      workers: Optional[int] = None) -> Dict[str, object]:
+    """
+    Search symbol counts and payout multipliers for a paytable that meets the targets.
+
+    Every symbol of `machine` takes each of `counts` and each of `values`, and every
+    configuration is scored exactly and analytically with `line_win_odds()` instead of
+    being simulated. The count vectors are split into chunks that are searched across a
+    process pool; every chunk prunes the count vectors that cannot meet the targets.
+    Monotonic searches only generate payouts that fall with a symbol's frequency, which
+    shrinks the payout vectors from len(values) ** symbols to the combinations with
+    repetition; symbols with equal counts are then ordered by position.
+
+    Results are per line, for full-line payouts on a line machine: they hold for any
+    payline shape, and the RTP for any number of lines.
+
+    Args:
+        machine (SlotMachine): Line machine whose grid and symbols are tuned.
+        targets (Targets): RTP, hit frequency and volatility to aim for.
+        counts (Sequence[int]): Allowed frequencies of a symbol in the pool.
+        values (Sequence[int]): Allowed payout multipliers of a symbol.
+        max_payout (Optional[int]): Largest allowed multiplier of a winning line.
+        pool_size (Optional[int]): Required total number of symbols in the pool.
+        top (int): Number of candidates returned.
+        workers (Optional[int]): Number of worker processes, defaults to the CPU count.
+            With 1 worker the search runs in this process.
+
+    Returns:
+        Dict[str, object]: Number of configurations "evaluated", and the best "candidates",
+        closest to the targets first, each with its "symbol_count", "symbol_values",
+        "rtp", "hit_frequency" and "variance".
+
+    Raises:
+        ValueError: If the machine does not pay along lines, or no value is allowed.
+    """
+    if machine.win_mode != "lines":
+        raise ValueError(f"Paytables can only be optimized for line machines, not {machine.win_mode!r}.")
+
+    symbols = machine.symbol_names
+    allowed = sorted({value for value in values if max_payout is None or value <= max_payout})
+    if not allowed:
+        raise ValueError("No payout value is allowed by max_payout.")
+    if targets.monotonic: # Non-increasing payouts by rarity, see `_search_chunk()`
+        value_grid = np.array(list(combinations_with_replacement(allowed[::-1], len(symbols))), dtype=np.int64)
+    else:
+        value_grid = np.array(list(product(allowed, repeat=len(symbols))), dtype=np.int64)
+
+    count_vectors = [
+        vector for vector in product(sorted(set(counts)), repeat=len(symbols))
+        if sum(vector) >= machine.rows and (pool_size is None or sum(vector) == pool_size)
+    ]
+    chunks = [count_vectors[start:start + CHUNK_COUNTS] for start in range(0, len(count_vectors), CHUNK_COUNTS)]
+
+    evaluated = 0
+    best: List[Tuple[float, Tuple[int, ...], Tuple[int, ...], float, float, float]] = []
+    if workers == 1:
+        results = [_search_chunk(chunk, machine.cols, value_grid, targets, top) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_search_chunk, chunk, machine.cols, value_grid, targets, top) for chunk in chunks]
+            results = [future.result() for future in as_completed(futures)]
+
+    for chunk_evaluated, chunk_best in results:
+        evaluated += chunk_evaluated
+        best.extend(chunk_best)
+
+    return {
+        "evaluated": evaluated,
+        "candidates": [
+            {
+                "symbol_count": dict(zip(symbols, chosen_counts)),
+                "symbol_values": dict(zip(symbols, chosen_values)),
+                "rtp": rtp,
+                "hit_frequency": hits,
+                "variance": spread,
+            }
+            for _, chosen_counts, chosen_values, rtp, hits, spread in nsmallest(top, best)
+        ],
+    }
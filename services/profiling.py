@@ -0,0 +1,262 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from services.game import settle_round
+from services.logic import SlotMachine
+
+if TYPE_CHECKING:
+    from services.simulation import SimulationTotals
+
+T = TypeVar("T")
+
+PROFILERS = ("cprofile", "sampling")
+SAMPLE_INTERVAL = 0.001 # Seconds between stack samples of the sampling profiler
+TRACE_ROUNDS = 10_000 # Rounds run under tracemalloc, which slows every allocation down
+TRACE_CHUNKS = 2 # Simulation chunks run under tracemalloc, see `profile_simulation()`
+TRACE_FRAMES = 10 # Stack frames tracemalloc keeps per allocation
+REPORT_LINES = 30 # Entries in the text reports
+
+
+class StackSampler:
+    """
+    A sampling profiler: a background thread records the call stack of one thread at a
+    fixed interval.
+
+    Unlike cProfile it adds no cost to the calls themselves, so the profiled code runs at
+    close to full speed. Stacks are written in the collapsed format ("outer;inner count"
+    per line) read by flamegraph.pl, speedscope and similar tools. Every frame is labelled
+    with its function, file and current line, so samples point at specific lines.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = SAMPLE_INTERVAL) -> None:
+        """
+        Args:
+            thread_id (Optional[int]): Thread to sample, defaults to the calling thread.
+            interval (float): Seconds between samples.
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+    def _run(self) -> None:
+        """
+        Take samples until stopped.
+        """
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+    def write_collapsed(self, path: Path) -> None:
+        """
+        Write the samples in the collapsed-stacks format.
+
+        Args:
+            path (Path): File to write.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def profile_call(func: Callable[[], T], output_dir: Path, profiler: str = "cprofile",
+                 interval: float = SAMPLE_INTERVAL) -> Dict[str, Path]:
+    """
+    Run a function under a profiler and write the results.
+
+    With "cprofile" every call is counted and timed: the stats are written as
+    `profile.pstats` (for `python -m pstats` or snakeviz) and the top functions by
+    cumulative time as `profile.txt`. With "sampling" the stack is sampled instead
+    and written as `profile.collapsed`, see `StackSampler`.
+
+    Args:
+        func (Callable[[], T]): The code to profile.
+        output_dir (Path): Directory for the output files, created if needed.
+        profiler (str): "cprofile" or "sampling".
+        interval (float): Seconds between samples of the sampling profiler.
+
+    Returns:
+        Dict[str, Path]: The written files by kind.
+
+    Raises:
+        ValueError: If the profiler is unknown.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Profiler must be one of {PROFILERS}, got {profiler!r}.")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if profiler == "sampling":
+        with StackSampler(interval=interval) as sampler:
+            func()
+        sampler.write_collapsed(output_dir / "profile.collapsed")
+        return {"collapsed": output_dir / "profile.collapsed"}
+
+    profile = cProfile.Profile()
+    profile.runcall(func)
+    profile.dump_stats(output_dir / "profile.pstats")
+
+    report = io.StringIO()
+    pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(REPORT_LINES)
+    (output_dir / "profile.txt").write_text(report.getvalue(), encoding="utf-8")
+    return {"pstats": output_dir / "profile.pstats", "report": output_dir / "profile.txt"}
+
+
+def trace_allocations(func: Callable[[], T], output_dir: Path) -> Dict[str, Path]:
+    """
+    Run a function under tracemalloc and write what it left allocated, by source line.
+
+    The snapshot taken when the function returns is written as `allocations.snapshot`
+    (load it with `tracemalloc.Snapshot.load()`), and a report of the peak traced memory
+    and the lines holding the most memory as `allocations.txt`. Anything the function
+    frees before returning is only visible in the peak, so keep results alive to see them.
+
+    Args:
+        func (Callable[[], T]): The code to trace.
+        output_dir (Path): Directory for the output files, created if needed.
+
+    Returns:
+        Dict[str, Path]: The written files by kind.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tracemalloc.start(TRACE_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    # Leave out tracemalloc's own bookkeeping
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after = after.filter_traces(ignore)
+    after.dump(str(output_dir / "allocations.snapshot"))
+
+    lines = [f"Peak traced memory: {peak / 1024:.1f} KiB", "", "Largest allocations by line, change since the start:"]
+    for stat in after.compare_to(before.filter_traces(ignore), "lineno")[:REPORT_LINES]:
+        lines.append(str(stat))
+    (output_dir / "allocations.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    return {"snapshot": output_dir / "allocations.snapshot", "allocations": output_dir / "allocations.txt"}
+
+
+def profile_rounds(machine: SlotMachine, rounds: int, lines: int, bet: int, output_dir: Path,
+                   profiler: str = "cprofile", trace_rounds: int = TRACE_ROUNDS) -> Dict[str, Path]:
+    """
+    Profile headless rounds: settle `rounds` rounds under the profiler, then trace the
+    allocations of the spin loop over `trace_rounds` rounds.
+
+    Every round is settled with a balance of exactly the total bet, so the game never
+    runs out of money. The traced spins are kept alive until the snapshot is taken, so
+    every list a spin allocates shows up under the line that allocated it.
+
+    Args:
+        machine (SlotMachine): The machine to play.
+        rounds (int): Rounds to profile.
+        lines (int): Number of lines bet on.
+        bet (int): Bet amount per line.
+        output_dir (Path): Directory for the output files, created if needed.
+        profiler (str): "cprofile" or "sampling", see `profile_call()`.
+        trace_rounds (int): Rounds run under tracemalloc, 0 to skip it.
+
+    Returns:
+        Dict[str, Path]: The written files by kind.
+    """
+    total_bet = lines * bet
+
+    def play() -> None:
+        for _ in range(rounds):
+            settle_round(machine, total_bet, lines, bet)
+
+    def spin_loop() -> List[object]:
+        results = []
+        for _ in range(trace_rounds):
+            columns = machine.spin()
+            results.append((columns, machine.check_winnings(columns, lines, bet)))
+        return results
+
+    files = profile_call(play, output_dir, profiler)
+    if trace_rounds:
+        files.update(trace_allocations(spin_loop, output_dir))
+    return files
+
+
+def profile_simulation(machine: SlotMachine, spins: int, lines: int, bet: int, output_dir: Path,
+                       profiler: str = "cprofile", seed: Optional[int] = None, session_spins: int = 100,
+                       trace_chunks: int = TRACE_CHUNKS,
+                       progress: Optional[Callable[["SimulationTotals"], None]] = None,
+                       ) -> Tuple[Optional["SimulationTotals"], Dict[str, Path]]:
+    """
+    Profile a simulation: run all `spins` in this process under the profiler (worker
+    processes would not be profiled), then trace the allocations of its first
+    `trace_chunks` chunks only.
+
+    Args:
+        machine (SlotMachine): The machine to spin.
+        spins (int): Total number of spins.
+        lines (int): Number of lines bet on every spin.
+        bet (int): Bet amount per line.
+        output_dir (Path): Directory for the output files, created if needed.
+        profiler (str): "cprofile" or "sampling", see `profile_call()`.
+        seed (Optional[int]): Seed for reproducible runs.
+        session_spins (int): Spins per simulated player session.
+        trace_chunks (int): Chunks run under tracemalloc, 0 to skip it.
+        progress (Optional[Callable[[SimulationTotals], None]]): Called with the running
+            totals after every chunk of the profiled run.
+
+    Returns:
+        Tuple[Optional[SimulationTotals], Dict[str, Path]]: The totals of the profiled run
+        (None for 0 spins), and the written files by kind.
+    """
+    from services.simulation import iter_simulation
+
+    totals = None
+
+    def run() -> None:
+        nonlocal totals
+        for totals in iter_simulation(machine, spins, lines, bet, seed, 1, session_spins):
+            if progress is not None:
+                progress(totals)
+
+    def traced_chunks() -> List["SimulationTotals"]:
+        # The running totals are returned, so what they hold on to is still live in the snapshot
+        return list(islice(iter_simulation(machine, spins, lines, bet, seed, 1, session_spins), trace_chunks))
+
+    files = profile_call(run, output_dir, profiler)
+    if trace_chunks:
+        files.update(trace_allocations(traced_chunks, output_dir))
+    return totals, files
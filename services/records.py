@@ -0,0 +1,263 @@
+import json
+import struct
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+
+from services.logic import SlotMachine
+
+MAGIC = b"SLOTREC1"
+VERSION = 1
+REPLAY_CHUNK = 1_000_000 # Records unpacked and re-scored at a time by `replay()`
+
+
+def bits_per_symbol(symbols: int) -> int:
+    """
+    Bits needed to store one symbol code of an alphabet.
+
+    Args:
+        symbols (int): Number of distinct symbols.
+
+    Returns:
+        int: Bits per code, at least 1.
+    """
+    return max((symbols - 1).bit_length(), 1)
+
+
+def record_dtype(rows: int, cols: int, symbols: int) -> np.dtype:
+    """
+    The fixed-width record layout for a grid size and alphabet.
+
+    Args:
+        rows (int): Rows in the grid.
+        cols (int): Columns in the grid.
+        symbols (int): Number of distinct symbols.
+
+    Returns:
+        np.dtype: Packed grid bytes, lines, bet per line and winnings, little-endian.
+    """
+    grid_bytes = (rows * cols * bits_per_symbol(symbols) + 7) // 8
+    return np.dtype([("grid", np.uint8, (grid_bytes,)), ("lines", "<u2"), ("bet", "<u4"), ("winnings", "<u8")])
+
+
+def pack_grids(grids: np.ndarray, symbols: int) -> np.ndarray:
+    """
+    Bit-pack integer-coded grids.
+
+    Args:
+        grids (np.ndarray): Array of shape (n, cols, rows) with codes below `symbols`.
+        symbols (int): Number of distinct symbols.
+
+    Returns:
+        np.ndarray: Array of shape (n, grid bytes) of packed codes.
+    """
+    bits = bits_per_symbol(symbols)
+    codes = np.asarray(grids).astype(np.uint16).reshape(len(grids), -1)
+    code_bits = ((codes[..., None] >> np.arange(bits, dtype=np.uint16)) & 1).astype(np.uint8)
+    return np.packbits(code_bits.reshape(len(grids), -1), axis=1, bitorder="little")
+
+
+def unpack_grids(packed: np.ndarray, rows: int, cols: int, symbols: int) -> np.ndarray:
+    """
+    Reverse `pack_grids()`.
+
+    Args:
+        packed (np.ndarray): Array of shape (n, grid bytes), for example the "grid" field
+            of memory-mapped records.
+        rows (int): Rows in the grid.
+        cols (int): Columns in the grid.
+        symbols (int): Number of distinct symbols.
+
+    Returns:
+        np.ndarray: Array of shape (n, cols, rows) of symbol codes.
+    """
+    bits = bits_per_symbol(symbols)
+    code_bits = np.unpackbits(packed, axis=1, count=rows * cols * bits, bitorder="little")
+    weights = (1 << np.arange(bits)).astype(np.uint16)
+    codes = (code_bits.reshape(len(packed), rows * cols, bits) * weights).sum(axis=2, dtype=np.uint16)
+    return codes.reshape(len(packed), cols, rows).astype(np.uint8 if bits <= 8 else np.uint16)
+
+
+class RecordWriter:
+    """
+    Writes spins of one machine to a new record file.
+
+    A record file starts with a small header (magic bytes, header length, JSON metadata
+    with the grid size and symbol alphabet) followed by fixed-width records. Every grid is
+    stored as bit-packed symbol codes: with the default 4-symbol alphabet a 3x3 grid takes
+    3 bytes. `open_records()` memory-maps the records as a NumPy structured array, so
+    history can be scanned without parsing text or creating Python objects per spin.
+    """
+
+    def __init__(self, path: str, machine: SlotMachine) -> None:
+        """
+        Create the file and write its header.
+
+        Args:
+            path (str): Record file path, overwritten if it exists.
+            machine (SlotMachine): Machine whose grid size and symbols the records use.
+        """
+        self.rows = machine.rows
+        self.cols = machine.cols
+        self.symbol_names = machine.symbol_names
+        self.dtype = record_dtype(self.rows, self.cols, len(self.symbol_names))
+
+        meta = json.dumps({
+            "version": VERSION,
+            "rows": self.rows,
+            "cols": self.cols,
+            "symbols": list(self.symbol_names),
+        }).encode()
+        header_size = len(MAGIC) + 4 + len(meta)
+        meta += b" " * (-header_size % 8) # Start the records on an 8-byte boundary
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", len(meta)) + meta)
+
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+    def write(self, grids: np.ndarray, lines, bet, winnings) -> None:
+        """
+        Append a batch of spins.
+
+        Args:
+            grids (np.ndarray): Array of shape (n, cols, rows) from `SlotMachine.spin_many()`.
+            lines (int | np.ndarray): Lines bet on, for all spins or per spin.
+            bet (int | np.ndarray): Bet per line, for all spins or per spin.
+            winnings (np.ndarray): Winnings per spin.
+        """
+        records = np.empty(len(grids), dtype=self.dtype)
+        records["grid"] = pack_grids(grids, len(self.symbol_names))
+        records["lines"] = lines
+        records["bet"] = bet
+        records["winnings"] = winnings
+        self._file.write(records.tobytes())
+
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self._file.close()
+
+
+def open_records(path: str) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Memory-map a record file.
+
+    Args:
+        path (str): Record file path.
+
+    Returns:
+        Tuple[Dict[str, Any], np.ndarray]: The header metadata, and the records as a
+        read-only structured array backed by the file.
+
+    Raises:
+        ValueError: If the file is not a record file.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a spin record file.")
+        (meta_size,) = struct.unpack("<I", file.read(4))
+        meta = json.loads(file.read(meta_size))
+        file.seek(0, 2)
+        file_size = file.tell()
+
+    offset = len(MAGIC) + 4 + meta_size
+    dtype = record_dtype(meta["rows"], meta["cols"], len(meta["symbols"]))
+    count = (file_size - offset) // dtype.itemsize # Ignores a torn record at the end
+
+    if count == 0:
+        return meta, np.empty(0, dtype=dtype)
+    return meta, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def iter_grids(path: str, chunk: int = REPLAY_CHUNK) -> Iterator[Tuple[Dict[str, Any], np.ndarray, np.ndarray]]:
+    """
+    Scan a record file in chunks.
+
+    Args:
+        path (str): Record file path.
+        chunk (int): Records per chunk.
+
+    Yields:
+        Tuple[Dict[str, Any], np.ndarray, np.ndarray]: The header metadata, the chunk's
+        records (a view into the memory map), and its unpacked (n, cols, rows) grids.
+    """
+    meta, records = open_records(path)
+    for start in range(0, len(records), chunk):
+        part = records[start:start + chunk]
+        yield meta, part, unpack_grids(part["grid"], meta["rows"], meta["cols"], len(meta["symbols"]))
+
+
+def iter_machine_grids(path: str, machine: SlotMachine,
+                       chunk: int = REPLAY_CHUNK) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Scan a record file in chunks, with grids translated into a machine's symbol codes.
+
+    Args:
+        path (str): Record file path.
+        machine (SlotMachine): Machine to evaluate the grids with. It must know every
+            symbol in the file, in any order.
+        chunk (int): Records per chunk.
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: The chunk's records and its (n, cols, rows) grids
+        coded for `machine`.
+
+    Raises:
+        ValueError: If the file uses a symbol or grid size the machine does not have.
+    """
+    for meta, records, grids in iter_grids(path, chunk):
+        if (meta["rows"], meta["cols"]) != (machine.rows, machine.cols):
+            raise ValueError(f"Records are {meta['rows']}x{meta['cols']}, machine is {machine.rows}x{machine.cols}.")
+        missing = set(meta["symbols"]) - set(machine.symbol_names)
+        if missing:
+            raise ValueError(f"Machine has no symbols {sorted(missing)}.")
+
+        # Translate the file's symbol codes into the machine's codes
+        remap = np.array([machine.symbol_names.index(symbol) for symbol in meta["symbols"]], dtype=machine.code_dtype)
+        yield records, remap[grids]
+
+
+def replay(path: str, machine: SlotMachine, chunk: int = REPLAY_CHUNK) -> Dict[str, float]:
+    """
+    Re-score recorded spins with a machine's current paytable.
+
+    Args:
+        path (str): Record file path.
+        machine (SlotMachine): Machine with the paytable to apply. It must know every
+            symbol in the file, in any order.
+        chunk (int): Records processed at a time.
+
+    Returns:
+        Dict[str, float]: Spins, amount wagered, recorded and replayed winnings, and both RTPs.
+
+    Raises:
+        ValueError: If the file uses a symbol or grid size the machine does not have.
+    """
+    spins = wagered = recorded = replayed = 0
+
+    for records, grids in iter_machine_grids(path, machine, chunk):
+        winnings, _ = machine.check_winnings_many(grids, records["lines"], records["bet"])
+
+        spins += len(records)
+        wagered += int((records["lines"].astype(np.int64) * records["bet"]).sum())
+        recorded += int(records["winnings"].sum(dtype=np.uint64))
+        replayed += int(winnings.sum())
+
+    return {
+        "spins": spins,
+        "wagered": wagered,
+        "recorded_winnings": recorded,
+        "replayed_winnings": replayed,
+        "recorded_rtp": recorded / wagered if wagered else 0.0,
+        "replayed_rtp": replayed / wagered if wagered else 0.0,
+    }
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+import sys
+from typing import TYPE_CHECKING, List, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy as np # Imported on first use, most games never need it
+
+BLOCK_SIZE = 4096 # Random numbers drawn per refill of a BufferedRandom
+
+
+class BufferedRandom:
+    """
+    A random source that draws uniform floats from a NumPy generator in blocks.
+
+    Calling a NumPy generator once per number is slow, so numbers are drawn `block_size`
+    at a time and handed out one by one. Not safe to share between threads: give every
+    session its own instance.
+    """
+
+    def __init__(self, generator: Optional[np.random.Generator] = None, block_size: int = BLOCK_SIZE) -> None:
+        """
+        Args:
+            generator (Optional[np.random.Generator]): Generator to draw blocks from, for
+                example `np.random.Generator(np.random.Philox(seed))`. Defaults to a fresh
+                PCG64 generator.
+            block_size (int): Numbers drawn per refill.
+        """
+        if generator is None:
+            import numpy as np
+
+            generator = np.random.default_rng()
+        self.generator = generator
+        self.block_size = block_size
+        self._block: List[float] = []
+        self._index = 0
+
+
+    def random(self) -> float:
+        """
+        Returns:
+            float: A uniform float in [0, 1).
+        """
+        if self._index == len(self._block):
+            self._block = self.generator.random(self.block_size).tolist()
+            self._index = 0
+
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+
+    def randrange(self, start: int, stop: int) -> int:
+        """
+        Pick a random integer with start <= n < stop.
+
+        The integer is scaled from a 53-bit float, so the bias is below 2 ** -53 per value
+        for any range a slot machine uses.
+
+        Args:
+            start (int): Lowest possible value.
+            stop (int): One more than the highest possible value.
+
+        Returns:
+            int: The random integer.
+        """
+        return start + int(self.random() * (stop - start))
+
+
+RandomSource = Union[random.Random, BufferedRandom]
+
+
+def make_rng(rng: Union[None, int, random.Random, np.random.Generator, BufferedRandom] = None) -> RandomSource:
+    """
+    Turn any supported random source into one that `SlotMachine` can draw from.
+
+    Args:
+        rng: None for a fresh independent stream, an int seed, a `random.Random`, a
+            `np.random.Generator` (wrapped in a BufferedRandom), or a BufferedRandom.
+
+    Returns:
+        RandomSource: An object with `random()` and `randrange(start, stop)`.
+
+    Raises:
+        TypeError: If the random source is of an unsupported type.
+    """
+    if rng is None:
+        return random.Random()
+    if isinstance(rng, int):
+        return random.Random(rng)
+    if isinstance(rng, (random.Random, BufferedRandom)):
+        return rng
+    # A NumPy generator can only exist once NumPy is imported, so never import it just to check
+    numpy = sys.modules.get("numpy")
+    if numpy is not None and isinstance(rng, numpy.random.Generator):
+        return BufferedRandom(rng)
+
+    raise TypeError(f"Unsupported random source: {type(rng).__name__}")
+
+
+def numpy_generator(rng: RandomSource) -> np.random.Generator:
+    """
+    Get a NumPy generator tied to a random source, for the batch APIs.
+
+    A BufferedRandom shares its generator. A `random.Random` seeds a new generator from
+    its own stream, so a seeded Random still gives reproducible batches.
+
+    Args:
+        rng (RandomSource): Random source returned by `make_rng()`.
+
+    Returns:
+        np.random.Generator: The generator.
+    """
+    if isinstance(rng, BufferedRandom):
+        return rng.generator
+
+    import numpy as np
+
+    return np.random.default_rng(rng.getrandbits(128))
@@ -0,0 +1,200 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.logic import SlotMachine
+
+CHUNK_SPINS = 100_000 # Spins per work unit, every chunk gets its own random stream
+PERCENTILES = (5, 25, 50, 75, 95) # Percentiles reported for the balance trajectories
+TRAJECTORY_SAMPLE = 10_000 # Sessions kept for the balance percentiles, however many are simulated
+
+
+class SimulationTotals:
+    """
+    Aggregates of a batch of simulated spins that can be merged with other batches.
+
+    The state stays bounded however many spins are merged: balance trajectories are only
+    kept for a uniform sample of `TRAJECTORY_SAMPLE` sessions. Every session draws a random
+    key and the sample holds the sessions with the smallest keys, so merging is order
+    independent and the sample is the same whichever order the chunks finish in.
+    """
+
+    def __init__(self, lines: int, session_spins: int) -> None:
+        """
+        Start with empty totals.
+
+        Args:
+            lines (int): Number of lines bet on every spin.
+            session_spins (int): Spins per simulated player session.
+        """
+        self.spins = 0
+        self.wagered = 0
+        self.won = 0
+        self.hits = 0 # Spins that won on at least one line
+        self.line_hits = [0] * lines # Wins per line
+        self.sessions = 0 # Whole sessions simulated
+        self.trajectories = np.empty((0, session_spins), dtype=np.int64) # Net balance after each spin, per sampled session
+        self.keys = np.empty(0, dtype=np.float64) # Sampling key of each sampled session
+
+
+    def merge(self, other: "SimulationTotals") -> None:
+        """
+        Add another batch's totals to this one.
+
+        Args:
+            other (SimulationTotals): The totals to add.
+        """
+        self.spins += other.spins
+        self.wagered += other.wagered
+        self.won += other.won
+        self.hits += other.hits
+        self.line_hits = [mine + theirs for mine, theirs in zip(self.line_hits, other.line_hits)]
+        self.sessions += other.sessions
+
+        self.keys, self.trajectories = _sample_sessions(
+            np.concatenate([self.keys, other.keys]), np.concatenate([self.trajectories, other.trajectories])
+        )
+
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Summarise the totals.
+
+        Returns:
+            Dict[str, object]: Totals, RTP, hit rates, and percentiles of the net balance
+            after each spin of a session (one list per percentile, estimated from the
+            sampled sessions once there are more than `TRAJECTORY_SAMPLE`).
+        """
+        if len(self.trajectories):
+            percentiles = np.percentile(self.trajectories, PERCENTILES, axis=0)
+            balance_percentiles = {str(p): row.tolist() for p, row in zip(PERCENTILES, percentiles)}
+        else:
+            balance_percentiles = {}
+
+        return {
+            "spins": self.spins,
+            "wagered": self.wagered,
+            "won": self.won,
+            "rtp": self.won / self.wagered if self.wagered else 0.0,
+            "hit_frequency": self.hits / self.spins if self.spins else 0.0,
+            "line_hit_rates": [hits / self.spins if self.spins else 0.0 for hits in self.line_hits],
+            "sessions": self.sessions,
+            "balance_percentiles": balance_percentiles,
+        }
+
+
+def _sample_sessions(keys: np.ndarray, trajectories: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the `TRAJECTORY_SAMPLE` sessions with the smallest sampling keys.
+
+    Args:
+        keys (np.ndarray): Sampling key of every session.
+        trajectories (np.ndarray): Net balance after each spin, one row per session.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The kept keys and trajectories.
+    """
+    if len(keys) <= TRAJECTORY_SAMPLE:
+        return keys, trajectories
+    kept = np.argpartition(keys, TRAJECTORY_SAMPLE - 1)[:TRAJECTORY_SAMPLE]
+    return keys[kept], trajectories[kept]
+
+
+def _run_chunk(machine: SlotMachine, spins: int, lines: int, bet: int, session_spins: int,
+               seed: np.random.SeedSequence) -> SimulationTotals:
+    """
+    Simulate one chunk of spins with its own random stream.
+
+    Args:
+        machine (SlotMachine): The machine to spin.
+        spins (int): Number of spins in this chunk.
+        lines (int): Number of lines bet on.
+        bet (int): Bet amount per line.
+        session_spins (int): Spins per simulated player session.
+        seed (np.random.SeedSequence): Seed of this chunk's random stream.
+
+    Returns:
+        SimulationTotals: The chunk's aggregates.
+    """
+    rng = np.random.default_rng(seed)
+    grids = machine.spin_many(spins, rng)
+    winnings, masks = machine.check_winnings_many(grids, lines, bet)
+
+    totals = SimulationTotals(lines, session_spins)
+    totals.spins = spins
+    totals.wagered = spins * lines * bet
+    totals.won = int(winnings.sum())
+    totals.hits = int(np.count_nonzero(masks))
+    totals.line_hits = [int(np.count_nonzero(masks & np.uint64(1 << line))) for line in range(lines)]
+
+    # Only whole sessions make it into the trajectories, sampled by their random keys
+    sessions = spins // session_spins
+    net = winnings[:sessions * session_spins].reshape(sessions, session_spins) - lines * bet
+    totals.sessions = sessions
+    totals.keys, totals.trajectories = _sample_sessions(rng.random(sessions), np.cumsum(net, axis=1))
+
+    return totals
+
+
+def iter_simulation(machine: SlotMachine, spins: int, lines: int, bet: int, seed: Optional[int] = None,
+                    workers: Optional[int] = None, session_spins: int = 100) -> Iterator[SimulationTotals]:
+    """
+    Simulate spins across a process pool, yielding the merged totals after every chunk.
+
+    The spins are cut into fixed-size chunks and every chunk gets a random stream spawned
+    from `seed`, so the results only depend on the seed and never on the number of workers
+    or on the order in which chunks finish.
+
+    Args:
+        machine (SlotMachine): The machine to spin.
+        spins (int): Total number of spins.
+        lines (int): Number of lines bet on every spin.
+        bet (int): Bet amount per line.
+        seed (Optional[int]): Seed for reproducible runs. Random when omitted.
+        workers (Optional[int]): Number of worker processes, defaults to the CPU count.
+            With 1 worker the chunks run in this process.
+        session_spins (int): Spins per simulated player session for the balance trajectories.
+
+    Yields:
+        SimulationTotals: Running totals, updated as chunks complete.
+    """
+    if not 1 <= lines <= machine.line_count:
+        raise ValueError(f"Lines must be between 1 and {machine.line_count}, got {lines}.")
+
+    chunk_spins = max(CHUNK_SPINS // session_spins, 1) * session_spins # Sessions never cross chunks
+    sizes: List[int] = [min(chunk_spins, spins - start) for start in range(0, spins, chunk_spins)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    totals = SimulationTotals(lines, session_spins)
+
+    if workers == 1:
+        for size, chunk_seed in zip(sizes, seeds):
+            totals.merge(_run_chunk(machine, size, lines, bet, session_spins, chunk_seed))
+            yield totals
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_chunk, machine, size, lines, bet, session_spins, chunk_seed)
+            for size, chunk_seed in zip(sizes, seeds)
+        ]
+        for future in as_completed(futures):
+            totals.merge(future.result())
+            yield totals
+
+
+def simulate(machine: SlotMachine, spins: int, lines: int, bet: int, seed: Optional[int] = None,
+             workers: Optional[int] = None, session_spins: int = 100) -> Dict[str, object]:
+    """
+    Simulate spins across a process pool and summarise the results.
+
+    Takes the same arguments as `iter_simulation()`.
+
+    Returns:
+        Dict[str, object]: The summary of all spins, see `SimulationTotals.summary()`.
+    """
+    totals = SimulationTotals(lines, session_spins)
+    for totals in iter_simulation(machine, spins, lines, bet, seed, workers, session_spins):
+        pass
+    return totals.summary()
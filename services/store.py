@@ -0,0 +1,202 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+SESSION_TTL = 30 * 60 # Seconds a session may stay idle before it is evicted
+STRIPES = 64 # Independently locked shards of the session table
+
+
+class InsufficientFunds(ValueError):
+    """
+    Raised when a debit is larger than the session's balance.
+    """
+
+
+class _Stripe:
+    """
+    One shard of the session table with its own lock.
+
+    Sessions are kept in least-recently-used order, so expired ones are always at the
+    front and eviction only looks at as many entries as it removes.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict() # id -> (balance, last used)
+
+
+    def evict(self, now: float, ttl: float) -> int:
+        """
+        Drop sessions idle for longer than the TTL. The caller must hold the lock.
+
+        Returns:
+            int: Number of sessions dropped.
+        """
+        evicted = 0
+        while self.sessions:
+            session_id, (_, last_used) = next(iter(self.sessions.items()))
+            if now - last_used <= ttl:
+                break
+            del self.sessions[session_id]
+            evicted += 1
+        return evicted
+
+
+class SessionStore:
+    """
+    Server-side store of player balances, keyed by a random session id.
+
+    The table is split into stripes, each guarded by its own lock and picked by the hash
+    of the session id, so a threaded server settles spins of different players in
+    parallel and two requests only wait for each other when their sessions share a
+    stripe. Every operation on one session is atomic, so concurrent spins of the same
+    player never lose an update.
+
+    Idle sessions are evicted from a stripe whenever it is used; new sessions land on
+    random stripes, so every stripe is swept regularly. `evict()` sweeps all of them.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, clock: Callable[[], float] = time.monotonic,
+                 stripes: int = STRIPES) -> None:
+        """
+        Args:
+            ttl (float): Seconds a session may stay idle before it is evicted.
+            clock (Callable[[], float]): Time source, replaceable in tests.
+            stripes (int): Number of independently locked shards.
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._stripes: List[_Stripe] = [_Stripe() for _ in range(stripes)]
+
+
+    def __len__(self) -> int:
+        self.evict()
+        total = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                total += len(stripe.sessions)
+        return total
+
+
+    def _stripe(self, session_id: str) -> _Stripe:
+        """
+        The stripe that owns a session id.
+        """
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+
+    def evict(self) -> int:
+        """
+        Drop idle sessions from every stripe, locking one stripe at a time.
+
+        Returns:
+            int: Number of sessions dropped.
+        """
+        evicted = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                evicted += stripe.evict(self.clock(), self.ttl)
+        return evicted
+
+
+    def create(self, balance: int) -> str:
+        """
+        Open a new session.
+
+        Args:
+            balance (int): Starting balance.
+
+        Returns:
+            str: The new session id.
+        """
+        session_id = secrets.token_urlsafe(16)
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            now = self.clock()
+            stripe.evict(now, self.ttl)
+            stripe.sessions[session_id] = (balance, now)
+        return session_id
+
+
+    def get(self, session_id: Optional[str]) -> Optional[int]:
+        """
+        Look up a balance and mark the session as used.
+
+        Args:
+            session_id (Optional[str]): The session id.
+
+        Returns:
+            Optional[int]: The balance, or None for unknown or expired sessions.
+        """
+        return self.transact(session_id, lambda balance: (balance, balance))
+
+
+    def transact(self, session_id: Optional[str], update: Callable[[int], Tuple[int, T]]) -> Optional[T]:
+        """
+        Atomically replace a balance with one computed from it.
+
+        Only the session's stripe is locked while `update` runs, so it should be quick and
+        must not use the store itself.
+
+        Args:
+            session_id (Optional[str]): The session id.
+            update (Callable[[int], Tuple[int, T]]): Called with the current balance, returns
+                the new balance and a value to hand back. Exceptions leave the balance unchanged.
+
+        Returns:
+            Optional[T]: The value returned by `update`, or None for unknown or expired sessions.
+        """
+        if session_id is None:
+            return None
+
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            now = self.clock()
+            stripe.evict(now, self.ttl)
+            if session_id not in stripe.sessions:
+                return None
+            balance, _ = stripe.sessions[session_id]
+            new_balance, value = update(balance)
+            stripe.sessions[session_id] = (new_balance, now)
+            stripe.sessions.move_to_end(session_id)
+            return value
+
+
+    def debit(self, session_id: Optional[str], amount: int) -> Optional[int]:
+        """
+        Atomically take a bet from a balance.
+
+        Args:
+            session_id (Optional[str]): The session id.
+            amount (int): Amount to take, not negative.
+
+        Returns:
+            Optional[int]: The new balance, or None for unknown or expired sessions.
+
+        Raises:
+            InsufficientFunds: If the amount exceeds the balance, which is left unchanged.
+        """
+        def take(balance: int) -> Tuple[int, int]:
+            if amount > balance:
+                raise InsufficientFunds(f"Total bet ${amount} exceeds the current balance ${balance}.")
+            return balance - amount, balance - amount
+
+        return self.transact(session_id, take)
+
+
+    def credit(self, session_id: Optional[str], amount: int) -> Optional[int]:
+        """
+        Atomically pay winnings into a balance.
+
+        Args:
+            session_id (Optional[str]): The session id.
+            amount (int): Amount to add, not negative.
+
+        Returns:
+            Optional[int]: The new balance, or None for unknown or expired sessions.
+        """
+        return self.transact(session_id, lambda balance: (balance + amount, balance + amount))
@@ -1,24 +1,187 @@
-from typing import List
+import sys
+from typing import List, Optional, TextIO
+
+from services.machines import DEFAULT_MACHINE
+
+# Betting limits of the default machine, see machines/classic.toml
+MAX_LINES = DEFAULT_MACHINE.max_lines
+MAX_BET = DEFAULT_MACHINE.max_bet
+MIN_BET = DEFAULT_MACHINE.min_bet
+
+SEPARATOR = " | " # Between the symbols of a row
+
+# ANSI escape sequences used by `GridRenderer`
+CURSOR_UP = "\x1b[{}A"
+CURSOR_DOWN = "\x1b[{}B"
+CURSOR_RIGHT = "\x1b[{}C"
+CLEAR_LINE = "\x1b[2K"
+
+
+def grid_rows(columns: List[List[str]]) -> List[List[str]]:
+    """
+    Turn the columns of a spin into its rows.
+
+    Args:
+         columns (List[List[str]]): The columns of the slot machine.
+
+    Returns:
+        List[List[str]]: The symbols of every row, left to right.
+    """
+    return [[column[row] for column in columns] for row in range(len(columns[0]))]
+
+
+def format_slot_machine(columns: List[List[str]]) -> str:
+    """
+    Lay out the slot machine grid as text, one line per row with pipes between the symbols.
+
+    Args:
+         columns (List[List[str]]): The columns of the slot machine.
+
+    Returns:
+        str: The grid, every row ending in a newline.
+    """
+    return "".join(SEPARATOR.join(row) + "\n" for row in grid_rows(columns))
 
-MAX_LINES = 3
-MAX_BET = 100
-MIN_BET = 1
 
 def print_slot_machine(columns: List[List[str]]) -> None:
     """
-    Display the slot machine grid in the terminal.
+    Display the slot machine grid in the terminal, with a single write.
 
     Args:
          columns (List[List[str]]): The columns of the slot machine.
     """
-    for row in range(len(columns[0])):
-        for i, column in enumerate(columns):
-            if i != len(columns) - 1: # If not last column of the slot machine add the pipe symbol
-                print(column[row], end=" | ")
+    sys.stdout.write(format_slot_machine(columns))
+
+
+class GridRenderer:
+    """
+    Draws spin after spin in place, for fast-spin and autoplay output.
+
+    Every frame is the grid plus an optional status line, built into one buffer and
+    written with a single call. On a terminal only what changed is redrawn: the cursor
+    moves up to each changed line with ANSI escapes and rewrites the changed symbols (or
+    the whole line when its layout changed), then returns below the frame. Streams that
+    are not terminals get every frame in full, without escapes. In quiet mode nothing is
+    drawn at all, for runs of thousands of rounds where only the summary matters.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, ansi: Optional[bool] = None, quiet: bool = False) -> None:
+        """
+        Args:
+            stream (Optional[TextIO]): Where frames are written, stdout by default.
+            ansi (Optional[bool]): Redraw in place with ANSI escapes. Defaults to whether
+                the stream is a terminal.
+            quiet (bool): Draw nothing.
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        self.ansi = ansi if ansi is not None else self.stream.isatty()
+        self.quiet = quiet
+        self._lines: Optional[List[List[str]]] = None # Cells of every line of the last frame
+
+
+    def reset(self) -> None:
+        """
+        Draw the next frame in full, e.g. after other output moved the cursor.
+        """
+        self._lines = None
+
+
+    def render(self, columns: List[List[str]], status: Optional[str] = None) -> None:
+        """
+        Draw a spin.
+
+        Args:
+            columns (List[List[str]]): The columns of the slot machine.
+            status (Optional[str]): A line shown below the grid.
+        """
+        if self.quiet:
+            return
+
+        lines = grid_rows(columns)
+        if status is not None:
+            lines.append([status])
+        previous, self._lines = self._lines, lines
+
+        if not self.ansi or previous is None or len(previous) != len(lines): # New layout, draw it all
+            self.stream.write("".join(SEPARATOR.join(line) + "\n" for line in lines))
+            return
+
+        buffer: List[str] = []
+        for number, (old, new) in enumerate(zip(previous, lines)):
+            if old == new:
+                continue
+
+            up = len(lines) - number # The cursor waits at the start of the line below the frame
+            buffer.append(CURSOR_UP.format(up) + "\r")
+            if len(old) == len(new) and all(len(before) == len(after) for before, after in zip(old, new)):
+                offset = position = 0 # Where the cell starts, and where the cursor is
+                for before, after in zip(old, new):
+                    if before != after:
+                        if offset > position:
+                            buffer.append(CURSOR_RIGHT.format(offset - position))
+                        buffer.append(after)
+                        position = offset + len(after)
+                    offset += len(before) + len(SEPARATOR)
             else:
-                print(column[row], end="")
+                buffer.append(CLEAR_LINE + SEPARATOR.join(new))
+            buffer.append(CURSOR_DOWN.format(up) + "\r")
+
+        if buffer:
+            self.stream.write("".join(buffer))
+            self.stream.flush() # The frame ends without a newline, so line buffering would hold it back
+
 
-        print() # New line for spacing
+def print_round_result(winnings: int, winning_lines: List[int]) -> None:
+    """
+    Display how much a round won and on which lines.
+
+    Args:
+        winnings (int): Amount won.
+        winning_lines (List[int]): Winning line numbers.
+    """
+    print(f"\nYOU WON: ${winnings}")
+
+    if winning_lines:
+        print("Winning lines:", *winning_lines)
+    else:
+        print("No winning lines.")
+
+
+def format_autoplay_round(number: int, winnings: int, winning_lines: List[int], balance: int) -> str:
+    """
+    Describe one autoplayed round on a single line, shown below its grid.
+
+    Args:
+        number (int): Round number within the autoplay run, from 1.
+        winnings (int): Amount won.
+        winning_lines (List[int]): Winning line numbers.
+        balance (int): Balance after the round.
+
+    Returns:
+        str: The description.
+    """
+    won = f"won ${winnings} on lines {' '.join(map(str, winning_lines))}" if winning_lines else "no win"
+    return f"Spin {number}: {won} | Balance: ${balance}"
+
+
+def print_autoplay_summary(reason: str, spins: int, net: int, balance: int) -> None:
+    """
+    Display why an autoplay run stopped and how it went.
+
+    Args:
+        reason (str): Why the run stopped, see `services.autoplay.STOP_REASONS`.
+        spins (int): Rounds played.
+        net (int): Balance change over the run.
+        balance (int): Balance at the end of the run.
+    """
+    reasons = {
+        "spins": "all spins played",
+        "stop_loss": "stop-loss reached",
+        "stop_win": "stop-win reached",
+        "balance": "balance too low for another spin",
+    }
+    print(f"\nAutoplay stopped: {reasons.get(reason, reason)}.")
+    print(f"Played {spins} spins, net {'+' if net >= 0 else '-'}${abs(net)}. Balance: ${balance}.")
 
 
 
@@ -47,33 +210,40 @@ def deposit() -> int:
 
 
 # Function to get the number of lines
-def get_number_of_slot_lines() -> int:
+def get_number_of_slot_lines(max_lines: int = MAX_LINES) -> int:
     """
     Prompt the user to enter how many lines they want to bet on.
 
+    Args:
+        max_lines (int): Maximum number of lines the machine offers.
+
     Returns:
         int: Number of lines to bet on.
     """
     while True:
-        slot_lines = input(f"\nEnter the number of slot lines to bet on (1-{str(MAX_LINES)})\n")
+        slot_lines = input(f"\nEnter the number of slot lines to bet on (1-{str(max_lines)})\n")
 
         if slot_lines.isdigit():
             slot_lines = int(slot_lines)
 
-            if 1 <= slot_lines <= MAX_LINES:
+            if 1 <= slot_lines <= max_lines:
                 return slot_lines
             else:
-                print(f"Enter a valid number of slot lines (1-{str(MAX_LINES)})\n")
+                print(f"Enter a valid number of slot lines (1-{str(max_lines)})\n")
         else:
             print("Please enter a positive integer number\n")
 
 
 
 
-def get_bet() -> int:
+def get_bet(min_bet: int = MIN_BET, max_bet: int = MAX_BET) -> int:
     """
     Prompt the user for the amount to bet on each line.
 
+    Args:
+        min_bet (int): Minimum bet per line.
+        max_bet (int): Maximum bet per line.
+
     Returns:
          int: Validated bet amount per line.
     """
@@ -83,10 +253,10 @@ def get_bet() -> int:
         if bet_amount.isdigit():
             bet_amount = int(bet_amount)
 
-            if MIN_BET <= bet_amount <= MAX_BET:
+            if min_bet <= bet_amount <= max_bet:
                 return bet_amount
             else:
-                print(f"Bet amount must be between {MIN_BET} - {MAX_BET}.\n")
+                print(f"Bet amount must be between {min_bet} - {max_bet}.\n")
         else:
             print("Please enter a positive integer number\n")
 
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from services.logic import SlotMachine
+from services.records import REPLAY_CHUNK, iter_machine_grids
+
+
+def _symbol_stakes(machine: SlotMachine, grids: np.ndarray, lines, bet) -> Tuple[np.ndarray, int]:
+    """
+    Total bet placed on each (symbol, run length) outcome in a batch of spins.
+
+    The payout of a batch under any paytable is the sum of these stakes weighted by the
+    paytable's multipliers, so the grids only need to be evaluated once. Losing runs are
+    kept too, because a candidate paytable may pay runs the current one does not.
+
+    Args:
+        machine (SlotMachine): Machine whose paylines or win mode decide the outcomes.
+        grids (np.ndarray): Array of shape (n, cols, rows) in the machine's symbol codes.
+        lines (int | np.ndarray): Lines bet on, for all spins or per spin.
+        bet (int | np.ndarray): Bet per line, for all spins or per spin.
+
+    Returns:
+        Tuple[np.ndarray, int]: Stakes of shape (symbols, max_run + 1) indexed by
+        [symbol code, run length], and the total amount wagered.
+    """
+    bets = np.broadcast_to(np.asarray(bet, dtype=np.int64), (len(grids),))
+
+    stakes = machine.outcome_counts_many(grids, lines, bets) # Summed over the batch, never per spin
+    wagered = int((np.broadcast_to(np.asarray(lines, dtype=np.int64), (len(grids),)) * bets).sum())
+    return stakes, wagered
+
+
+def rescore(machine: SlotMachine, batches: Iterable[Tuple[np.ndarray, object, object]],
+            paytables: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, float]]:
+    """
+    Re-score recorded spins under several candidate paytables in one pass.
+
+    Every batch is evaluated once to count its (symbol, run length) outcomes; each
+    paytable then costs one small weighted sum instead of a full `check_winnings` run.
+
+    Args:
+        machine (SlotMachine): Machine with the current paytable, used as the baseline.
+        batches (Iterable[Tuple[np.ndarray, object, object]]): (grids, lines, bet) batches,
+            grids of shape (n, cols, rows) in the machine's symbol codes.
+        paytables (Dict[str, Dict[str, int]]): Candidate paytables by name, each mapping
+            symbols to their payout multiplier or table of multipliers by run length.
+            Symbols a paytable leaves out pay nothing.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per paytable (plus "current" for the baseline): total
+        winnings, RTP, and the change in winnings and RTP against the baseline.
+
+    Raises:
+        ValueError: If a paytable pays an invalid run length.
+    """
+    names = ["current"] + list(paytables)
+    tables = [machine.symbol_values] + list(paytables.values())
+
+    # One (symbols, cols + 1) array of multipliers per paytable, without the "no win" row
+    values = np.stack([machine.compile_paytable(table)[0][:-1] for table in tables])
+
+    stakes = np.zeros(values.shape[1:], dtype=np.int64)
+    wagered = 0
+    for grids, lines, bet in batches:
+        batch_stakes, batch_wagered = _symbol_stakes(machine, grids, lines, bet)
+        stakes += batch_stakes
+        wagered += batch_wagered
+
+    winnings = (values * stakes).sum(axis=(1, 2)).tolist()
+    baseline = winnings[0]
+
+    return {
+        name: {
+            "winnings": won,
+            "rtp": won / wagered if wagered else 0.0,
+            "delta": won - baseline,
+            "delta_rtp": (won - baseline) / wagered if wagered else 0.0,
+        }
+        for name, won in zip(names, winnings)
+    }
+
+
+def rescore_records(path: str, machine: SlotMachine, paytables: Dict[str, Dict[str, int]],
+                    chunk: int = REPLAY_CHUNK) -> Dict[str, Dict[str, float]]:
+    """
+    Re-score a spin record file under several candidate paytables, see `rescore()`.
+
+    Args:
+        path (str): Record file written by `services.records.RecordWriter`.
+        machine (SlotMachine): Machine with the current paytable, used as the baseline.
+        paytables (Dict[str, Dict[str, int]]): Candidate paytables by name.
+        chunk (int): Records processed at a time.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Results per paytable, see `rescore()`.
+    """
+    batches = (
+        (grids, records["lines"], records["bet"])
+        for records, grids in iter_machine_grids(path, machine, chunk)
+    )
+    return rescore(machine, batches, paytables)
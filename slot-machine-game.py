@@ -1,107 +1,190 @@
-from services.logic import SlotMachine
-from services.ui import deposit, get_bet, get_number_of_slot_lines, print_slot_machine
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
 
-class Game:
+# Only the machine definitions are imported up front, for the option defaults. Every command
+# imports what it runs, so `--help` and the interactive game never load the batch engines.
+from services.machines import DEFAULT_MACHINE
+
+
+def simulate(args: argparse.Namespace) -> None:
     """
-    A class to manage the slot machine game flow and user balance.
+    Run a Monte Carlo simulation of the game's machine and print the summary as JSON.
+    Progress is reported on stderr while chunks complete.
+
+    With `--profile` the simulation runs in this process (worker processes would not be
+    profiled) under the chosen profiler, and its first chunks run again under tracemalloc,
+    see `profile_simulation()`. The report files are listed on stderr.
+
+    Args:
+        args (argparse.Namespace): Parsed `simulate` command line options.
     """
+    from services.game import Game
+    from services.simulation import iter_simulation
+
+    machine = Game().machine
+    totals = None
+
+    def progress(running) -> None:
+        print(f"Simulated {running.spins}/{args.spins} spins", file=sys.stderr)
+
+    if args.profile:
+        from services.profiling import profile_simulation
+
+        totals, files = profile_simulation(
+            machine, args.spins, args.lines, args.bet, args.profile, args.profiler, args.seed, args.session_spins,
+            progress=progress,
+        )
+        report_files(files)
+    else:
+        for totals in iter_simulation(machine, args.spins, args.lines, args.bet, args.seed, args.workers, args.session_spins):
+            progress(totals)
+
+    if totals is not None:
+        print(json.dumps(totals.summary(), indent=2))
+
+
+def optimize(args: argparse.Namespace) -> None:
+    """
+    Search symbol counts and payouts of the game's machine for a target RTP and print the
+    best candidates as JSON.
+
+    Args:
+        args (argparse.Namespace): Parsed `optimize` command line options.
+    """
+    from services.game import Game
+    from services.optimizer import Targets, optimize_paytable
+
+    targets = Targets(args.rtp, args.rtp_tolerance, args.hit_frequency, args.hit_tolerance,
+                      args.min_variance, not args.any_order)
+    result = optimize_paytable(
+        Game().machine, targets, range(args.min_count, args.max_count + 1), range(1, args.max_payout + 1),
+        pool_size=args.pool_size, top=args.top, workers=args.workers,
+    )
+    print(f"Evaluated {result['evaluated']} configurations", file=sys.stderr)
+    print(json.dumps(result["candidates"], indent=2))
+
+
+def autoplay(args: argparse.Namespace) -> None:
+    """
+    Ask for a deposit, then autoplay the game's machine in the terminal.
+
+    Args:
+        args (argparse.Namespace): Parsed command line options.
+    """
+    from services.game import Game
+    from services.ledger import Ledger
+    from services.ui import deposit
+
+    with Ledger(args.ledger) if args.ledger else nullcontext() as ledger:
+        game = Game(ledger=ledger)
+        game.balance = deposit()
+        game.autoplay(args.autoplay, args.lines, args.bet, args.stop_loss, args.stop_win, args.quiet)
 
-    # Constants for game configuration
-    MAX_LINES = 3   # Maximum number of lines a play can bet on
-    ROWS = 3        # Number of rows in the slot machine
-    COLS = 3        # Number of columns in the slot machine
-
-    # Frequency of each symbol in the slot machine's pool
-    SYMBOL_COUNT = {
-        "A": 2,
-        "B": 4,
-        "C": 6,
-        "D": 8
-    }
-
-    # Payout multiplier for each symbol if it appears on a winning line
-    SYMBOL_VALUES = {
-        "A": 5,
-        "B": 4,
-        "C": 3,
-        "D": 2
-    }
-
-    def __init__(self) -> None:
-        """
-        Initializes a new game instance.
-        - Sets up starting balance as 0.
-        - Creates a SlotMachine object with predefined settings.
-        """
-        self.balance: int = 0 # User's current balance
-        self.machine = SlotMachine(self.ROWS, self.COLS, self.SYMBOL_COUNT, self.SYMBOL_VALUES)
-
-
-    def play_spin(self) -> None:
-        """
-        Handles a single spin round of the slot machine:
-        - Asks how many lines the user wants to bet on
-        - Collects bet amount per line
-        - Ensures the total bet does not exceed user's available balance
-        - Spins the machine and prints results
-        - Checks winnings and updates balance
-        """
-        lines = get_number_of_slot_lines() # Ask the user how many lines they want to bet on (1-3)
-
-        while True: # Continue prompting for a valid bet until the user has enough balance
-            bet_amount = get_bet() # Ask for the bet per line
-            total_bet = bet_amount * lines # Calculate total cost of the spin
-
-            if total_bet > self.balance:
-                print(f"\nYour current balance cannot meet that bet amount,\nCurrent balance: ${self.balance}.")
-            else:
-                break # Bet doesn't exceed user balance so exit loop and start playing.
-
-        print(f"\nYou are betting: ${bet_amount} on {lines} lines.\nTotal bet: ${total_bet}.\n")
-
-        # Generate the slot machine result
-        columns = self.machine.spin()
-        print_slot_machine(columns) # spin result
-
-        # How much the player won and on which lines
-        winnings, winning_lines = self.machine.check_winnings(columns, lines, bet_amount)
-
-        print(f"\nYOU WON: ${winnings}")
-
-        if winning_lines:
-            print("Winning lines:", *winning_lines)
-        else:
-            print("No winning lines.")
-
-        self.balance += (winnings - total_bet) # Update balance
-
-
-    def run(self) -> None:
-        """
-        Starts and controls the main game loop:
-        - Gets initial deposit amount
-        - Repeats spins while the balance is above 0 or the user doesn't quit
-        - Handles game over or quitting
-        """
-        self.balance = deposit() # Ask for initial deposit
-
-        while True:
-            if self.balance <= 0: # Check if the user has enough money to play
-                print("\nGame Over. You're all out of balance.")
-                print("Thank you for playing!")
-                break
-
-            print(f"Current balance: ${self.balance}")
-
-            # Ask the user to continue playing or to quit
-            user_input = input("\nPress ENTER to spin (q to quit): ").strip().lower()
-            if user_input == "q":
-                print(f"\nYou left with ${self.balance}.")
-                break
-
-            self.play_spin()
+
+def profile(args: argparse.Namespace) -> None:
+    """
+    Profile headless rounds of the game's machine instead of starting the game.
+
+    Args:
+        args (argparse.Namespace): Parsed command line options.
+    """
+    from services.game import Game
+    from services.profiling import profile_rounds
+
+    print(f"Profiling {args.rounds} rounds with {args.profiler}...", file=sys.stderr)
+    report_files(profile_rounds(Game().machine, args.rounds, args.lines, args.bet, args.profile, args.profiler))
+
+
+def play(args: argparse.Namespace) -> None:
+    """
+    Start the interactive game, recording every round if a ledger is given.
+
+    Args:
+        args (argparse.Namespace): Parsed command line options.
+    """
+    from services.game import Game
+    from services.ledger import Ledger
+
+    with Ledger(args.ledger) if args.ledger else nullcontext() as ledger:
+        Game(ledger=ledger).run()
+
+
+def report_files(files: Dict[str, Path]) -> None:
+    """
+    List the files written by a profiling run on stderr.
+    """
+    for kind, path in files.items():
+        print(f"Wrote {kind}: {path}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point. Without a command the interactive game is started.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments, defaults to `sys.argv[1:]`.
+    """
+    parser = argparse.ArgumentParser(description="Slot machine game")
+    commands = parser.add_subparsers(dest="command")
+
+    simulate_parser = commands.add_parser("simulate", help="Simulate many spins across all CPU cores")
+    simulate_parser.add_argument("--spins", type=int, default=1_000_000, help="Total number of spins")
+    simulate_parser.add_argument("--lines", type=int, default=DEFAULT_MACHINE.max_lines, help="Lines bet on every spin")
+    simulate_parser.add_argument("--bet", type=int, default=1, help="Bet amount per line")
+    simulate_parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible results")
+    simulate_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    simulate_parser.add_argument("--session-spins", type=int, default=100, help="Spins per simulated player session")
+
+    optimize_parser = commands.add_parser("optimize", help="Search symbol counts and payouts for a target RTP")
+    optimize_parser.add_argument("--rtp", type=float, required=True, help="Target return to player, e.g. 0.95")
+    optimize_parser.add_argument("--rtp-tolerance", type=float, default=0.01, help="Accepted distance from the target RTP")
+    optimize_parser.add_argument("--hit-frequency", type=float, default=None, help="Target chance that a line wins")
+    optimize_parser.add_argument("--hit-tolerance", type=float, default=0.02, help="Accepted distance from the hit frequency")
+    optimize_parser.add_argument("--min-variance", type=float, default=None, help="Smallest accepted variance per line")
+    optimize_parser.add_argument("--min-count", type=int, default=1, help="Smallest frequency of a symbol")
+    optimize_parser.add_argument("--max-count", type=int, default=10, help="Largest frequency of a symbol")
+    optimize_parser.add_argument("--max-payout", type=int, default=20, help="Largest payout multiplier of a line")
+    optimize_parser.add_argument("--pool-size", type=int, default=None, help="Required total number of symbols")
+    optimize_parser.add_argument("--any-order", action="store_true", help="Let commoner symbols pay more than rarer ones")
+    optimize_parser.add_argument("--top", type=int, default=10, help="Number of candidates printed")
+    optimize_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    parser.add_argument("--ledger", help="Record every round of the interactive game to this ledger file")
+
+    # Profiling options, accepted before or after the command (SUPPRESS keeps the
+    # subcommand from resetting options given before it)
+    for target, default in ((parser, None), (simulate_parser, argparse.SUPPRESS)):
+        target.add_argument("--profile", metavar="DIR", default=default,
+                            help="Profile headless rounds (or the simulation) and write the reports to DIR")
+        target.add_argument("--profiler", choices=("cprofile", "sampling"),
+                            default="cprofile" if default is None else default,
+                            help="cProfile with pstats output, or a sampling profiler with collapsed stacks")
+    parser.add_argument("--rounds", type=int, default=100_000, help="Rounds played by --profile")
+    parser.add_argument("--lines", type=int, default=DEFAULT_MACHINE.max_lines, help="Lines bet on every --profile or --autoplay round")
+    parser.add_argument("--bet", type=int, default=1, help="Bet amount per line in --profile or --autoplay rounds")
+
+    parser.add_argument("--autoplay", type=int, metavar="SPINS", help="Play up to SPINS rounds without prompting")
+    parser.add_argument("--stop-loss", type=int, default=None, help="Stop autoplay once this much is lost")
+    parser.add_argument("--stop-win", type=int, default=None, help="Stop autoplay once this much is won")
+    parser.add_argument("--quiet", action="store_true", help="Only print the autoplay summary, not every round")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "simulate":
+        simulate(args)
+    elif args.command == "optimize":
+        optimize(args)
+    elif args.profile:
+        profile(args)
+    elif args.autoplay:
+        autoplay(args)
+    else:
+        play(args)
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    main()
\ No newline at end of file
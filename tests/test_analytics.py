@@ -0,0 +1,224 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from services.analytics import (
+    hit_frequency, line_hit_probability, payout_distribution, paytable_report, rtp, session_outlook, variance,
+)
+from services.game import settle_round
+from services.logic import SlotMachine
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def brute_force_distribution(machine: SlotMachine, lines: int) -> dict:
+    """
+    Enumerate every equally likely spin of a tiny machine and tally its payouts.
+    """
+    pool = [symbol for symbol, count in machine.symbols.items() for _ in range(count)]
+    column_draws = list(permutations(range(len(pool)), machine.rows))
+
+    tally: dict = {}
+    total = 0
+    for draws in np.ndindex(*([len(column_draws)] * machine.cols)):
+        columns = [[pool[i] for i in column_draws[d]] for d in draws]
+        payout, _ = machine.check_winnings(columns, lines, bet=1)
+        tally[payout] = tally.get(payout, 0) + 1
+        total += 1
+
+    return {payout: count / total for payout, count in tally.items()}
+
+
+def test_payout_distribution_matches_enumeration() -> None:
+    """
+    Test the closed-form distribution against full enumeration of a 2x2 machine
+    with a pool of A, A, B, C (so rows within a column are dependent).
+    """
+    machine = SlotMachine(2, 2, {"A": 2, "B": 1, "C": 1}, {"A": 2, "B": 3, "C": 7})
+
+    for lines in (1, 2):
+        exact = payout_distribution(machine, lines)
+        expected = brute_force_distribution(machine, lines)
+
+        assert set(exact) >= set(expected)
+        for payout, probability in exact.items():
+            assert probability == pytest.approx(expected.get(payout, 0.0), abs=1e-12)
+
+
+def test_single_line_rtp_and_hit_frequency() -> None:
+    """
+    Test one-line RTP and hit frequency against the per-symbol line probabilities.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    per_symbol = line_hit_probability(machine)
+
+    assert per_symbol["A"] == pytest.approx((2 / 20) ** 3)
+    assert rtp(machine, 1) == pytest.approx(sum(SYMBOL_VALUES[s] * p for s, p in per_symbol.items()))
+    assert hit_frequency(machine, 1) == pytest.approx(sum(per_symbol.values()))
+
+
+def test_rtp_does_not_depend_on_lines() -> None:
+    """
+    Every line is equally likely to win, so RTP per unit wagered is the same for 1-3 lines,
+    while the distribution itself still sums to 1.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+
+    for lines in (1, 2, 3):
+        assert sum(payout_distribution(machine, lines).values()) == pytest.approx(1.0)
+        assert rtp(machine, lines) == pytest.approx(rtp(machine, 1))
+
+
+def test_variance_scales_with_bet() -> None:
+    """
+    Test that variance grows with the square of the bet per line.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    assert variance(machine, 3, bet=10) == pytest.approx(variance(machine, 3) * 100)
+
+
+def test_paytable_report_and_invalid_lines() -> None:
+    """
+    Test that the report covers every lines bet and that out-of-range lines are rejected.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+
+    assert [entry["lines"] for entry in paytable_report(machine)] == [1, 2, 3]
+    with pytest.raises(ValueError):
+        rtp(machine, 4)
+
+
+def test_rtp_with_paylines_and_tiers_matches_enumeration() -> None:
+    """
+    Test the closed-form RTP of a machine with a diagonal line and tiered runs against
+    full enumeration, and that the exact distribution is refused for it.
+    """
+    machine = SlotMachine(2, 3, {"A": 2, "B": 1, "C": 1}, {"A": {2: 1, 3: 4}, "B": 6, "C": {2: 2}},
+                          paylines=[(0, 0, 0), (0, 1, 0)])
+    expected = brute_force_distribution(machine, 2)
+
+    assert rtp(machine, 2) == pytest.approx(sum(p * payout for payout, p in expected.items()) / 2)
+    with pytest.raises(ValueError):
+        payout_distribution(machine, 2)
+    assert paytable_report(machine)[1]["variance"] is None
+
+
+def test_ways_rtp_matches_enumeration() -> None:
+    """
+    Test the closed-form RTP of a ways machine against full enumeration, and that cluster
+    machines, which have no closed form, are refused.
+    """
+    machine = SlotMachine(2, 3, {"A": 2, "B": 1, "C": 1}, {"A": {2: 1, 3: 4}, "B": 6, "C": {2: 2}}, win_mode="ways")
+    expected = brute_force_distribution(machine, 1)
+
+    assert rtp(machine) == pytest.approx(sum(p * payout for payout, p in expected.items()))
+    with pytest.raises(ValueError):
+        rtp(SlotMachine(2, 3, SYMBOLS, SYMBOL_VALUES, win_mode="clusters"))
+
+
+def test_session_outlook_matches_gamblers_ruin() -> None:
+    """
+    Test the chain against the closed form of gambler's ruin: a round wins or loses one
+    bet, with probability q of winning, until the balance hits 0 or the cap N.
+    """
+    q, cap = 0.4, 20
+    r = (1 - q) / q
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    outlook = session_outlook(machine, range(cap + 1), cap=cap, distribution={0: 1 - q, 2: q})
+
+    for deposit in range(cap + 1):
+        ruin = (r ** deposit - r ** cap) / (1 - r ** cap)
+        spins = deposit / (1 - 2 * q) - cap / (1 - 2 * q) * (1 - r ** deposit) / (1 - r ** cap)
+        assert outlook[deposit]["ruin"] == pytest.approx(ruin)
+        assert outlook[deposit]["spins"] == pytest.approx(spins, abs=1e-9)
+
+
+def test_session_outlook_matches_simulated_sessions() -> None:
+    """
+    Test the solved ruin probability and session length against headless sessions.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, {"A": 50, "B": 20, "C": 10, "D": 8}, rng=11)
+    expected = session_outlook(machine, [10], lines=2, bet=1, cap=30)[10]
+
+    ruined = spins = 0
+    sessions = 2000
+    for _ in range(sessions):
+        balance = 10
+        while 2 <= balance < 30:
+            balance = settle_round(machine, balance, 2, 1).balance
+            spins += 1
+        ruined += balance < 2
+
+    assert ruined / sessions == pytest.approx(expected["ruin"], abs=0.04)
+    assert spins / sessions == pytest.approx(expected["spins"], rel=0.1)
+
+
+def test_session_outlook_matches_dense_solve() -> None:
+    """
+    Test the banded solve against a dense solve of (I - Q) x = [r, 1] for a chain with
+    large jumps up, several steps down and rounds that change nothing.
+    """
+    distribution = {0: 0.55, 1: 0.2, 3: 0.1, 40: 0.1, 120: 0.05}
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    outlook = session_outlook(machine, range(301), lines=3, bet=1, cap=300, distribution=distribution)
+
+    size = 300 - 3 # Transient balances 3 to 299
+    matrix = np.eye(size)
+    ruin = np.zeros(size)
+    for state in range(size):
+        for multiplier, probability in distribution.items():
+            target = state + multiplier - 3
+            if target < 0:
+                ruin[state] += probability
+            elif target < size:
+                matrix[state, target] -= probability
+    dense = np.linalg.solve(matrix, np.column_stack([ruin, np.ones(size)]))
+
+    for deposit in range(3, 300):
+        assert outlook[deposit]["ruin"] == pytest.approx(dense[deposit - 3, 0])
+        assert outlook[deposit]["spins"] == pytest.approx(dense[deposit - 3, 1])
+
+
+def test_session_outlook_long_chains() -> None:
+    """
+    Test that ordinary deposits on the classic machine, with a chain of thousands of
+    balances, are solved instead of rejected.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    outlook = session_outlook(machine, [100, 1000], lines=1, bet=1)
+
+    assert 0 < outlook[1000]["ruin"] <= 1
+    assert outlook[100]["spins"] < outlook[1000]["spins"]
+
+
+def test_session_outlook_scales_with_bet() -> None:
+    """
+    Test that doubling the bet, the deposits and the cap leaves the outlook unchanged,
+    and that the state limit and exact-distribution checks are enforced.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, {"A": 50, "B": 20, "C": 10, "D": 8})
+    single = session_outlook(machine, [1, 4, 9, 40], lines=3, bet=1, cap=40)
+    double = session_outlook(machine, [2, 8, 18, 80], lines=3, bet=2, cap=80)
+
+    assert single[1] == {"ruin": 1.0, "spins": 0.0}
+    assert single[40] == {"ruin": 0.0, "spins": 0.0}
+    for deposit in single:
+        assert double[2 * deposit] == pytest.approx(single[deposit])
+
+    with pytest.raises(ValueError):
+        session_outlook(machine, [10], cap=1_000_000)
+    with pytest.raises(ValueError):
+        session_outlook(SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, paylines=[(0, 1, 2)]), [10])
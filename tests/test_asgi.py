@@ -0,0 +1,121 @@
+import pytest
+from starlette.testclient import TestClient
+
+from asgi import create_app
+import serve
+from services.machines import MachineRegistry
+from services.store import SessionStore
+
+# A machine that can only show 'D', so every line wins
+ONLY_D = """
+rows = 3
+cols = 3
+max_lines = 3
+min_bet = 1
+max_bet = 100
+
+[symbol_count]
+D = 3
+
+[symbol_values]
+D = 2
+"""
+
+
+def make_client(registry: MachineRegistry = None, deposit: str = "100") -> TestClient:
+    """
+    Create a test client for a fresh ASGI app with an active session holding the deposit.
+    """
+    client = TestClient(create_app(store=SessionStore(), registry=registry))
+    client.post("/", data={"deposit_amount": deposit})
+    return client
+
+
+def test_home_and_play_pages() -> None:
+    """
+    Test the deposit form and that /play shows the deposited balance.
+    """
+    client = TestClient(create_app(store=SessionStore()))
+
+    assert "Welcome to the Slot Machine Game" in client.get("/").text
+    assert "valid deposit amount" in client.post("/", data={"deposit_amount": "abc"}).text
+    assert "deposited $75" in client.post("/", data={"deposit_amount": "75"}).text
+    assert "$75" in client.get("/play").text
+
+
+def test_api_spin_settles_round(tmp_path) -> None:
+    """
+    Spin on a machine that can only show 'D' (value 2): all 3 lines win at $1.
+
+    Expected result: balance 100 - 3 + 6 = 103.
+    """
+    (tmp_path / "only-d.toml").write_text(ONLY_D)
+    client = make_client(MachineRegistry(tmp_path))
+    response = client.post("/api/spin", json={"machine": "only-d", "lines": 3, "bet": 1})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "columns": [["D", "D", "D"]] * 3,
+        "winnings": 6,
+        "winning_lines": [1, 2, 3],
+        "balance": 103,
+    }
+
+
+def test_api_spin_rejects_bad_requests() -> None:
+    """
+    Invalid bodies, bets above the balance and missing sessions are rejected with an error.
+    """
+    client = make_client(deposit="20")
+
+    assert client.post("/api/spin", content=b"not json").status_code == 400
+    assert client.post("/api/spin", json={"lines": 0, "bet": 1}).status_code == 400
+    assert client.post("/api/spin", json={"lines": True, "bet": True}).status_code == 400
+    assert client.post("/api/spin", json={"machine": "missing", "lines": 1, "bet": 1}).status_code == 400
+    assert client.post("/api/spin", json={"lines": 3, "bet": 10}).status_code == 400 # $30 > $20
+    assert TestClient(create_app()).post("/api/spin", json={"lines": 1, "bet": 1}).status_code == 401
+
+
+def test_api_autoplay_streams_events(tmp_path) -> None:
+    """
+    Autoplay 10 spins on the all-'D' machine: every spin nets +$3, streamed as Server-Sent Events.
+
+    Expected result: balance 100 + 10 * 3 = 130.
+    """
+    (tmp_path / "only-d.toml").write_text(ONLY_D)
+    client = make_client(MachineRegistry(tmp_path))
+
+    created = client.post("/api/autoplay", json={"machine": "only-d", "lines": 3, "bet": 1, "spins": 10})
+    assert created.status_code == 201
+    stream = f"/api/autoplay/{created.json()['run']}"
+
+    response = client.get(stream)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    assert response.text.count("event: rounds") == 1
+    assert response.text.endswith('event: done\ndata: {"reason":"spins","spins":10,"balance":130}\n\n')
+    assert client.get(stream).status_code == 404 # A run plays once
+
+    assert client.get("/api/autoplay", params={"lines": 3, "bet": 1, "spins": 10}).status_code == 405
+    text_body = client.post("/api/autoplay", content=b'{"lines": 3, "bet": 1, "spins": 10}', headers={"Content-Type": "text/plain"})
+    assert text_body.status_code == 400 # Cross-site forms can send text/plain, so only JSON is accepted
+    assert client.post("/api/autoplay", json={"machine": "only-d", "lines": 3, "bet": 1}).status_code == 400
+
+
+def test_serve_requires_secret_key(monkeypatch) -> None:
+    """
+    Test that the production launcher refuses to start without `SLOT_SECRET_KEY`, and
+    starts the server once it is set.
+    """
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: calls.append(kwargs))
+
+    monkeypatch.delenv("SLOT_SECRET_KEY", raising=False)
+    with pytest.raises(SystemExit):
+        serve.main(["--port", "8001"])
+    assert calls == []
+
+    monkeypatch.setenv("SLOT_SECRET_KEY", "not-dev")
+    serve.main(["--port", "8001"])
+    assert calls[0]["port"] == 8001
@@ -0,0 +1,126 @@
+import json
+import time
+
+import pytest
+
+from services.api import autoplay_events, parse_autoplay_request, sse_event
+from services.autoplay import Autoplay, PendingRuns
+from services.logic import SlotMachine
+from services.machines import MachineRegistry
+from services.store import SessionStore
+
+
+def losing_machine() -> SlotMachine:
+    """
+    A machine whose spins never pay anything.
+    """
+    return SlotMachine(3, 3, {"A": 1, "B": 1, "C": 1}, {"A": 0, "B": 0, "C": 0})
+
+
+def winning_machine() -> SlotMachine:
+    """
+    A machine that can only show 'D', so every line wins twice the bet.
+    """
+    return SlotMachine(3, 3, {"D": 3}, {"D": 2})
+
+
+def play(run: Autoplay, balance: int) -> list:
+    """
+    Settle a run to the end, returning the sizes of its batches.
+    """
+    sizes = []
+    while not run.done:
+        balance, rounds = run.settle_batch(balance)
+        sizes.append(len(rounds))
+    return sizes
+
+
+def test_autoplay_plays_all_spins_in_batches() -> None:
+    """
+    Test that a run settles its spins in batches and stops once they are played.
+    """
+    run = Autoplay(winning_machine(), 100, spins=60, lines=3, bet=1, batch=25)
+
+    assert play(run, 100) == [25, 25, 10]
+    assert run.reason == "spins"
+    assert run.played == 60
+
+
+def test_autoplay_stop_loss_and_balance() -> None:
+    """
+    Test that a losing run stops at the stop-loss, or when the balance runs out without one.
+    """
+    run = Autoplay(losing_machine(), 100, spins=1000, lines=3, bet=2, stop_loss=20)
+    play(run, 100)
+    assert (run.reason, run.played) == ("stop_loss", 4) # 100 - 4 * 6 = 76 <= 80
+
+    run = Autoplay(losing_machine(), 20, spins=1000, lines=3, bet=2)
+    play(run, 20)
+    assert (run.reason, run.played) == ("balance", 3) # $2 left, below the $6 bet
+
+
+def test_autoplay_stop_win() -> None:
+    """
+    Test that a winning run stops as soon as it is up by the stop-win.
+    """
+    run = Autoplay(winning_machine(), 10, spins=1000, lines=1, bet=1, stop_win=5)
+    balance, rounds = run.settle_batch(10)
+
+    assert run.reason == "stop_win"
+    assert len(rounds) == 5
+    assert balance == 15
+
+
+def test_parse_autoplay_request() -> None:
+    """
+    Test that query strings are converted, and that invalid settings are rejected.
+    """
+    registry = MachineRegistry()
+    machine, settings = parse_autoplay_request({"lines": "3", "bet": "2", "spins": "50", "stop_loss": "40"}, registry)
+
+    assert machine is registry.get("classic")
+    assert settings == {"spins": 50, "lines": 3, "bet": 2, "stop_loss": 40, "stop_win": None}
+
+    for params in ({"lines": "3", "bet": "2"}, {"lines": "3", "bet": "2", "spins": "5000"},
+                   {"lines": "3", "bet": "2", "spins": "5", "stop_win": "0"}, {"lines": "x", "bet": "2", "spins": "5"}):
+        with pytest.raises(ValueError):
+            parse_autoplay_request(params, registry)
+
+
+def test_autoplay_events_settle_against_the_store() -> None:
+    """
+    Test that every batch is one "rounds" event, that the store ends up with the final
+    balance, and that an unknown session gets an error event.
+    """
+    store = SessionStore()
+    sid = store.create(100)
+    run = Autoplay(winning_machine(), 100, spins=30, lines=3, bet=1, batch=25)
+
+    events = list(autoplay_events(run, store, sid))
+
+    assert [event.split("\n")[0] for event in events] == ["event: rounds", "event: rounds", "event: done"]
+    assert len(json.loads(events[0].split("data: ")[1])["rounds"]) == 25
+    assert json.loads(events[-1].split("data: ")[1]) == {"reason": "spins", "spins": 30, "balance": 190}
+    assert store.get(sid) == 190
+
+    run = Autoplay(winning_machine(), 100, spins=30, lines=3, bet=1)
+    assert list(autoplay_events(run, store, "unknown")) == [sse_event("error", {"error": "No active session, please deposit first"})]
+
+
+def test_pending_runs_are_claimed_once_by_their_session() -> None:
+    """
+    Test that a run can only be claimed by the session that created it, only once, and
+    not after it expired.
+    """
+    runs = PendingRuns()
+    machine = winning_machine()
+    run_id = runs.create("sid-1", machine, {"spins": 5})
+
+    assert runs.claim("sid-2", run_id) is None
+    assert runs.claim("sid-1", run_id) == (machine, {"spins": 5})
+    assert runs.claim("sid-1", run_id) is None
+
+    expired = PendingRuns(ttl=0)
+    run_id = expired.create("sid-1", machine, {"spins": 5})
+    time.sleep(0.01)
+    assert expired.claim("sid-1", run_id) is None
@@ -0,0 +1,29 @@
+from benchmarks.run import compare, run_benchmarks
+
+
+def test_run_benchmarks_machine_suite() -> None:
+    """
+    Smoke test the machine suite with a tiny time budget: every grid size is covered
+    and every case reports a positive time.
+    """
+    report = run_benchmarks(["machine"], min_time=0.001)
+
+    assert "spin[3x3,pool=20]" in report["results"]
+    assert "check_winnings[10x10,pool=1000]" in report["results"]
+    assert all(timing["usec_per_call"] > 0 for timing in report["results"].values())
+
+
+def test_compare_flags_slow_cases() -> None:
+    """
+    Test that only cases slower than the threshold are reported, and new cases are ignored.
+    """
+    baseline = {"results": {"spin": {"usec_per_call": 10.0}, "check": {"usec_per_call": 10.0}}}
+    current = {"results": {
+        "spin": {"usec_per_call": 20.0},
+        "check": {"usec_per_call": 11.0},
+        "new": {"usec_per_call": 99.0},
+    }}
+
+    regressions = compare(current, baseline, threshold=1.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("spin:")
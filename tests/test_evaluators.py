@@ -0,0 +1,202 @@
+from itertools import product
+
+import numpy as np
+
+from services.evaluators import cluster_counts_many, cluster_outcomes, ways_counts_many, ways_outcomes
+from services.logic import SlotMachine
+
+SYMBOLS = {
+    "A": 3,
+    "B": 3,
+    "C": 4
+}
+
+SYMBOL_VALUES = {
+    "A": {2: 1, 3: 3, 4: 10},
+    "B": {3: 2, 4: 6},
+    "C": {3: 1}
+}
+
+
+def brute_force_ways(columns: list) -> dict:
+    """
+    Enumerate every path through the leftmost columns, one row per column, and count the
+    paths of equal symbols that the next column cannot extend.
+    """
+    tally: dict = {}
+    for reached in range(1, len(columns) + 1):
+        for path in product(*columns[:reached]):
+            symbol = path[0]
+            if path.count(symbol) == reached and (reached == len(columns) or symbol not in columns[reached]):
+                tally[(symbol, reached)] = tally.get((symbol, reached), 0) + 1
+    return tally
+
+
+def brute_force_clusters(columns: list) -> list:
+    """
+    Flood fill every cluster with a depth-first search.
+    """
+    cols, rows = len(columns), len(columns[0])
+    seen = set()
+    clusters = []
+    for start in product(range(cols), range(rows)):
+        if start in seen:
+            continue
+        symbol = columns[start[0]][start[1]]
+        stack, size = [start], 0
+        seen.add(start)
+        while stack:
+            col, row = stack.pop()
+            size += 1
+            for near in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+                if near not in seen and 0 <= near[0] < cols and 0 <= near[1] < rows \
+                        and columns[near[0]][near[1]] == symbol:
+                    seen.add(near)
+                    stack.append(near)
+        clusters.append((symbol, size))
+    return sorted(clusters)
+
+
+def test_ways_outcomes_match_path_enumeration() -> None:
+    """
+    Test the histogram-based ways count against enumerating all rows ** cols paths.
+    """
+    machine = SlotMachine(3, 4, SYMBOLS, SYMBOL_VALUES, rng=1)
+    for _ in range(200):
+        columns = machine.spin()
+        outcomes = {(symbol, reached): ways for symbol, reached, ways in ways_outcomes(columns)}
+        assert outcomes == brute_force_ways(columns)
+
+
+def test_ways_example() -> None:
+    """
+    Two A's in the first column, one in the second and two in the third: 2 * 1 * 2 = 4
+    ways of 3 columns, while B stops after the first column.
+    """
+    columns = [
+        ["A", "B", "A"],
+        ["C", "A", "C"],
+        ["A", "A", "C"],
+        ["B", "B", "C"]
+    ]
+    assert sorted(ways_outcomes(columns)) == [("A", 3, 4), ("B", 1, 1)]
+
+
+def test_cluster_outcomes_match_flood_fill() -> None:
+    """
+    Test the union-find clusters against a depth-first flood fill.
+    """
+    machine = SlotMachine(5, 5, SYMBOLS, SYMBOL_VALUES, rng=2)
+    for _ in range(200):
+        columns = machine.spin()
+        assert sorted(cluster_outcomes(columns)) == brute_force_clusters(columns)
+
+
+def test_batch_counts_match_single_spins() -> None:
+    """
+    Test the vectorized ways and cluster counts against the single-spin evaluators.
+    """
+    machine = SlotMachine(4, 5, SYMBOLS, SYMBOL_VALUES, rng=3)
+    grids = machine.spin_many(300)
+    ways = ways_counts_many(grids, len(SYMBOLS))
+    clusters = cluster_counts_many(grids, len(SYMBOLS))
+
+    for grid, ways_counts, cluster_counts in zip(grids, ways, clusters):
+        columns = machine.decode(grid)
+
+        expected = np.zeros_like(ways_counts)
+        for symbol, reached, count in ways_outcomes(columns):
+            expected[machine.symbol_names.index(symbol), reached] += count
+        assert (ways_counts == expected).all()
+
+        expected = np.zeros_like(cluster_counts)
+        for symbol, size in cluster_outcomes(columns):
+            expected[machine.symbol_names.index(symbol), size] += 1
+        assert (cluster_counts == expected).all()
+
+
+def test_cluster_counts_snake() -> None:
+    """
+    Test a cluster that winds through the whole grid, the longest path a cluster can take,
+    next to grids of one cluster and of no clusters at all.
+    """
+    snake = [[0, 0, 0, 0, 0, 0], [1, 1, 1, 1, 1, 0], [0, 0, 0, 0, 0, 0], [0, 1, 1, 1, 1, 1], [0, 0, 0, 0, 0, 0]]
+    chequered = [[(col + row) % 2 for row in range(6)] for col in range(5)]
+    grids = np.array([snake, [[1] * 6] * 5, chequered])
+
+    counts = cluster_counts_many(grids, 2)
+
+    assert counts.shape == (3, 2, 31)
+    assert np.flatnonzero(counts[0, 0]).tolist() == [20] and counts[0, 0, 20] == 1
+    assert np.flatnonzero(counts[0, 1]).tolist() == [5] and counts[0, 1, 5] == 2
+    assert counts[1, 1, 30] == 1 and counts[1].sum() == 1
+    assert counts[2, :, 1].tolist() == [15, 15] and counts[2].sum() == 30
+
+
+def test_machine_win_modes_batch_matches_check_winnings() -> None:
+    """
+    Test `check_winnings_many()` against `check_winnings()` for ways and cluster machines,
+    where the whole grid is a single line.
+    """
+    for win_mode in ("ways", "clusters"):
+        machine = SlotMachine(3, 4, SYMBOLS, SYMBOL_VALUES, rng=4, win_mode=win_mode)
+        grids = machine.spin_many(500)
+        winnings, masks = machine.check_winnings_many(grids, 1, 2)
+
+        for grid, won, mask in zip(grids, winnings, masks):
+            expected, winning_lines = machine.check_winnings(machine.decode(grid), 1, 2)
+            assert won == expected
+            assert winning_lines == ([1] if mask else [])
+
+
+def test_weighted_outcome_counts() -> None:
+    """
+    Test that weighted counts summed over the batch equal the per-spin counts weighted
+    by hand, for every win mode.
+    """
+    for win_mode in ("lines", "ways", "clusters"):
+        machine = SlotMachine(3, 4, SYMBOLS, SYMBOL_VALUES, rng=6, win_mode=win_mode)
+        grids = machine.spin_many(400)
+        lines = 3 if win_mode == "lines" else 1
+        weights = np.random.default_rng(6).integers(1, 50, size=len(grids))
+
+        per_spin = machine.outcome_counts_many(grids, lines)
+        totals = machine.outcome_counts_many(grids, lines, weights)
+
+        assert totals.shape == per_spin.shape[1:]
+        assert (totals == np.einsum("nsr,n->sr", per_spin, weights)).all()
+
+
+def test_cluster_counts_many_symbols() -> None:
+    """
+    Test `check_winnings_many()` against `check_winnings()` on a 5x5 cluster machine with
+    enough symbols that the batch count keys no longer fit the grids' integer type.
+    """
+    names = "ABCDEFGHIJKL"
+    symbols = {name: 2 for name in names}
+    symbol_values = {name: {3: index + 1, 5: 10 * (index + 1)} for index, name in enumerate(names)}
+
+    machine = SlotMachine(5, 5, symbols, symbol_values, rng=12, win_mode="clusters")
+    grids = machine.spin_many(500)
+    winnings, masks = machine.check_winnings_many(grids, 1, 1)
+
+    for grid, won, mask in zip(grids, winnings, masks):
+        expected, winning_lines = machine.check_winnings(machine.decode(grid), 1, 1)
+        assert won == expected
+        assert winning_lines == ([1] if mask else [])
+
+
+def test_weighted_outcome_counts_are_exact() -> None:
+    """
+    Test that weighted counts stay exact past 2 ** 53, where float64 sums round off.
+    """
+    for win_mode in ("lines", "ways", "clusters"):
+        machine = SlotMachine(3, 4, SYMBOLS, SYMBOL_VALUES, rng=7, win_mode=win_mode)
+        grids = machine.spin_many(50)
+        lines = 3 if win_mode == "lines" else 1
+        weights = np.full(len(grids), 2 ** 53 + 1, dtype=np.int64)
+
+        per_spin = machine.outcome_counts_many(grids, lines)
+        totals = machine.outcome_counts_many(grids, lines, weights)
+
+        assert (totals == per_spin.sum(axis=0) * (2 ** 53 + 1)).all()
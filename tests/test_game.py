@@ -0,0 +1,82 @@
+import pytest
+
+from services.game import Game, RoundResult, settle_round
+from services.logic import SlotMachine
+
+
+def test_settle_win_updates_balance() -> None:
+    """
+    Settle a forced winning spin without any input: one line of 'C' (value 3) at $10.
+
+    Expected result: balance 100 - 10 + 30 = 120.
+    """
+    game = Game()
+    game.balance = 100
+    game.machine.spin = lambda: [["C", "B", "D"]] * 3
+
+    result = game.settle(lines=1, bet=10)
+
+    assert isinstance(result, RoundResult)
+    assert result.total_bet == 10
+    assert result.winnings == 30
+    assert result.winning_lines == [1]
+    assert result.balance == game.balance == 120
+
+
+def test_settle_does_not_prompt_or_print(monkeypatch, capsys) -> None:
+    """
+    The headless round must never read stdin or write to stdout.
+    """
+    monkeypatch.setattr("builtins.input", lambda _: pytest.fail("settle() asked for input"))
+    game = Game()
+    game.balance = 50
+
+    game.settle(lines=3, bet=1)
+
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("lines, bet", [(0, 10), (4, 10), (1, 0), (1, 101), (3, 10)])
+def test_settle_rejects_invalid_bets(lines: int, bet: int) -> None:
+    """
+    Out-of-range lines or bets, and total bets above the balance ($30 > $20), raise a
+    ValueError and leave the balance alone.
+    """
+    game = Game()
+    game.balance = 20
+
+    with pytest.raises(ValueError):
+        game.settle(lines, bet)
+    assert game.balance == 20
+
+
+def test_settle_round_with_any_machine() -> None:
+    """
+    Test the module-level settlement function on a machine that can only spin 'D'.
+    """
+    machine = SlotMachine(3, 3, {"D": 3}, {"D": 2})
+    result = settle_round(machine, balance=10, lines=3, bet=1)
+
+    assert result.winnings == 6
+    assert result.balance == 10 - 3 + 6
+
+
+def test_autoplay_streams_rounds_to_the_terminal(monkeypatch, capsys) -> None:
+    """
+    Autoplay never prompts: a forced loss of $3 per spin from $10 stops after 3 spins,
+    when the balance can no longer cover the bet.
+    """
+    monkeypatch.setattr("builtins.input", lambda _: pytest.fail("autoplay() asked for input"))
+    game = Game()
+    game.balance = 10
+    game.machine.spin = lambda: [["A", "B", "C"], ["B", "C", "D"], ["C", "D", "A"]]
+
+    assert game.autoplay(spins=50, lines=3, bet=1) == "balance"
+    assert game.balance == 1
+
+    out = capsys.readouterr().out
+    assert "Spin 3: no win | Balance: $1" in out
+    assert "Played 3 spins, net -$9. Balance: $1." in out
+
+    with pytest.raises(ValueError):
+        game.autoplay(spins=5, lines=4, bet=1)
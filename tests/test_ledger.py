@@ -0,0 +1,155 @@
+import errno
+import os
+import threading
+import time
+
+import pytest
+
+from services.game import Game
+from services.ledger import Ledger, grid_code, read_ledger
+
+
+def test_grid_code() -> None:
+    """
+    Test the compact grid encoding: columns separated by "/", symbols by ",".
+    """
+    assert grid_code([["A", "B", "C"], ["A", "C", "D"]]) == "A,B,C/A,C,D"
+
+
+def test_game_rounds_are_recorded(tmp_path) -> None:
+    """
+    Every settled round of a Game with a ledger ends up in the file, in order.
+    """
+    path = tmp_path / "rounds.jsonl"
+    with Ledger(str(path)) as ledger:
+        game = Game(ledger=ledger, session="player-1")
+        game.balance = 100
+        game.machine.spin = lambda: [["C", "B", "D"]] * 3
+        results = [game.settle(lines=1, bet=10) for _ in range(3)]
+
+    records = list(read_ledger(str(path)))
+
+    assert [record["balance"] for record in records] == [result.balance for result in results] == [120, 140, 160]
+    assert records[0]["session"] == "player-1"
+    assert records[0]["grid"] == "C,B,D/C,B,D/C,B,D"
+    assert records[0]["winnings"] == 30
+
+
+def test_records_are_batched(tmp_path) -> None:
+    """
+    With a long flush interval nothing is written until the batch fills up or flush() is called.
+    """
+    path = tmp_path / "rounds.jsonl"
+    ledger = Ledger(str(path), batch_size=1000, flush_interval=60)
+    try:
+        for i in range(10):
+            ledger.append({"n": i})
+        assert path.read_bytes() == b""
+
+        ledger.flush()
+        assert [record["n"] for record in read_ledger(str(path))] == list(range(10))
+    finally:
+        ledger.close()
+
+
+def test_concurrent_appends_are_not_lost(tmp_path) -> None:
+    """
+    Appends from several threads all land in the file, with batches flushed as they fill.
+    """
+    path = tmp_path / "rounds.jsonl"
+    with Ledger(str(path), batch_size=64) as ledger:
+        def write(thread: int) -> None:
+            for i in range(500):
+                ledger.append({"thread": thread, "n": i})
+
+        threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    records = list(read_ledger(str(path)))
+    assert len(records) == 2000
+    for t in range(4): # Every thread's records keep their order
+        assert [r["n"] for r in records if r["thread"] == t] == list(range(500))
+
+
+def test_partial_last_line_is_dropped(tmp_path) -> None:
+    """
+    A torn write left by a crash is skipped when reading and cut off when reopening,
+    so new records start on a clean line.
+    """
+    path = tmp_path / "rounds.jsonl"
+    path.write_bytes(b'{"n":1}\n{"n":2')
+
+    assert list(read_ledger(str(path))) == [{"n": 1}]
+
+    with Ledger(str(path)) as ledger:
+        ledger.append({"n": 3})
+
+    assert list(read_ledger(str(path))) == [{"n": 1}, {"n": 3}]
+
+
+def test_failed_flush_keeps_records(tmp_path, monkeypatch) -> None:
+    """
+    A write that fails (a full disk, say) keeps its batch pending without a partial line
+    in the file, the background thread keeps flushing, and the batch is written once
+    the disk recovers.
+    """
+    path = tmp_path / "rounds.jsonl"
+    ledger = Ledger(str(path), batch_size=1000, flush_interval=0.01)
+    real_fsync = os.fsync
+
+    def full_disk(fd: int) -> None:
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    try:
+        monkeypatch.setattr("services.ledger.os.fsync", full_disk)
+        ledger.append({"n": 1})
+        with pytest.raises(OSError):
+            ledger.flush()
+        time.sleep(0.05) # The background thread fails too, and must survive it
+        assert path.read_bytes() == b""
+
+        ledger.append({"n": 2})
+        monkeypatch.setattr("services.ledger.os.fsync", real_fsync)
+        ledger.flush()
+        assert [record["n"] for record in read_ledger(str(path))] == [1, 2]
+        assert ledger._flusher.is_alive()
+    finally:
+        ledger.close()
+
+
+def test_append_after_close_raises(tmp_path) -> None:
+    """
+    Records appended to a closed ledger are refused instead of silently dropped.
+    """
+    ledger = Ledger(str(tmp_path / "rounds.jsonl"))
+    ledger.close()
+
+    with pytest.raises(ValueError):
+        ledger.append({"n": 1})
+
+
+def test_startup_repair_waits_for_other_writers(tmp_path) -> None:
+    """
+    A worker opening the ledger while another worker is mid-append waits for the append
+    to finish instead of cutting the other worker's line off as a partial one.
+    """
+    fcntl = pytest.importorskip("fcntl")
+    path = tmp_path / "rounds.jsonl"
+
+    with open(path, "ab", buffering=0) as writer:
+        fcntl.flock(writer.fileno(), fcntl.LOCK_EX)
+        writer.write(b'{"n":1}\n{"n":') # Half of the other worker's batch
+
+        opened = threading.Thread(target=lambda: Ledger(str(path)).close())
+        opened.start()
+        time.sleep(0.05)
+        assert opened.is_alive() # Still waiting for the lock
+
+        writer.write(b'2}\n')
+        fcntl.flock(writer.fileno(), fcntl.LOCK_UN)
+        opened.join()
+
+    assert [record["n"] for record in read_ledger(str(path))] == [1, 2]
@@ -1,4 +1,10 @@
-from services.logic import SlotMachine
+from collections import Counter
+import pickle
+
+import pytest
+import numpy as np
+
+from services.logic import MAX_COLUMN_OUTCOMES, SlotMachine, column_outcomes
 
 # Sample test configuration (3x3 machine)
 SYMBOLS = {
@@ -135,4 +141,276 @@ def test_spin_structure() -> None:
         assert isinstance(col, list)
         assert len(col) == 3 # Three rows per column
         for symbol in col:
-            assert symbol in SYMBOLS.keys()
\ No newline at end of file
+            assert symbol in SYMBOLS.keys()
+
+def test_spin_draws_without_replacement() -> None:
+    """
+    Test that a column never contains more copies of a symbol than the pool holds.
+    With a pool of exactly three symbols, every column must be a permutation of it.
+    """
+    machine = SlotMachine(3, 4, {"A": 1, "B": 1, "C": 1}, SYMBOL_VALUES)
+
+    for _ in range(50):
+        for col in machine.spin():
+            assert sorted(col) == ["A", "B", "C"]
+
+
+def test_symbols_change_recompiles_pool() -> None:
+    """
+    Test that assigning new symbol frequencies is picked up by the next spin.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    machine.symbols = {"D": 3}
+
+    assert machine.spin() == [["D", "D", "D"]] * 3
+
+
+def test_pool_smaller_than_rows_rejected() -> None:
+    """
+    Test that a pool too small to fill a column raises a ValueError.
+    """
+    with pytest.raises(ValueError):
+        SlotMachine(3, 3, {"A": 1, "B": 1}, SYMBOL_VALUES)
+
+
+def test_spin_many_shape_and_codes() -> None:
+    """
+    Test that `spin_many()` returns an (n, cols, rows) array of valid symbol codes.
+    """
+    machine = SlotMachine(3, 4, SYMBOLS, SYMBOL_VALUES)
+    grids = machine.spin_many(100, np.random.default_rng(1))
+
+    assert grids.shape == (100, 4, 3)
+    assert grids.min() >= 0
+    assert grids.max() < len(SYMBOLS)
+    assert all(symbol in SYMBOLS for col in machine.decode(grids[0]) for symbol in col)
+
+
+def test_spin_many_draws_without_replacement() -> None:
+    """
+    Test that batched columns respect the pool, like `spin()`:
+    a pool of exactly three symbols means every column is a permutation of it.
+    """
+    machine = SlotMachine(3, 2, {"A": 1, "B": 1, "C": 1}, SYMBOL_VALUES)
+    grids = machine.spin_many(500, np.random.default_rng(2))
+
+    assert (np.sort(grids, axis=-1) == [0, 1, 2]).all()
+
+
+def test_spin_many_is_reproducible() -> None:
+    """
+    Test that the same seed gives the same batch of spins.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+
+    first = machine.spin_many(10, np.random.default_rng(7))
+    second = machine.spin_many(10, np.random.default_rng(7))
+    assert (first == second).all()
+
+
+def test_check_winnings_many_matches_check_winnings() -> None:
+    """
+    Test that batch evaluation agrees with `check_winnings()` spin by spin,
+    with lines and bets varying per spin.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    rng = np.random.default_rng(3)
+    grids = machine.spin_many(2000, rng)
+    lines = rng.integers(1, 4, size=2000)
+    bets = rng.integers(1, 101, size=2000)
+
+    winnings, masks = machine.check_winnings_many(grids, lines, bets)
+
+    for grid, line_count, bet, won, mask in zip(grids, lines, bets, winnings, masks):
+        expected, winning_lines = machine.check_winnings(machine.decode(grid), int(line_count), int(bet))
+        assert won == expected
+        assert int(mask) == sum(1 << (line - 1) for line in winning_lines)
+
+
+def test_check_winnings_many_scalar_bet() -> None:
+    """
+    Test batch evaluation with the same lines and bet for every spin.
+    Line 1 is all 'C' and line 3 is all 'D', as in `test_check_winnings_multiple_lines`.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    grid = np.array([[[2, 0, 3], [2, 1, 3], [2, 1, 3]]])
+
+    winnings, masks = machine.check_winnings_many(grid, lines=3, bet=5)
+    assert winnings.tolist() == [25]
+    assert masks.tolist() == [0b101]
+
+
+def test_check_winnings_diagonal_paylines() -> None:
+    """
+    Test that lines follow their configured rows, and that line numbers follow the
+    payline order rather than the rows.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, paylines=[(0, 1, 2), (2, 1, 0), (1, 1, 1)])
+    columns = [
+        ["A", "C", "B"],
+        ["D", "A", "C"],
+        ["C", "B", "A"]
+    ]
+    winnings, lines = machine.check_winnings(columns, lines=3, bet=2)
+    assert winnings == 10 # Only the top-left to bottom-right diagonal: A = 5 * 2
+    assert lines == [1]
+
+
+def test_check_winnings_tiered_runs() -> None:
+    """
+    Test that left-to-right runs pay by their length, that a run of 4 without its own tier
+    pays the next shorter one, and that a match not starting in the first column loses.
+    """
+    machine = SlotMachine(3, 5, SYMBOLS, {"A": {3: 10, 5: 100}, "B": 4, "C": 3, "D": 2})
+    columns = [
+        ["A", "B", "D"],
+        ["A", "C", "C"],
+        ["A", "C", "C"],
+        ["A", "C", "C"],
+        ["C", "C", "C"]
+    ]
+    winnings, lines = machine.check_winnings(columns, lines=3, bet=1)
+    assert winnings == 10 # A run of 4 A's pays the 3-of-a-kind tier, line 3 starts with D
+    assert lines == [1]
+
+
+def test_invalid_paylines_rejected() -> None:
+    """
+    Test that a payline must give an existing row for every column.
+    """
+    with pytest.raises(ValueError):
+        SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, paylines=[(0, 1)])
+    with pytest.raises(ValueError):
+        SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, paylines=[(0, 1, 3)])
+    with pytest.raises(ValueError):
+        SlotMachine(3, 3, SYMBOLS, {"A": {4: 10}, "B": 4, "C": 3, "D": 2})
+
+
+def test_check_winnings_many_matches_check_winnings_with_paylines() -> None:
+    """
+    Test the batch evaluation against `check_winnings()` on a machine with zigzag
+    paylines and tiered runs.
+    """
+    paylines = [(1, 1, 1, 1, 1), (0, 1, 2, 1, 0), (2, 1, 0, 1, 2), (0, 0, 1, 2, 2)]
+    values = {"A": {2: 1, 3: 5, 5: 50}, "B": {3: 4, 4: 10}, "C": 3, "D": {3: 2}}
+    machine = SlotMachine(3, 5, SYMBOLS, values, rng=5, paylines=paylines)
+    grids = machine.spin_many(2000)
+    lines = np.arange(2000) % 4 + 1
+
+    winnings, masks = machine.check_winnings_many(grids, lines, 3)
+
+    for grid, line_count, won, mask in zip(grids, lines, winnings, masks):
+        expected, winning_lines = machine.check_winnings(machine.decode(grid), int(line_count), 3)
+        assert won == expected
+        assert [line + 1 for line in range(4) if int(mask) >> line & 1] == winning_lines
+
+
+def test_column_outcomes_weights() -> None:
+    """
+    Test that the column-outcome weights count ordered draws: 20 * 19 * 18 in total,
+    and A, A, B (two A's, then one of four B's) has 2 * 1 * 4 ways.
+    """
+    columns, weights = column_outcomes(3, tuple(SYMBOLS.items()))
+
+    assert len(columns) == len(set(columns)) == 4 ** 3 - 1 # Only two A's: no A, A, A
+    assert sum(weights) == 20 * 19 * 18
+    assert dict(zip(columns, weights))[("A", "A", "B")] == 2 * 1 * 4
+
+
+def test_column_outcomes_too_many() -> None:
+    """
+    Test that machines with more possible columns than `MAX_COLUMN_OUTCOMES` get no table
+    and keep spinning without one.
+    """
+    symbols = {f"S{index}": 2 for index in range(20)}
+    assert 20 ** 3 > MAX_COLUMN_OUTCOMES
+    assert column_outcomes(3, tuple(symbols.items())) is None
+
+    machine = SlotMachine(3, 3, symbols, {symbol: 1 for symbol in symbols}, cache=True)
+    assert all(len(col) == 3 for col in machine.spin())
+
+
+def test_cached_spin_distribution() -> None:
+    """
+    Test that cached spins draw columns with the same frequencies as symbol-by-symbol draws.
+    """
+    machine = SlotMachine(2, 1, {"A": 1, "B": 2}, {"A": 1, "B": 1}, rng=3, cache=True)
+    counts = Counter(tuple(machine.spin()[0]) for _ in range(6000))
+
+    # A, B and B, A take 1 * 2 of the 3 * 2 ordered draws each, B, B takes 2 * 1
+    assert set(counts) == {("A", "B"), ("B", "A"), ("B", "B")}
+    for count in counts.values():
+        assert abs(count - 2000) < 200
+
+    grids = machine.spin_many(6000, np.random.default_rng(3))
+    assert not (grids == 0).all(axis=2).any() # Never A, A
+    assert abs((grids == 0).any(axis=2).mean() - 2 / 3) < 0.03
+
+
+def test_cached_check_winnings_matches_uncached() -> None:
+    """
+    Test that memoized evaluation agrees with the uncached machine, on repeated grids
+    and after the paytable changes.
+    """
+    paylines = [(1, 1, 1), (0, 1, 2), (2, 1, 0)]
+    cached = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, rng=4, paylines=paylines, cache=True)
+    plain = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, paylines=paylines)
+
+    spins = [cached.spin() for _ in range(300)]
+    for columns in spins + spins:
+        assert cached.check_winnings(columns, 3, 2) == plain.check_winnings(columns, 3, 2)
+        assert cached.check_winnings(columns, 1, 5) == plain.check_winnings(columns, 1, 5)
+
+    cached.symbol_values = plain.symbol_values = {"A": 50, "B": 40, "C": 30, "D": 20}
+    for columns in spins:
+        assert cached.check_winnings(columns, 3, 1) == plain.check_winnings(columns, 3, 1)
+
+
+def test_batch_tables_follow_configuration_changes() -> None:
+    """
+    Test that the batch API's lookup arrays, compiled on first use, are rebuilt after the
+    symbols, paytable or paylines change.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    grids = machine.spin_many(10, np.random.default_rng(5))
+    machine.check_winnings_many(grids, 3, 1)
+
+    machine.symbols = {"D": 3}
+    machine.symbol_values = {"D": 7}
+    grids = machine.spin_many(4, np.random.default_rng(5))
+    assert (grids == 0).all()
+
+    winnings, masks = machine.check_winnings_many(grids, 3, 1)
+    assert winnings.tolist() == [21] * 4
+    assert masks.tolist() == [0b111] * 4
+
+    machine.paylines = [(0, 1, 2)]
+    winnings, _ = machine.check_winnings_many(grids, 1, 2)
+    assert winnings.tolist() == [14] * 4
+
+
+def test_spin_many_column_distribution() -> None:
+    """
+    Test that batched columns follow the same ordered draw without replacement as `spin()`:
+    with one 'A', two 'B' and one 'C', each of the 12 orderings is equally likely.
+    """
+    machine = SlotMachine(3, 1, {"A": 1, "B": 2, "C": 1}, {"A": 0, "B": 0, "C": 0})
+    grids = machine.spin_many(60_000, np.random.default_rng(8))
+    counts = Counter(tuple(machine.decode(grid)[0]) for grid in grids)
+
+    assert len(counts) == 12
+    for count in counts.values():
+        assert abs(count - 5000) < 400
+
+
+def test_single_column_machine_pickles() -> None:
+    """
+    Test that a one-column machine survives pickling, as it must to reach worker
+    processes, and still scores the same afterwards.
+    """
+    machine = SlotMachine(3, 1, SYMBOLS, SYMBOL_VALUES, rng=8, paylines=[(0,), (1,), (2,)], cache=True)
+    copy = pickle.loads(pickle.dumps(machine))
+
+    for _ in range(50):
+        columns = machine.spin()
+        assert copy.check_winnings(columns, 3, 2) == machine.check_winnings(columns, 3, 2)
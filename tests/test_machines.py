@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from services.game import Game
+from services.machines import DEFAULT_MACHINE, MachineRegistry, load_definition, parse_definition
+
+VALID = {
+    "rows": 3,
+    "cols": 3,
+    "max_lines": 3,
+    "min_bet": 1,
+    "max_bet": 100,
+    "symbol_count": {"A": 2, "B": 4},
+    "symbol_values": {"A": 5, "B": 4},
+}
+
+
+def write_definition(path, **changes) -> None:
+    """
+    Write a JSON machine definition, and push its modification time forward so a
+    registry notices the change even within the file system's timestamp resolution.
+    """
+    path.write_text(json.dumps({**VALID, **changes}))
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_default_machine_matches_classic_game() -> None:
+    """
+    The bundled default machine is the original 3x3 game configuration.
+    """
+    assert DEFAULT_MACHINE.id == "classic"
+    assert (DEFAULT_MACHINE.rows, DEFAULT_MACHINE.cols, DEFAULT_MACHINE.max_lines) == (3, 3, 3)
+    assert DEFAULT_MACHINE.symbol_count == {"A": 2, "B": 4, "C": 6, "D": 8}
+    assert DEFAULT_MACHINE.symbol_values == {"A": 5, "B": 4, "C": 3, "D": 2}
+    assert (Game.MIN_BET, Game.MAX_BET) == (1, 100)
+
+
+@pytest.mark.parametrize("changes", [
+    {"rows": 0},
+    {"cols": "3"},
+    {"max_lines": 4},
+    {"min_bet": 10, "max_bet": 5},
+    {"symbol_count": {}},
+    {"symbol_count": {"A": 1, "B": 1}},           # Pool smaller than a column
+    {"symbol_values": {"A": 5}},                  # Symbols do not match
+    {"symbol_values": {"A": 5, "B": -1}},
+    {"symbol_values": {"A": {"4": 5}, "B": 1}},   # Run longer than the grid
+    {"symbol_values": {"A": {"x": 5}, "B": 1}},
+    {"paylines": [[0, 1, 2], [0, 1]]},
+    {"paylines": [[0, 1, 3]]},
+    {"paylines": [[0, 1, 2]]},                    # max_lines 3 with a single payline
+    {"win_mode": "scatter"},
+    {"win_mode": "ways"},                         # Ways machines have a single line
+    {"win_mode": "ways", "max_lines": 1, "paylines": [[0, 1, 2]]},
+    {"cache": "yes"},
+])
+def test_invalid_definitions_are_rejected(changes) -> None:
+    """
+    Test that every invalid setting raises a ValueError.
+    """
+    with pytest.raises(ValueError):
+        parse_definition("broken", {**VALID, **changes})
+
+
+def test_load_json_definition(tmp_path) -> None:
+    """
+    JSON files load like TOML ones, with the file name as the machine id.
+    """
+    path = tmp_path / "small.json"
+    write_definition(path, name="Small")
+    definition = load_definition(path)
+
+    assert definition.id == "small"
+    assert definition.name == "Small"
+    assert definition.build().spin_many(5).shape == (5, 3, 3)
+
+
+def test_registry_hot_reload(tmp_path) -> None:
+    """
+    Changed files are recompiled, unchanged machines are reused, bad edits keep the
+    previous version, and added or removed files appear or disappear.
+    """
+    write_definition(tmp_path / "one.json")
+    write_definition(tmp_path / "two.json")
+    registry = MachineRegistry(tmp_path, check_interval=0)
+    first, untouched = registry.get("one"), registry.get("two")
+
+    write_definition(tmp_path / "one.json", max_bet=50)
+    assert registry.definition("one").max_bet == 50
+    assert registry.get("one") is not first
+    assert registry.get("two") is untouched
+
+    (tmp_path / "one.json").write_text("{ not json")
+    os.utime(tmp_path / "one.json", (0, 10 ** 9))
+    assert registry.definition("one").max_bet == 50
+    assert "one" in registry.errors
+
+    (tmp_path / "two.json").unlink()
+    write_definition(tmp_path / "three.json")
+    assert registry.ids() == ["one", "three"]
+    with pytest.raises(KeyError):
+        registry.get("two")
+
+
+def test_registry_reload_is_safe_for_readers(tmp_path) -> None:
+    """
+    Lookups running while reloads add and remove machines never see a half-updated table,
+    and threads that find the check interval expired together rescan the directory once.
+    """
+    write_definition(tmp_path / "one.json")
+    registry = MachineRegistry(tmp_path, check_interval=0)
+    failures = []
+
+    def read() -> None:
+        for _ in range(2000):
+            try:
+                ids = registry.ids()
+                assert "one" in ids
+            except Exception as error: # Reported from the main thread
+                failures.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for i in range(50):
+        write_definition(tmp_path / f"extra-{i % 5}.json")
+        (tmp_path / f"extra-{(i + 2) % 5}.json").unlink(missing_ok=True)
+        registry.reload()
+    for reader in readers:
+        reader.join()
+    assert failures == []
+
+    registry = MachineRegistry(tmp_path, check_interval=60)
+    scans = []
+    rescan = registry._reload
+
+    def slow_reload() -> None:
+        scans.append(1)
+        time.sleep(0.05) # Keep the others waiting on the lock
+        rescan()
+
+    registry._reload = slow_reload
+    registry._last_check = time.monotonic() - 61
+    lookups = [threading.Thread(target=registry.get, args=("one",)) for _ in range(8)]
+    for lookup in lookups:
+        lookup.start()
+    for lookup in lookups:
+        lookup.join()
+    assert len(scans) == 1
+
+
+def test_game_plays_a_loaded_definition(tmp_path) -> None:
+    """
+    A Game built from a definition applies that definition's betting limits.
+    """
+    write_definition(tmp_path / "cheap.json", max_bet=5, max_lines=2)
+    game = Game(definition=load_definition(tmp_path / "cheap.json"))
+    game.balance = 100
+
+    with pytest.raises(ValueError):
+        game.settle(lines=1, bet=6)
+    with pytest.raises(ValueError):
+        game.settle(lines=3, bet=1)
+    assert game.settle(lines=2, bet=5).total_bet == 10
+
+
+def test_paylines_and_tiered_pays_are_loaded() -> None:
+    """
+    The bundled 9-line machine loads its paylines and converts run lengths to integers.
+    """
+    registry = MachineRegistry()
+    definition, machine = registry.lookup("fives")
+
+    assert definition.max_lines == len(machine.paylines) == 9
+    assert machine.paylines[3] == (0, 1, 2, 1, 0)
+    assert definition.symbol_values["A"] == {3: 50, 4: 250, 5: 2000}
+
+
+def test_cluster_paytable_runs_up_to_grid_size() -> None:
+    """
+    Cluster machines price cluster sizes up to the number of cells.
+    """
+    definition = parse_definition("clusters", {
+        **VALID, "win_mode": "clusters", "max_lines": 1, "symbol_values": {"A": {"9": 5}, "B": 1},
+    })
+    machine = definition.build()
+
+    assert machine.line_count == 1
+    assert machine.check_winnings([["A"] * 3] * 3, 1, 2) == (10, [1])
@@ -137,4 +137,119 @@ def test_run_quit_immediately(monkeypatch, capsys) -> None:
 
     captured = capsys.readouterr()
     assert "Current balance: $100" in captured.out
-    assert "You left with $100" in captured.out
\ No newline at end of file
+    assert "You left with $100" in captured.out
+
+# --- web app tests ---
+
+def make_client(deposit: str = "100"):
+    """
+    Create a Flask test client with an active session holding the given deposit.
+    """
+    from main import app
+
+    client = app.test_client()
+    client.post("/", data={"deposit_amount": deposit})
+    return client
+
+
+def test_api_spin_settles_round(monkeypatch) -> None:
+    """
+    Force a winning spin through the JSON API: one line of 'C' (value 3) at $10.
+
+    Expected result: balance 100 - 10 + 30 = 120, also shown on /play afterwards.
+    """
+    import main
+
+    client = make_client("100")
+    monkeypatch.setattr(main.registry.get("classic"), "spin", lambda: [["C", "B", "D"]] * 3)
+
+    response = client.post("/api/spin", json={"lines": 1, "bet": 10})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "columns": [["C", "B", "D"]] * 3,
+        "winnings": 30,
+        "winning_lines": [1],
+        "balance": 120,
+    }
+    assert "$120" in client.get("/play").get_data(as_text=True)
+
+
+def test_api_spin_keeps_balance_out_of_cookie() -> None:
+    """
+    The session cookie only carries the session id, so spinning must not set it again.
+    """
+    client = make_client("100")
+    response = client.post("/api/spin", json={"lines": 1, "bet": 1})
+
+    assert response.status_code == 200
+    assert "Set-Cookie" not in response.headers
+
+
+def test_api_spin_rejects_bad_requests() -> None:
+    """
+    Invalid bets, bets above the balance and missing sessions are rejected with an error.
+    """
+    from main import app
+
+    client = make_client("20")
+    assert client.post("/api/spin", json={"lines": 4, "bet": 1}).status_code == 400
+    assert client.post("/api/spin", json={"lines": 1, "bet": "10"}).status_code == 400
+    assert client.post("/api/spin", json={"lines": True, "bet": 1}).status_code == 400 # JSON true is not 1
+    assert client.post("/api/spin", json={"lines": 1, "bet": True}).status_code == 400
+    assert client.post("/api/spin", json={"lines": 3, "bet": 10}).status_code == 400 # $30 > $20
+    assert app.test_client().post("/api/spin", json={"lines": 1, "bet": 1}).status_code == 401
+
+
+def test_api_autoplay_streams_batches(monkeypatch) -> None:
+    """
+    Autoplay a forced win of one line of 'C' (value 3) at $10, with a stop-win of $50.
+
+    Expected result: every spin nets +$20, so the run stops after 3 spins at $160.
+    """
+    import main
+
+    client = make_client("100")
+    monkeypatch.setattr(main.registry.get("classic"), "spin", lambda: [["C", "B", "D"]] * 3)
+
+    created = client.post("/api/autoplay", json={"lines": 1, "bet": 10, "spins": 100, "stop_win": 50})
+    assert created.status_code == 201
+    stream = f"/api/autoplay/{created.get_json()['run']}"
+
+    assert main.app.test_client().get(stream).status_code == 404 # Another session cannot start it
+    response = client.get(stream)
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/event-stream"
+    assert body.count('"winnings":30') == 3
+    assert body.endswith('event: done\ndata: {"reason":"stop_win","spins":3,"balance":160}\n\n')
+    assert "$160" in client.get("/play").get_data(as_text=True)
+    assert client.get(stream).status_code == 404 # A run plays once
+
+    assert client.get("/api/autoplay?lines=1&bet=1&spins=5").status_code == 405 # A GET never starts a run
+    assert client.post("/api/autoplay", data={"lines": 1, "bet": 1, "spins": 5}).status_code == 400 # Forms are refused
+    assert client.post("/api/autoplay", json={"lines": 1, "bet": 10}).status_code == 400
+    assert client.post("/api/autoplay", json={"lines": 1, "bet": 1, "spins": True}).status_code == 400
+    assert main.app.test_client().post("/api/autoplay", json={"lines": 1, "bet": 1, "spins": 5}).status_code == 401
+
+
+def test_metrics_endpoint(monkeypatch) -> None:
+    """
+    /metrics serves the Prometheus text format: empty while metrics are disabled, and the
+    recorded series once enabled.
+    """
+    import main
+    from services.metrics import Metrics
+
+    client = main.app.test_client()
+    monkeypatch.setattr(main, "METRICS", Metrics(enabled=False))
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert response.get_data(as_text=True) == ""
+
+    enabled = Metrics(enabled=True)
+    enabled.counter("slot_spins_total", "Rounds settled.").inc(3)
+    monkeypatch.setattr(main, "METRICS", enabled)
+    assert "slot_spins_total 3" in client.get("/metrics").get_data(as_text=True)
@@ -0,0 +1,74 @@
+import pytest
+
+from services.metrics import EXPORT_BOUNDS, Histogram, Metrics
+
+
+def test_histogram_percentiles_are_precise() -> None:
+    """
+    Percentiles land within the bucket precision (1/16) of the true value, across many
+    orders of magnitude.
+    """
+    histogram = Histogram()
+    values = list(range(1, 1001)) + [10 ** 9] # 1-1000 ns and one 1 s outlier
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.total == sum(values)
+    assert histogram.percentile(50) == pytest.approx(500, rel=1 / 16)
+    assert histogram.percentile(99) == pytest.approx(991, rel=1 / 16)
+    assert histogram.percentile(100) == pytest.approx(10 ** 9, rel=1 / 16)
+    assert Histogram().percentile(50) == 0
+
+
+def test_histogram_cumulative_buckets() -> None:
+    """
+    Cumulative counts only include values whose bucket lies below the bound.
+    """
+    histogram = Histogram()
+    for nanoseconds in (500, 2_000, 2_000, 40_000):
+        histogram.record(nanoseconds)
+
+    counts = dict(zip(EXPORT_BOUNDS, histogram.cumulative(EXPORT_BOUNDS)))
+    assert counts[1e-6] == 1
+    assert counts[2.5e-6] == 3
+    assert counts[5e-5] == 4
+
+
+def test_disabled_metrics_do_not_wrap() -> None:
+    """
+    While disabled, `timed` hands back the function itself and nothing is exported.
+    """
+    metrics = Metrics(enabled=False)
+
+    def spin() -> str:
+        return "spun"
+
+    assert metrics.timed("slot_spin_seconds", "Spin time.")(spin) is spin
+    assert metrics.render() == ""
+
+
+def test_timed_and_render() -> None:
+    """
+    Timed calls are recorded, exceptions included, and exported as Prometheus histograms
+    and counters with escaped labels.
+    """
+    metrics = Metrics(enabled=True)
+
+    @metrics.timed("slot_spin_seconds", "Spin time.")
+    def spin(fail: bool = False) -> str:
+        if fail:
+            raise ValueError("broken reel")
+        return "spun"
+
+    assert spin() == "spun"
+    with pytest.raises(ValueError):
+        spin(fail=True)
+    metrics.counter("slot_spins_total", "Rounds settled.", {"route": 'say "hi"'}).inc(2)
+
+    text = metrics.render()
+    assert "# TYPE slot_spin_seconds histogram" in text
+    assert 'slot_spin_seconds_bucket{le="+Inf"} 2' in text
+    assert "slot_spin_seconds_count 2" in text
+    assert '# TYPE slot_spins_total counter' in text
+    assert 'slot_spins_total{route="say \\"hi\\""} 2' in text
@@ -0,0 +1,86 @@
+import pytest
+
+from services.analytics import hit_frequency, rtp, variance
+from services.logic import SlotMachine
+from services.optimizer import Targets, line_win_odds, optimize_paytable
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def test_line_win_odds() -> None:
+    """
+    Test the per-symbol chance of a full line on a 3-column machine.
+    """
+    odds = line_win_odds((2, 4, 6, 8), 3)
+
+    assert odds.tolist() == pytest.approx([0.1 ** 3, 0.2 ** 3, 0.3 ** 3, 0.4 ** 3])
+    assert line_win_odds((2, 4, 6, 8), 3) is odds # Cached per counts
+
+
+def test_candidates_match_analytics() -> None:
+    """
+    Every candidate must meet the targets, and its reported figures must equal the exact
+    single-line results of a machine built from it.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    targets = Targets(0.95, 0.005, hit_frequency=0.15, min_variance=5)
+
+    result = optimize_paytable(machine, targets, range(1, 9), range(1, 16), workers=1)
+
+    assert result["evaluated"] > 0
+    assert result["candidates"]
+    for candidate in result["candidates"]:
+        built = SlotMachine(3, 3, candidate["symbol_count"], candidate["symbol_values"])
+        assert candidate["rtp"] == pytest.approx(rtp(built))
+        assert candidate["hit_frequency"] == pytest.approx(hit_frequency(built, 1))
+        assert candidate["variance"] == pytest.approx(variance(built, 1))
+
+        assert abs(candidate["rtp"] - 0.95) <= 0.005
+        assert abs(candidate["hit_frequency"] - 0.15) <= 0.02
+        assert candidate["variance"] >= 5
+        assert max(candidate["symbol_values"].values()) <= 15
+
+
+def test_monotonic_and_constraints() -> None:
+    """
+    Test that monotonic searches never let a commoner symbol pay more than a rarer one,
+    that the pool size and payout cap are respected, and that the pool gives the same result.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    targets = Targets(0.9, 0.01)
+
+    result = optimize_paytable(machine, targets, range(1, 9), range(1, 31), max_payout=12, pool_size=20, workers=1)
+
+    for candidate in result["candidates"]:
+        counts, values = candidate["symbol_count"], candidate["symbol_values"]
+        assert sum(counts.values()) == 20
+        assert max(values.values()) <= 12
+        for rarer in counts:
+            for commoner in counts:
+                if counts[rarer] < counts[commoner]:
+                    assert values[rarer] >= values[commoner]
+
+    pooled = optimize_paytable(machine, targets, range(1, 9), range(1, 31), max_payout=12, pool_size=20, workers=2)
+    assert pooled == result
+
+
+def test_rejects_other_win_modes() -> None:
+    """
+    Test that ways and cluster machines, whose lines are not independent, are refused.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, win_mode="ways")
+
+    with pytest.raises(ValueError):
+        optimize_paytable(machine, Targets(0.9), range(1, 4), range(1, 4), workers=1)
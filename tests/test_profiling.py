@@ -0,0 +1,104 @@
+import pstats
+import time
+import tracemalloc
+
+import pytest
+
+from services.logic import SlotMachine
+from services.profiling import StackSampler, profile_call, profile_rounds, profile_simulation, trace_allocations
+from services.simulation import simulate
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def busy_wait(seconds: float) -> None:
+    """
+    Keep the interpreter busy in this function, so the sampler finds it on the stack.
+    """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_rounds_with_cprofile(tmp_path) -> None:
+    """
+    The pstats file loads and attributes time to `spin`, and the allocation report
+    points at the spin loop.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, rng=1)
+    files = profile_rounds(machine, 500, 3, 1, tmp_path, trace_rounds=200)
+
+    stats = pstats.Stats(str(files["pstats"]))
+    assert any(function == "spin" for _, _, function in stats.stats)
+    assert "settle_round" in files["report"].read_text()
+
+    assert "logic.py" in files["allocations"].read_text()
+    assert tracemalloc.Snapshot.load(str(files["snapshot"])).statistics("lineno")
+    assert not tracemalloc.is_tracing()
+
+
+def test_profile_simulation_traces_a_few_chunks(tmp_path) -> None:
+    """
+    The profiled run covers every spin and returns its totals, which match an unprofiled
+    run, while tracemalloc only replays the first chunk and sees what it keeps alive.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    chunks = []
+
+    totals, files = profile_simulation(machine, 250_000, 3, 1, tmp_path, seed=4, trace_chunks=1, progress=chunks.append)
+
+    assert len(chunks) == 3
+    assert totals.summary() == simulate(machine, 250_000, 3, 1, seed=4, workers=1)
+    assert "simulation.py" in files["allocations"].read_text()
+    assert not tracemalloc.is_tracing()
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path) -> None:
+    """
+    Every line of the collapsed output is a ;-separated stack and a sample count.
+    """
+    files = profile_call(lambda: busy_wait(0.1), tmp_path, "sampling", interval=0.001)
+    lines = files["collapsed"].read_text().splitlines()
+
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any("busy_wait (test_profiling.py:" in line for line in lines)
+
+
+def test_sampler_counts_samples() -> None:
+    """
+    The sampler takes samples of the calling thread until it is stopped.
+    """
+    with StackSampler(interval=0.001) as sampler:
+        busy_wait(0.05)
+    assert sum(sampler.stacks.values()) > 0
+
+
+def test_trace_allocations_sees_live_results(tmp_path) -> None:
+    """
+    Memory still held when the function returns is reported by line.
+    """
+    files = trace_allocations(lambda: [bytearray(1000) for _ in range(100)], tmp_path)
+    assert "test_profiling.py" in files["allocations"].read_text()
+
+
+def test_unknown_profiler_rejected(tmp_path) -> None:
+    """
+    Only cProfile and the sampling profiler are supported.
+    """
+    with pytest.raises(ValueError):
+        profile_call(lambda: None, tmp_path, "perf")
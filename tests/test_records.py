@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from services.logic import SlotMachine
+from services.records import RecordWriter, open_records, pack_grids, record_dtype, replay, unpack_grids
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def write_spins(path, machine: SlotMachine, n: int, seed: int):
+    """
+    Spin `n` times with 1-3 lines and $1-$10 bets, and record the spins to `path`.
+    """
+    rng = np.random.default_rng(seed)
+    grids = machine.spin_many(n, rng)
+    lines = rng.integers(1, 4, size=n)
+    bets = rng.integers(1, 11, size=n)
+    winnings, _ = machine.check_winnings_many(grids, lines, bets)
+
+    with RecordWriter(str(path), machine) as writer:
+        writer.write(grids[: n // 2], lines[: n // 2], bets[: n // 2], winnings[: n // 2])
+        writer.write(grids[n // 2:], lines[n // 2:], bets[n // 2:], winnings[n // 2:])
+
+    return grids, lines, bets, winnings
+
+
+def test_default_grid_packs_into_three_bytes() -> None:
+    """
+    Nine 2-bit codes take 18 bits, so a default 3x3 grid fits in 3 bytes.
+    """
+    assert record_dtype(3, 3, 4)["grid"].shape == (3,)
+
+
+@pytest.mark.parametrize("symbols", [2, 4, 5, 300])
+def test_pack_unpack_round_trip(symbols: int) -> None:
+    """
+    Test that packing and unpacking restores the grids for several alphabet sizes.
+    """
+    grids = np.random.default_rng(0).integers(0, symbols, size=(50, 5, 4))
+
+    packed = pack_grids(grids, symbols)
+    assert (unpack_grids(packed, 4, 5, symbols) == grids).all()
+
+
+def test_records_round_trip_through_memory_map(tmp_path) -> None:
+    """
+    Test that the memory-mapped records hold exactly what was written.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    path = tmp_path / "spins.rec"
+    grids, lines, bets, winnings = write_spins(path, machine, 1000, seed=1)
+
+    meta, records = open_records(str(path))
+
+    assert isinstance(records, np.memmap)
+    assert meta["symbols"] == ["A", "B", "C", "D"]
+    assert (unpack_grids(records["grid"], 3, 3, 4) == grids).all()
+    assert (records["lines"] == lines).all()
+    assert (records["bet"] == bets).all()
+    assert (records["winnings"] == winnings).all()
+
+
+def test_replay_under_new_paytable(tmp_path) -> None:
+    """
+    Replaying with the recording paytable reproduces the recorded winnings;
+    doubling every value doubles them.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    path = tmp_path / "spins.rec"
+    write_spins(path, machine, 5000, seed=2)
+
+    same = replay(str(path), machine, chunk=999)
+    assert same["spins"] == 5000
+    assert same["replayed_winnings"] == same["recorded_winnings"]
+
+    doubled = SlotMachine(3, 3, SYMBOLS, {symbol: value * 2 for symbol, value in SYMBOL_VALUES.items()})
+    assert replay(str(path), doubled)["replayed_winnings"] == 2 * same["recorded_winnings"]
+
+
+def test_replay_remaps_symbol_order(tmp_path) -> None:
+    """
+    A machine listing the same symbols in another order still replays correctly.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    path = tmp_path / "spins.rec"
+    write_spins(path, machine, 2000, seed=3)
+
+    reordered = SlotMachine(3, 3, dict(reversed(list(SYMBOLS.items()))), SYMBOL_VALUES)
+    result = replay(str(path), reordered)
+    assert result["replayed_winnings"] == result["recorded_winnings"]
+
+
+def test_invalid_files_are_rejected(tmp_path) -> None:
+    """
+    Test that other files and mismatched machines raise a ValueError.
+    """
+    path = tmp_path / "not-records.bin"
+    path.write_bytes(b"hello world")
+    with pytest.raises(ValueError):
+        open_records(str(path))
+
+    records = tmp_path / "spins.rec"
+    write_spins(records, SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES), 10, seed=4)
+    with pytest.raises(ValueError):
+        replay(str(records), SlotMachine(3, 3, {"A": 3}, {"A": 1}))
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.logic import SlotMachine
+from services.rng import BufferedRandom, make_rng
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def test_buffered_random_range() -> None:
+    """
+    Test that BufferedRandom stays within range across several block refills.
+    """
+    rng = BufferedRandom(np.random.default_rng(0), block_size=16)
+    values = [rng.randrange(3, 7) for _ in range(200)]
+
+    assert min(values) == 3
+    assert max(values) == 6
+
+
+def test_make_rng_sources() -> None:
+    """
+    Test the conversion of every supported random source.
+    """
+    seeded = random.Random(5)
+
+    assert make_rng(seeded) is seeded
+    assert isinstance(make_rng(None), random.Random)
+    assert isinstance(make_rng(42), random.Random)
+    assert isinstance(make_rng(np.random.Generator(np.random.Philox(1))), BufferedRandom)
+
+    with pytest.raises(TypeError):
+        make_rng("not a random source")
+
+
+@pytest.mark.parametrize("source", [lambda: 9, lambda: random.Random(9), lambda: np.random.default_rng(9)])
+def test_seeded_machines_spin_identically(source) -> None:
+    """
+    Two machines seeded the same way must produce the same spins and batches,
+    independently of the global `random` module.
+    """
+    first = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, rng=source())
+    second = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES, rng=source())
+    random.seed(1)
+
+    assert [first.spin() for _ in range(20)] == [second.spin() for _ in range(20)]
+    assert (first.spin_many(50) == second.spin_many(50)).all()
+
+
+def test_unseeded_machines_are_independent() -> None:
+    """
+    Machines created without a random source must not share one stream.
+    """
+    assert SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES).rng is not SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES).rng
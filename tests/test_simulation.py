@@ -0,0 +1,98 @@
+import pytest
+
+from services.analytics import rtp
+from services.logic import SlotMachine
+from services.machines import DEFAULT_MACHINE
+from services.simulation import iter_simulation, simulate
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+
+def test_simulate_is_reproducible_across_worker_counts() -> None:
+    """
+    The same seed must give identical results whether chunks run in-process or in a pool.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+
+    inline = simulate(machine, 250_000, lines=3, bet=2, seed=11, workers=1)
+    pooled = simulate(machine, 250_000, lines=3, bet=2, seed=11, workers=2)
+
+    assert inline == pooled
+
+
+def test_simulate_totals() -> None:
+    """
+    Test the aggregate bookkeeping and that the simulated RTP is close to the exact one.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    summary = simulate(machine, 200_000, lines=2, bet=5, seed=3, workers=1, session_spins=50)
+
+    assert summary["spins"] == 200_000
+    assert summary["wagered"] == 200_000 * 2 * 5
+    assert summary["sessions"] == 4_000
+    assert len(summary["balance_percentiles"]["50"]) == 50
+    assert summary["rtp"] == pytest.approx(rtp(machine, 2), abs=0.02)
+
+
+def test_iter_simulation_streams_partial_totals() -> None:
+    """
+    Test that running totals are yielded once per chunk and only ever grow.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    counts = [totals.spins for totals in iter_simulation(machine, 250_000, 1, 1, seed=5, workers=1)]
+
+    assert counts == [100_000, 200_000, 250_000]
+
+
+def test_simulate_rejects_invalid_lines() -> None:
+    """
+    Test that betting on more lines than rows raises a ValueError.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    with pytest.raises(ValueError):
+        simulate(machine, 10, lines=4, bet=1, workers=1)
+
+
+def test_trajectories_are_sampled(monkeypatch) -> None:
+    """
+    Test that only a bounded sample of sessions is kept, and that the sample does not
+    depend on the order in which chunks are merged.
+    """
+    monkeypatch.setattr("services.simulation.TRAJECTORY_SAMPLE", 300)
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+
+    chunks = list(iter_simulation(machine, 250_000, 1, 1, seed=7, workers=1, session_spins=200))
+    totals = chunks[-1]
+    assert totals.sessions == 1250
+    assert totals.trajectories.shape == (300, 200)
+
+    inline = simulate(machine, 250_000, lines=1, bet=1, seed=7, workers=1, session_spins=200)
+    pooled = simulate(machine, 250_000, lines=1, bet=1, seed=7, workers=2, session_spins=200)
+    assert inline == pooled
+    assert inline["sessions"] == 1250
+
+
+def test_pooled_simulation_of_the_default_machine() -> None:
+    """
+    The default machine has the outcome cache on, and must still reach worker processes:
+    pooled and in-process runs give the same totals.
+    """
+    machine = DEFAULT_MACHINE.build()
+    assert machine.cache
+
+    pooled = list(iter_simulation(machine, 150_000, 3, 1, seed=9, workers=2))[-1]
+    inline = list(iter_simulation(machine, 150_000, 3, 1, seed=9, workers=1))[-1]
+
+    assert pooled.summary() == inline.summary()
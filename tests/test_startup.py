@@ -0,0 +1,73 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Largest accepted import time of the repo's own modules for `--help`, in microseconds.
+# NumPy alone takes longer than this, so pulling a batch engine back in fails the test.
+STARTUP_BUDGET_US = 150_000
+
+# Modules only the batch engines and web apps need
+HEAVY_MODULES = ("numpy", "flask", "starlette", "services.analytics", "services.simulation",
+                 "services.optimizer", "services.records")
+
+
+def import_times(args: List[str]) -> Dict[str, int]:
+    """
+    Run Python with `-X importtime` and collect the cumulative import time of every module.
+
+    Args:
+        args (List[str]): Arguments after `python -X importtime`.
+
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds by module name, with the
+        nesting kept as leading spaces.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.rstrip()[1:]] = int(cumulative)
+    return times
+
+
+def test_cli_help_skips_heavy_imports() -> None:
+    """
+    Test that the CLI's help loads neither the batch engines nor the game itself.
+    """
+    modules = {module.strip() for module in import_times(["slot-machine-game.py", "--help"])}
+
+    assert "services.machines" in modules
+    for module in HEAVY_MODULES + ("services.game", "services.ledger"):
+        assert module not in modules
+
+
+def test_game_and_api_skip_numpy() -> None:
+    """
+    Test that the interactive game and the web apps' shared code import without NumPy.
+    """
+    modules = {module.strip() for module in import_times(["-c", "import services.game, services.api"])}
+
+    assert "services.logic" in modules
+    for module in HEAVY_MODULES:
+        assert module not in modules
+
+
+def test_cli_startup_budget() -> None:
+    """
+    Test that the repo's modules imported by the CLI's help stay within the startup budget.
+    The best of three runs is used, as a single run is at the mercy of the machine's load.
+    """
+    best = min(
+        sum(cumulative for module, cumulative in import_times(["slot-machine-game.py", "--help"]).items()
+            if module.startswith("services"))
+        for _ in range(3)
+    )
+
+    assert best < STARTUP_BUDGET_US
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+
+from services.store import InsufficientFunds, SessionStore
+
+
+class FakeClock:
+    """
+    A clock that only moves when told to.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_create_and_get() -> None:
+    """
+    Test that a new session holds its starting balance and unknown ids return None.
+    """
+    store = SessionStore()
+    session_id = store.create(150)
+
+    assert store.get(session_id) == 150
+    assert store.get("unknown") is None
+    assert store.get(None) is None
+
+
+def test_transact_updates_balance() -> None:
+    """
+    Test that a transaction replaces the balance and hands back its value.
+    """
+    store = SessionStore()
+    session_id = store.create(100)
+
+    assert store.transact(session_id, lambda balance: (balance - 10, "spun")) == "spun"
+    assert store.get(session_id) == 90
+
+
+def test_transact_error_keeps_balance() -> None:
+    """
+    Test that an exception in the update leaves the balance untouched.
+    """
+    store = SessionStore()
+    session_id = store.create(100)
+
+    def fail(balance: int):
+        raise ValueError("bet too high")
+
+    with pytest.raises(ValueError):
+        store.transact(session_id, fail)
+    assert store.get(session_id) == 100
+
+
+def test_idle_sessions_are_evicted() -> None:
+    """
+    Test that only sessions idle for longer than the TTL are evicted, and that use
+    keeps a session alive.
+    """
+    clock = FakeClock()
+    store = SessionStore(ttl=60, clock=clock)
+    idle = store.create(10)
+    active = store.create(20)
+
+    clock.now = 50
+    assert store.get(active) == 20
+
+    clock.now = 100
+    assert store.get(idle) is None
+    assert store.get(active) == 20
+    assert len(store) == 1
+
+
+def test_debit_and_credit() -> None:
+    """
+    Test that debits and credits return the new balance, and that a debit above the
+    balance is refused without changing it.
+    """
+    store = SessionStore()
+    session_id = store.create(100)
+
+    assert store.debit(session_id, 30) == 70
+    assert store.credit(session_id, 45) == 115
+    with pytest.raises(InsufficientFunds):
+        store.debit(session_id, 116)
+    assert store.get(session_id) == 115
+    assert store.debit("unknown", 1) is None
+
+
+def test_evict_sweeps_every_stripe() -> None:
+    """
+    Test that a full sweep drops idle sessions no matter which stripe holds them.
+    """
+    clock = FakeClock()
+    store = SessionStore(ttl=60, clock=clock, stripes=8)
+    for _ in range(50):
+        store.create(1)
+
+    clock.now = 61
+    assert store.evict() == 50
+    assert len(store) == 0
+
+
+def test_concurrent_updates_are_not_lost() -> None:
+    """
+    Test that many threads debiting and crediting shared sessions never lose an update.
+    """
+    store = SessionStore(stripes=4)
+    sessions = [store.create(1000) for _ in range(16)]
+
+    def play(offset: int) -> None:
+        for i in range(500):
+            session_id = sessions[(i + offset) % len(sessions)]
+            store.debit(session_id, 3)
+            store.credit(session_id, 2)
+
+    threads = [threading.Thread(target=play, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 8 threads x 500 rounds, each round nets -1
+    assert sum(store.get(session_id) for session_id in sessions) == 16 * 1000 - 8 * 500
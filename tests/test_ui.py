@@ -1,4 +1,7 @@
-from services.ui import deposit, get_number_of_slot_lines, get_bet, print_slot_machine
+import io
+import re
+
+from services.ui import GridRenderer, deposit, format_slot_machine, get_number_of_slot_lines, get_bet, print_slot_machine
 
 # --- deposit() tests ---
 
@@ -131,4 +134,101 @@ def test_print_slot_machine_row_count(capsys) -> None:
     print_slot_machine(columns)
     captured = capsys.readouterr()
     output_lines = captured.out.strip().split("\n")
-    assert len(output_lines) == 3 # 3 rows expected
\ No newline at end of file
+    assert len(output_lines) == 3 # 3 rows expected
+
+def test_print_slot_machine_single_write(monkeypatch) -> None:
+    """
+    The whole grid must reach stdout in one write.
+    """
+    terminal = Terminal()
+    monkeypatch.setattr("sys.stdout", terminal)
+
+    print_slot_machine([["A", "B", "C"], ["A", "C", "D"], ["A", "D", "C"]])
+
+    assert terminal.writes == ["A | A | A\nB | C | D\nC | D | C\n"]
+
+
+# --- GridRenderer tests ---
+
+class Terminal:
+    """
+    A minimal terminal emulator for the escapes GridRenderer uses, counting writes.
+    """
+
+    def __init__(self) -> None:
+        self.screen = [[]]
+        self.row = self.col = 0
+        self.writes = []
+
+    def isatty(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def write(self, text: str) -> None:
+        self.writes.append(text)
+        pattern = re.compile(r"\x1b\[(\d*)([ABCK])|(\r)|(\n)|([^\x1b\r\n])")
+        for count, code, carriage, newline, char in pattern.findall(text):
+            if code == "A":
+                self.row -= int(count)
+            elif code == "B":
+                self.row += int(count)
+            elif code == "C":
+                self.col += int(count)
+            elif code == "K":
+                self.screen[self.row] = []
+            elif carriage:
+                self.col = 0
+            elif newline:
+                self.row += 1
+                self.col = 0
+            else:
+                line = self.screen[self.row]
+                line.extend(" " * (self.col + 1 - len(line)))
+                line[self.col] = char
+                self.col += 1
+            while len(self.screen) <= self.row:
+                self.screen.append([])
+
+    def text(self) -> str:
+        return "\n".join("".join(line) for line in self.screen)
+
+
+def test_grid_renderer_redraws_changed_cells_in_place() -> None:
+    """
+    Every frame must be one write, later frames only rewrite what changed, and the
+    screen must always show the latest frame.
+    """
+    terminal = Terminal()
+    renderer = GridRenderer(terminal)
+    frames = [
+        ([["A", "B", "C"], ["A", "C", "D"], ["A", "D", "C"]], "Spin 1: won $5 on lines 1 | Balance: $105"),
+        ([["A", "B", "C"], ["B", "C", "D"], ["A", "D", "C"]], "Spin 2: no win | Balance: $102"),
+        ([["A", "B", "C"], ["B", "C", "D"], ["A", "D", "C"]], "Spin 3: no win | Balance: $99"),
+    ]
+
+    for number, (columns, status) in enumerate(frames, start=1):
+        renderer.render(columns, status)
+        assert len(terminal.writes) == number
+        assert terminal.text() == format_slot_machine(columns) + status + "\n"
+
+    assert "A | A | A" not in terminal.writes[1] # Only the changed symbol and status are sent
+    assert len(terminal.writes[1]) < len(terminal.writes[0])
+
+
+def test_grid_renderer_plain_and_quiet_streams() -> None:
+    """
+    Streams that are not terminals get full frames without escapes; quiet mode writes nothing.
+    """
+    columns = [["X", "Y"], ["X", "Z"]]
+
+    stream = io.StringIO()
+    renderer = GridRenderer(stream)
+    renderer.render(columns, "first")
+    renderer.render(columns, "second")
+    assert stream.getvalue() == "X | X\nY | Z\nfirst\nX | X\nY | Z\nsecond\n"
+
+    quiet = io.StringIO()
+    GridRenderer(quiet, quiet=True).render(columns, "status")
+    assert quiet.getvalue() == ""
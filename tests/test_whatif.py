@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from services.logic import SlotMachine
+from services.records import RecordWriter
+from services.whatif import rescore, rescore_records
+
+SYMBOLS = {
+    "A": 2,
+    "B": 4,
+    "C": 6,
+    "D": 8
+}
+
+SYMBOL_VALUES = {
+    "A": 5,
+    "B": 4,
+    "C": 3,
+    "D": 2
+}
+
+CANDIDATES = {
+    "flat": {"A": 3, "B": 3, "C": 3, "D": 3},
+    "top-heavy": {"A": 20, "B": 4, "C": 2, "D": 1},
+    "partial-runs": {"A": {2: 1, 3: 8}, "B": 4, "C": {2: 1, 3: 3}, "D": 2}, # Pays runs the current table does not
+}
+
+
+def spin_batches(machine: SlotMachine, batches: int, size: int, seed: int):
+    """
+    Generate (grids, lines, bet) batches with varying lines and bets.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        (machine.spin_many(size, rng), rng.integers(1, 4, size=size), rng.integers(1, 11, size=size))
+        for _ in range(batches)
+    ]
+
+
+def test_rescore_matches_check_winnings_per_paytable() -> None:
+    """
+    Every paytable's result must equal a full `check_winnings_many` run with that paytable.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    batches = spin_batches(machine, 3, 2000, seed=1)
+
+    results = rescore(machine, batches, CANDIDATES)
+    wagered = sum(int((lines * bet).sum()) for _, lines, bet in batches)
+
+    for name, table in [("current", SYMBOL_VALUES)] + list(CANDIDATES.items()):
+        candidate = SlotMachine(3, 3, SYMBOLS, table)
+        expected = sum(int(candidate.check_winnings_many(g, l, b)[0].sum()) for g, l, b in batches)
+
+        assert results[name]["winnings"] == expected
+        assert results[name]["rtp"] == pytest.approx(expected / wagered)
+
+    assert results["current"]["delta"] == 0
+    assert results["flat"]["delta"] == results["flat"]["winnings"] - results["current"]["winnings"]
+
+
+def test_rescore_records_file(tmp_path) -> None:
+    """
+    Re-scoring a record file gives the same results as re-scoring the batches it holds.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    batches = spin_batches(machine, 2, 1500, seed=2)
+    path = tmp_path / "spins.rec"
+
+    with RecordWriter(str(path), machine) as writer:
+        for grids, lines, bet in batches:
+            writer.write(grids, lines, bet, machine.check_winnings_many(grids, lines, bet)[0])
+
+    assert rescore_records(str(path), machine, CANDIDATES, chunk=700) == rescore(machine, batches, CANDIDATES)
+
+
+def test_rescore_missing_symbols_pay_nothing() -> None:
+    """
+    Symbols a paytable leaves out pay nothing, as if they were priced at 0, while an
+    invalid run length still raises a ValueError.
+    """
+    machine = SlotMachine(3, 3, SYMBOLS, SYMBOL_VALUES)
+    batches = spin_batches(machine, 2, 1000, seed=3)
+
+    results = rescore(machine, batches, {"only-a": {"A": 5}, "zeros": {"A": 5, "B": 0, "C": 0, "D": 0}})
+    assert results["only-a"]["winnings"] == results["zeros"]["winnings"] > 0
+
+    with pytest.raises(ValueError):
+        rescore(machine, [], {"broken": {"A": {4: 1}}})